@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 from datetime import timedelta
 
 from dotenv import load_dotenv
@@ -9,11 +10,14 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 
 from app.blueprints.auth import auth_bp
 from app.blueprints.main import main_bp
+from app.blueprints.metrics import metrics_bp
 from app.blueprints.stats import stats_bp
 from app.cli import register_commands
 from app.config import Config
 from app.database import init_db, shutdown_session
+from app.http_pool import warm_connections
 from app.i18n import TRANSLATIONS
+from app.metrics import init_app as init_metrics
 
 
 def create_app():
@@ -50,6 +54,10 @@ def create_app():
     # Initialize database
     init_db(app)
 
+    # Request timing and per-request SQL counts for /metrics
+    if Config.METRICS_ENABLED:
+        init_metrics(app)
+
     # Initialize CSRF Protection
     CSRFProtect(app)
 
@@ -78,8 +86,23 @@ def create_app():
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(stats_bp, url_prefix="/stats")
+    app.register_blueprint(metrics_bp)
 
     # Register CLI commands
     register_commands(app)
 
+    # Open upstream connections on a server's first request, before the first
+    # arena round needs them; CLI commands and init_db.py never serve one.
+    # The lock is never released, so only the first request starts a warm-up.
+    warm_once = threading.Lock()
+
+    @app.before_request
+    def warm_upstream_connections():
+        if not app.testing and warm_once.acquire(blocking=False):
+            warm_connections(
+                Config.OPENROUTER_BASE_URL,
+                Config.OPENROUTER_API_KEY or "",
+                Config.HTTP_POOL_WARM_CONNECTIONS,
+            )
+
     return app
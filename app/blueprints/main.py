@@ -1,8 +1,6 @@
 import json
 import random
 from collections import defaultdict
-from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
-from itertools import combinations
 
 from flask import (
     Blueprint,
@@ -16,23 +14,39 @@ from flask import (
     stream_with_context,
     url_for,
 )
-from sqlalchemy import func
 
 from app.config import get_config
 from app.database import db_session
 from app.llm_clients import get_available_models
-from app.models import PairwiseComparison, Query, Translation, User
+from app.metrics import track_stream
+from app.models import Query, Translation, User
 from app.predefined_queries import PREDEFINED_QUERIES
+from app.repositories.counter_repository import (
+    TOTAL_PAIRS,
+    CounterRepository,
+    explicit_comparisons_key,
+)
 from app.services.cost_service import check_user_budget
 from app.services.elo_service import get_elo_service
-from app.services.stats_service import get_model_usage_stats
-from app.services.translation_service import get_translation_for_model
+from app.services.pair_scheduler import get_pair_scheduler
+from app.services.stats_service import (
+    get_model_latency_stats,
+    get_model_usage_stats,
+)
+from app.services.translation_engine import get_translation_engine
+from app.services.translation_service import resolve_query
 from app.services.vote_service import process_votes
 
 main_bp = Blueprint("main", __name__)
 
+# Rounds of picks in /compare/random before giving up on deleted translations
+MAX_PAIR_ATTEMPTS = 5
+
+# Most pairs one /compare/random?count=N call returns
+MAX_PREFETCH_PAIRS = 20
+
 
-def _select_models(available_models_map, usage_stats, config):
+def _select_models(available_models_map, usage_stats, config, latency_stats=None):
     """
     Selects up to MAX_MODELS models with balanced randomness and strategic grouping.
 
@@ -44,14 +58,28 @@ def _select_models(available_models_map, usage_stats, config):
     - Group preset variants of the same base model together (e.g., thinking vs no-thinking,
       high temp vs low temp) to enable quality ELO comparisons between configurations
 
+    - With MAX_SLOW_MODELS_PER_ROUND set, keep rounds fast: at most that many
+      models whose estimated latency (`latency_stats`, milliseconds)
+      exceeds SLOW_MODEL_SECONDS. Models without an estimate count as fast
+
     Algorithm:
     1. Group models by base_model
     2. Calculate average usage per group (to prioritize low-usage groups)
     3. Shuffle groups with similar usage to add randomness
-    4. Select groups in priority order, including all variants from each group
+    4. Select groups in priority order, including all variants from each group;
+       once the slow budget is spent, a group contributes only its fast variants
     5. Stop when we would exceed MAX_MODELS
+
+    Slow models skipped for the budget keep their low usage, so their groups
+    come first in later rounds and take the slow slots there.
     """
     max_models = config.MAX_MODELS_SELECTION
+    slow_budget = config.MAX_SLOW_MODELS_PER_ROUND
+    slow_ms = config.SLOW_MODEL_SECONDS * 1000
+    latency_stats = latency_stats or {}
+
+    def is_slow(key):
+        return latency_stats.get(key, 0) > slow_ms
 
     # Group models by base_model
     base_groups = defaultdict(list)
@@ -95,22 +123,44 @@ def _select_models(available_models_map, usage_stats, config):
 
     # Select groups until we reach MAX_MODELS
     selected_keys = []
+    skipped_slow = []
+    slow_selected = 0
     for _, _base, model_keys in bucketed_groups:
+        if slow_budget is not None:
+            # Least used slow variants take whatever slow slots are left
+            slow_variants = sorted(
+                (k for k in model_keys if is_slow(k)),
+                key=lambda k: usage_stats.get(k, 0),
+            )
+            allowed = set(slow_variants[: max(slow_budget - slow_selected, 0)])
+            skipped_slow.extend(k for k in slow_variants if k not in allowed)
+            model_keys = [k for k in model_keys if not is_slow(k) or k in allowed]
+            if not model_keys:
+                continue
+
         # Check if adding this entire group would exceed the limit
         if len(selected_keys) + len(model_keys) <= max_models:
             # Include all variants from this base model
-            selected_keys.extend(model_keys)
+            added = model_keys
         elif len(selected_keys) < max_models:
             # Partial selection: we have some room but not enough for all variants
             # Randomly select variants to fill remaining slots
             remaining_slots = max_models - len(selected_keys)
             # Sort variants by usage within this group, then take top N
             variants_by_usage = sorted(model_keys, key=lambda k: usage_stats.get(k, 0))
-            selected_keys.extend(variants_by_usage[:remaining_slots])
-            break
+            added = variants_by_usage[:remaining_slots]
         else:
             # Already at capacity
             break
+        selected_keys.extend(added)
+        slow_selected += sum(1 for k in added if is_slow(k))
+        if len(selected_keys) >= max_models:
+            break
+
+    # A round needs two models even if only slow ones are left
+    skipped_slow.sort(key=lambda k: usage_stats.get(k, 0))
+    while len(selected_keys) < min(2, max_models) and skipped_slow:
+        selected_keys.append(skipped_slow.pop(0))
 
     return selected_keys
 
@@ -125,12 +175,15 @@ def index():
 
     available_models = get_available_models()
     usage_stats = get_model_usage_stats()
+    latency_stats = get_model_latency_stats()
 
     # Get user budget info
     is_allowed, user_monthly_cost = check_user_budget(username)
 
     # Select models with smart grouping
-    selected_model_keys = _select_models(available_models, usage_stats, get_config())
+    selected_model_keys = _select_models(
+        available_models, usage_stats, get_config(), latency_stats
+    )
 
     # Create the dictionary for only the selected models
     final_models = {k: available_models[k] for k in selected_model_keys}
@@ -155,10 +208,13 @@ def available_models():
     """Returns a list of available (active) models for selection."""
     available_models_map = get_available_models()
     usage_stats = get_model_usage_stats()
+    latency_stats = get_model_latency_stats()
     conf = get_config()
 
     # Use smart selection logic
-    selected_keys = set(_select_models(available_models_map, usage_stats, conf))
+    selected_keys = set(
+        _select_models(available_models_map, usage_stats, conf, latency_stats)
+    )
 
     # Still sort the returned list by usage to show least used first
     sorted_model_keys = sorted(
@@ -180,43 +236,44 @@ def available_models():
     return jsonify({"models": models_data})
 
 
-def stream_translation_generator(query_text, selected_models, user_id=None):
+def stream_translation_generator(
+    query_text, selected_models, user_id=None, *, stream_tokens=False, query_id=None
+):
     """
     A generator function that yields translation results as they are completed.
     This function will be used with stream_with_context.
+
+    The model calls run as coroutines on the shared translation engine, so this
+    generator is the only thread the request holds while models are working.
+    With `stream_tokens`, partial output is sent as `delta` events before each
+    model's final result.
     """
     shuffled_models = random.sample(selected_models, len(selected_models))
-    futures = {}
-
-    with ThreadPoolExecutor(max_workers=len(shuffled_models)) as executor:
-        for i, model_key in enumerate(shuffled_models):
-            future = executor.submit(
-                get_translation_for_model, query_text, model_key, i + 1, user_id
-            )
-            futures[future] = model_key
-
-        pending_futures = set(futures.keys())
-        while pending_futures:
-            # Wait for any future to complete, or timeout after 2 seconds
-            done, _ = wait(pending_futures, return_when=FIRST_COMPLETED, timeout=2.0)
-
-            if not done:
-                # No model finished in the last 2 seconds, send keep-alive comment
-                yield ": keep-alive\n\n"
-                continue
+    engine = get_translation_engine()
+
+    for item in engine.fan_out(
+        query_text,
+        shuffled_models,
+        user_id,
+        stream_tokens=stream_tokens,
+        query_id=query_id,
+    ):
+        if item is None:
+            # No model finished in the last 2 seconds, send keep-alive comment
+            yield ": keep-alive\n\n"
+            continue
 
-            for future in done:
-                pending_futures.remove(future)
-                model_key = futures[future]
-                try:
-                    result = future.result()
-                    if result:
-                        sse_data = f"data: {json.dumps(result)}\n\n"
-                        yield sse_data
-                except Exception as e:
-                    current_app.logger.exception(f"Stream error for {model_key}")
-                    error_data = {"error": str(e), "model": model_key}
-                    yield f"data: {json.dumps(error_data)}\n\n"
+        kind, model_key, payload = item
+        if kind == "delta":
+            yield f"event: delta\ndata: {json.dumps(payload)}\n\n"
+        elif kind == "result":
+            if payload:
+                sse_data = f"data: {json.dumps(payload)}\n\n"
+                yield sse_data
+        else:
+            current_app.logger.error(f"Stream error for {model_key}", exc_info=payload)
+            error_data = {"error": str(payload), "model": model_key}
+            yield f"data: {json.dumps(error_data)}\n\n"
 
     yield "event: end\ndata: Stream finished\n\n"
 
@@ -228,6 +285,7 @@ def stream_translate():
     """
     query_text = request.args.get("query", "").strip()
     selected_models = request.args.getlist("models")
+    stream_tokens = request.args.get("stream_tokens") == "1"
 
     if not query_text or not selected_models or len(selected_models) < 2:
         error_event = f"event: error\ndata: {json.dumps({'message': 'Query and at least two models are required.'})}\n\n"
@@ -253,9 +311,20 @@ def stream_translate():
     user = db_session.query(User).filter(User.username == username).first()
     user_id = user.id if user else None
 
+    # Resolve the Query once so the models' workers share its ID
+    query_id = resolve_query(query_text)
+
     return Response(
         stream_with_context(
-            stream_translation_generator(query_text, selected_models, user_id)
+            track_stream(
+                stream_translation_generator(
+                    query_text,
+                    selected_models,
+                    user_id,
+                    stream_tokens=stream_tokens,
+                    query_id=query_id,
+                )
+            )
         ),
         mimetype="text/event-stream",
         headers={
@@ -319,7 +388,7 @@ def retry_single():
     user_id = user.id if user else None
 
     try:
-        result = get_translation_for_model(
+        result = get_translation_engine().translate(
             query_text, model_key, position=0, user_id=user_id
         )
         if result:
@@ -348,8 +417,16 @@ def compare_ui():
 @main_bp.route("/compare/random")
 def get_random_comparison():
     """
-    Get 2 translations from the same query for pairwise comparison.
-    Returns translations that haven't been compared yet or need more comparisons.
+    Get translation pairs from the same query for pairwise comparison.
+
+    Picks pairs the user has not compared yet, ranked by the configured
+    `PAIR_SELECTION_STRATEGY`. Without `count`, returns one pair as before.
+    With `count=N`, returns up to N distinct pairs as
+    {"pairs": [...], "stats": ...} and leases them to the user, so later
+    batches do not repeat them while the client holds them; pass
+    `release=1` to drop those leases first (e.g. on page load or after
+    changing filters). Leased pairs are offered again once nothing else is
+    left, so 404 means every eligible pair has been compared.
     """
 
     username = session.get("username", "Guest")
@@ -359,172 +436,93 @@ def get_random_comparison():
 
     target_models_str = request.args.get("target_models", "")
     target_models = {m.strip() for m in target_models_str.split(",") if m.strip()}
-
-    # Find queries with at least 2 translations
-    queries_with_translations = (
-        db_session.query(Query.id)
-        .join(Translation)
-        .group_by(Query.id)
-        .having(func.count(Translation.id) >= 2)
-        .all()
-    )
-
-    if not queries_with_translations:
-        return jsonify({"error": "No queries with multiple translations found"}), 404
-
-    # Pick a random query
-    query_ids = [q.id for q in queries_with_translations]
-    random.shuffle(query_ids)
-
-    # Optimize: Fetch all model ELOs once
-    elo_service = get_elo_service()
-    all_elos = {r["model"]: r["elo_rating"] for r in elo_service.get_all_rankings()}
-
-    # Optimize: Get user's existing comparisons for checking (could be large, so maybe filter by query later if needed)
-    # Actually, better to fetch per query to avoid massive memory usage if user has done 1000s.
-    for query_id in query_ids:
-        translations = (
-            db_session.query(Translation).filter(Translation.query_id == query_id).all()
+    count = request.args.get("count", type=int)
+    batched = count is not None
+    count = min(max(count or 1, 1), MAX_PREFETCH_PAIRS)
+
+    scheduler = get_pair_scheduler()
+    if request.args.get("release") == "1":
+        scheduler.release_leases(user.id)
+
+    pairs = _pick_pairs(scheduler, user.id, count, target_models, batched)
+    if not pairs and scheduler.release_leases(user.id):
+        # Only pairs leased to this user were left, e.g. held by a reloaded
+        # page or another tab; offer them again rather than reporting the
+        # user as done
+        pairs = _pick_pairs(scheduler, user.id, count, target_models, batched)
+
+    if not pairs:
+        return jsonify({"error": "All pairs have been compared"}), 404
+
+    queries = {
+        q.id: q
+        for q in db_session.query(Query).filter(
+            Query.id.in_({t1.query_id for t1, _ in pairs})
         )
+    }
+    conf = get_config()
 
-        if len(translations) < 2:
-            continue
-
-        # Optimization: Early skip if targeting models and this query has none of them
-        if target_models and not any(t.model in target_models for t in translations):
-            continue
-
-        # --- Filter Candidates ---
-        # 1. Reject explicit trash (optional, if we track rejection status on Translation)
-        # 2. Reject if average vote < 1.5 (requires joining votes, maybe expensive here)
-        # For now, we trust the "model sorting" to naturally deprioritize bad models if we selected good ones upstream.
-
-        # Optimize: Fetch ALL existing comparisons for this query by this user in ONE query
-        # This replaces the N*N loop of DB calls
-        existing_pairs = (
-            db_session.query(
-                PairwiseComparison.translation_a_id, PairwiseComparison.translation_b_id
-            )
-            .filter(
-                PairwiseComparison.user_id == user.id,
-                PairwiseComparison.query_id == query_id,
-                PairwiseComparison.source == "explicit",
-            )
-            .all()
-        )
-        # Create a set of frozen sets for order-independent lookup: {(id1, id2), ...}
-        compared_pairs = {frozenset([p[0], p[1]]) for p in existing_pairs}
+    def translation_json(t):
+        return {
+            "id": t.id,
+            "text": t.translation,
+            "model": t.model,
+            "base_model": conf.MODELS.get(t.model, {}).get("base_model", t.model),
+            "preset_name": conf.MODELS.get(t.model, {}).get("preset_name"),
+        }
 
-        candidate_pairs = []
+    def pair_json(t1, t2):
+        query = queries.get(t1.query_id)
+        return {
+            "query_id": t1.query_id,
+            "source_text": query.source_text if query else "",
+            "translations": [translation_json(t1), translation_json(t2)],
+        }
 
-        # Shuffle translations first to ensure random tie-breaking
-        random.shuffle(translations)
+    # Stats Calculation
+    stats = _get_user_comparison_stats(user.id)
 
-        for t1, t2 in combinations(translations, 2):
-            # If targeting models, ensure at least one is in the target set
-            if target_models and (
-                t1.model not in target_models and t2.model not in target_models
-            ):
-                continue
+    if batched:
+        return jsonify({"pairs": [pair_json(*p) for p in pairs], "stats": stats})
+    return jsonify({**pair_json(*pairs[0]), "stats": stats})
 
-            pair_key = frozenset([t1.id, t2.id])
-            if pair_key in compared_pairs:
-                continue
 
-            # Calculate ELO difference
-            elo1 = all_elos.get(t1.model, 1500.0)
-            elo2 = all_elos.get(t2.model, 1500.0)
-            diff = abs(elo1 - elo2)
-
-            candidate_pairs.append(((t1, t2), diff))
-
-        if candidate_pairs:
-            # Sort by ELO difference (ascending) -> compare closest models first
-            # Add noise to the sort key? No, easier to just pick random from top N.
-            candidate_pairs.sort(key=lambda x: x[1])
-
-            # Take top 5 closest pairs and pick one randomly
-            top_candidates = candidate_pairs[:5]
-            selected_pair, _ = random.choice(top_candidates)
-            t1, t2 = selected_pair
-
-            # Found a pair!
-            query = db_session.query(Query).get(query_id)
-            conf = get_config()
-
-            # Stats Calculation
-            stats = _get_user_comparison_stats(user.id)
-
-            return jsonify(
-                {
-                    "query_id": query_id,
-                    "source_text": query.source_text if query else "",
-                    "translations": [
-                        {
-                            "id": t1.id,
-                            "text": t1.translation,
-                            "model": t1.model,
-                            "base_model": conf.MODELS.get(t1.model, {}).get(
-                                "base_model", t1.model
-                            ),
-                            "preset_name": conf.MODELS.get(t1.model, {}).get(
-                                "preset_name"
-                            ),
-                        },
-                        {
-                            "id": t2.id,
-                            "text": t2.translation,
-                            "model": t2.model,
-                            "base_model": conf.MODELS.get(t2.model, {}).get(
-                                "base_model", t2.model
-                            ),
-                            "preset_name": conf.MODELS.get(t2.model, {}).get(
-                                "preset_name"
-                            ),
-                        },
-                    ],
-                    "stats": stats,
-                }
+def _pick_pairs(scheduler, user_id, count, target_models, lease):
+    """Best-scoring uncompared pairs from the user's in-memory pair index."""
+    pairs = []
+    for _ in range(MAX_PAIR_ATTEMPTS):
+        wanted = count - len(pairs)
+        picked = scheduler.next_pairs(user_id, wanted, target_models, lease=lease)
+        translations = {
+            t.id: t
+            for t in db_session.query(Translation).filter(
+                Translation.id.in_([tid for pair in picked for tid in pair])
             )
-
-    return jsonify({"error": "All pairs have been compared"}), 404
+        }
+        for pair in picked:
+            if pair[0] in translations and pair[1] in translations:
+                pairs.append((translations[pair[0]], translations[pair[1]]))
+            else:
+                # Deleted since the index was built
+                scheduler.discard(user_id, *pair)
+        if len(picked) < wanted or len(pairs) == count:
+            break
+    return pairs
 
 
 def _get_user_comparison_stats(user_id):
-    """Helper to calculate user comparison stats efficiently."""
-    # 1. Count user's explicit comparisons
-    comparisons_count = (
-        db_session.query(func.count(PairwiseComparison.id))
-        .filter(
-            PairwiseComparison.user_id == user_id,
-            PairwiseComparison.source == "explicit",
-        )
-        .scalar()
-    ) or 0
-
-    # 2. Estimate total pairs
-    # OPTIMIZATION: This aggregation is heavy.
-    # In a real app, we might cache this value or update it incrementally.
-    # For now, we'll keep it but ensure we use indices.
-    # Note: query(Translation.query_id, count(*)) is still a full table scan usually unless indexed on query_id
-    translation_counts = (
-        db_session.query(func.count(Translation.id))
-        .group_by(Translation.query_id)
-        .having(func.count(Translation.id) >= 2)
-        .all()
-    )
-
-    total_pairs = sum((c[0] * (c[0] - 1)) // 2 for c in translation_counts)
-    pairs_remaining = max(0, total_pairs - comparisons_count)
+    """Quick Compare progress, read from the write-time counters."""
+    user_key = explicit_comparisons_key(user_id)
+    counters = CounterRepository(db_session).get_many([TOTAL_PAIRS, user_key])
+    comparisons_count = counters[user_key]
+    total_pairs = counters[TOTAL_PAIRS]
 
     return {
         "comparisons_done": comparisons_count,
-        "pairs_remaining": pairs_remaining,
+        "pairs_remaining": max(0, total_pairs - comparisons_count),
         "total_pairs": total_pairs,
     }
 
-    return jsonify({"error": "All pairs have been compared"}), 404
-
 
 @main_bp.route("/compare/submit", methods=["POST"])
 def submit_comparison():
@@ -586,7 +584,10 @@ def submit_comparison():
             translation_b_id=t2.id,
             source="explicit",
         )
-        return jsonify({"status": "success"})
+        get_pair_scheduler().record_comparison(user.id, t1.id, t2.id)
+        return jsonify(
+            {"status": "success", "stats": _get_user_comparison_stats(user.id)}
+        )
     except Exception as e:
         current_app.logger.exception("Error recording comparison")
         return jsonify({"error": str(e)}), 500
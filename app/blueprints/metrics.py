@@ -0,0 +1,37 @@
+import hmac
+
+from flask import Blueprint, Response, jsonify, request, session
+
+from app.config import get_config
+from app.metrics import REGISTRY
+from app.services.user_service import get_user_by_username
+
+metrics_bp = Blueprint("metrics", __name__)
+
+config = get_config()
+
+
+def _authorized() -> bool:
+    """Admins, or scrapers sending `Authorization: Bearer <METRICS_TOKEN>`."""
+    token = config.METRICS_TOKEN
+    auth = request.headers.get("Authorization", "")
+    if token and auth.startswith("Bearer "):
+        return hmac.compare_digest(auth.removeprefix("Bearer "), token)
+
+    username = session.get("username", "Guest")
+    if username == "Guest":
+        return False
+    user = get_user_by_username(username)
+    return bool(user and user.is_admin)
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    """Process metrics in the Prometheus text format."""
+    if not config.METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    if not _authorized():
+        return jsonify({"error": "Admin access required"}), 403
+    return Response(
+        REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,38 +1,79 @@
-from flask import Blueprint, render_template, session
+import hashlib
+import time
 
-from app.services.stats_service import (
-    calculate_global_stats,
-    calculate_model_scores,
-    get_cost_breakdown,
-    get_monthly_spending_stats,
+from flask import (
+    Blueprint,
+    current_app,
+    g,
+    make_response,
+    render_template,
+    request,
+    session,
 )
 
+from app.services.stats_service import get_upstream_latency_stats
+from app.services.stats_snapshot import get_stats_snapshot_engine
+
 stats_bp = Blueprint("stats", __name__)
 
 
+def _stats_etag(version: str, upstream_latency: list, username: str) -> str:
+    """
+    ETag for the rendered stats page.
+
+    The page embeds the username, language and a CSRF token, so those are
+    part of the tag, as is the separately cached upstream latency table. The
+    time window makes browsers refetch before a cached page's CSRF token
+    could expire.
+    """
+    csrf_limit = current_app.config.get("WTF_CSRF_TIME_LIMIT", 3600)
+    window = int(time.time() // (csrf_limit / 2)) if csrf_limit else 0
+    latency = hashlib.sha256(repr(upstream_latency).encode("utf-8")).hexdigest()
+    key = f"{version}|{latency}|{username}|{g.get('lang', '')}|{window}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
 @stats_bp.route("/stats")
 def stats():
     """Renders the statistics page with model performance data."""
     username = session.get("username", "Guest")
-    model_scores = calculate_model_scores()
-    global_stats = calculate_global_stats()
-    spending_stats = get_monthly_spending_stats()
-    cost_breakdown = get_cost_breakdown()
-
-    # Prepare data for the Chart.js graph
-    # The list is already sorted by rank from the service
-    chart_labels = [score["model_name"] for score in model_scores]
-    chart_data = [score["average_score"] for score in model_scores]
-    total_votes = sum(score["votes_cast"] for score in model_scores)
-
-    return render_template(
-        "stats.html",
-        model_scores=model_scores,
-        global_stats=global_stats,
-        spending_stats=spending_stats,
-        cost_breakdown=cost_breakdown,
-        username=username,
-        chart_labels=chart_labels,
-        chart_data=chart_data,
-        total_votes=total_votes,
-    )
+    snapshot = get_stats_snapshot_engine().get()
+    upstream_latency = get_upstream_latency_stats()
+
+    etag = _stats_etag(snapshot.version, upstream_latency, username)
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        model_scores = snapshot.data["model_scores"]
+
+        # Prepare data for the Chart.js graph
+        # The list is already sorted by rank from the service
+        chart_labels = [score["model_name"] for score in model_scores]
+        chart_data = [score["average_score"] for score in model_scores]
+        total_votes = sum(score["votes_cast"] for score in model_scores)
+
+        # Optional Bradley-Terry column, keyed by model for the table rows
+        bradley_terry = None
+        if snapshot.data.get("bradley_terry") is not None:
+            bradley_terry = {r["model"]: r for r in snapshot.data["bradley_terry"]}
+
+        response = make_response(
+            render_template(
+                "stats.html",
+                model_scores=model_scores,
+                global_stats=snapshot.data["global_stats"],
+                spending_stats=snapshot.data["spending_stats"],
+                cost_breakdown=snapshot.data["cost_breakdown"],
+                upstream_latency=upstream_latency,
+                username=username,
+                chart_labels=chart_labels,
+                chart_data=chart_data,
+                total_votes=total_votes,
+                bradley_terry=bradley_terry,
+            )
+        )
+
+    response.set_etag(etag)
+    # Browsers keep the page but revalidate it on every visit
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
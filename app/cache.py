@@ -0,0 +1,91 @@
+"""Small in-process caches with expiry and hit/miss counters."""
+
+import threading
+import time
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from app.config import get_config
+
+config = get_config()
+
+# Every cache created in this process, by name, for metrics reporting
+_registry: dict[str, "TTLCache"] = {}
+_registry_lock = threading.Lock()
+
+
+class TTLCache:
+    """
+    Thread-safe cache whose entries expire `ttl` seconds after being set.
+
+    Each gunicorn worker has its own copy, so invalidation only reaches the
+    current process; the TTL bounds how stale other workers can be. When
+    full, the oldest entry is evicted.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int | None = None):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size or config.MAX_CACHE_SIZE
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with _registry_lock:
+            _registry[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or `default` if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_size:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value, computing and storing it on a miss.
+
+        The loader runs outside the lock, so concurrent misses may each load;
+        the last result wins.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop one entry, or every entry when `key` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def get_cache_stats() -> dict[str, dict[str, float]]:
+    """Hit/miss counters of every cache in this process, keyed by name."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
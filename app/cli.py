@@ -5,7 +5,7 @@ from flask.cli import with_appcontext
 
 from app.config import Config
 from app.database import Base, db_session, engine
-from app.models import User
+from app.models import ModelELO, User
 from app.services.user_service import create_user, delete_user
 
 
@@ -89,18 +89,107 @@ def derive_elo_command(user_id):
     """Derive ELO comparisons from existing votes."""
     from app.services.elo_service import get_elo_service  # noqa: PLC0415
 
+    def report(done, total):
+        print(f"  Inserted {done}/{total} comparisons")
+
     try:
         elo_service = get_elo_service()
         print("Deriving ELO comparisons from existing votes...")
-        count = elo_service.derive_from_existing_votes(user_id=user_id)
+        count = elo_service.derive_from_existing_votes(user_id=user_id, progress=report)
         print(f"Successfully derived {count} new pairwise comparisons.")
     except Exception as e:
         print(f"Error deriving ELO comparisons: {e}")
 
 
+@click.command("recompute-elo")
+@click.option(
+    "--k-factor",
+    type=float,
+    default=None,
+    help="K factor for the replay (defaults to the one used online)",
+)
+@click.option("--dry-run", is_flag=True, help="Show the result without saving it")
+@with_appcontext
+def recompute_elo_command(k_factor, dry_run):
+    """Rebuild ELO ratings by replaying every pairwise comparison."""
+    from app.services.elo_replay import recompute_elo  # noqa: PLC0415
+    from app.services.elo_service import K_FACTOR  # noqa: PLC0415
+
+    before = {r.model: r.elo_rating for r in db_session.query(ModelELO).all()}
+    results = recompute_elo(
+        db_session, K_FACTOR if k_factor is None else k_factor, dry_run=dry_run
+    )
+
+    click.echo(f"{'Model':<40} {'Before':>8} {'After':>8} {'W/L/T':>16}")
+    for r in sorted(results, key=lambda r: r.elo_rating, reverse=True):
+        old = before.get(r.model)
+        old_text = f"{old:.1f}" if old is not None else "-"
+        record = f"{r.wins}/{r.losses}/{r.ties}"
+        click.echo(f"{r.model:<40} {old_text:>8} {r.elo_rating:>8.1f} {record:>16}")
+    if dry_run:
+        click.echo("Dry run: ModelELO was not changed.")
+    else:
+        click.echo(f"Recomputed ELO for {len(results)} models.")
+
+
+@click.command("rebuild-model-stats")
+@click.option(
+    "--check", is_flag=True, help="Only report drift from a fresh aggregation"
+)
+@with_appcontext
+def rebuild_model_stats_command(check):
+    """Rebuild the model_stats leaderboard rollup from scratch."""
+    from app.repositories.model_stats_repository import (  # noqa: PLC0415
+        ModelStatsRepository,
+    )
+
+    stats_repo = ModelStatsRepository(db_session)
+    if check:
+        drift = stats_repo.check()
+        if not drift:
+            click.echo("model_stats matches the translations and votes.")
+            return
+        click.echo(f"{'Model':<40} {'Field':<20} {'Stored':>12} {'Expected':>12}")
+        for model, field, stored, expected in drift:
+            click.echo(f"{model:<40} {field:<20} {stored:>12g} {expected:>12g}")
+        raise SystemExit(1)
+
+    count = stats_repo.rebuild()
+    click.echo(f"Rebuilt model_stats for {count} models.")
+
+
+@click.command("rebuild-counters")
+@click.option(
+    "--check", is_flag=True, help="Only report drift from a fresh aggregation"
+)
+@with_appcontext
+def rebuild_counters_command(check):
+    """Rebuild the Quick Compare progress counters from scratch."""
+    from app.repositories.counter_repository import (  # noqa: PLC0415
+        CounterRepository,
+    )
+
+    counter_repo = CounterRepository(db_session)
+    if check:
+        drift = counter_repo.check()
+        if not drift:
+            click.echo("counters match the translations and comparisons.")
+            return
+        click.echo(f"{'Counter':<40} {'Stored':>12} {'Expected':>12}")
+        for name, stored, expected in drift:
+            click.echo(f"{name:<40} {stored:>12} {expected:>12}")
+        raise SystemExit(1)
+
+    count = counter_repo.rebuild()
+    click.echo(f"Rebuilt {count} counters.")
+
+
 def register_commands(app):
     app.cli.add_command(init_db_command)
     app.cli.add_command(add_user_command)
     app.cli.add_command(remove_user_command)
     app.cli.add_command(list_users_command)
     app.cli.add_command(derive_elo_command)
+    app.cli.add_command(recompute_elo_command)
+    app.cli.add_command(rebuild_model_stats_command)
+    app.cli.add_command(rebuild_counters_command)
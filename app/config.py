@@ -15,7 +15,9 @@ class ModelConfig(TypedDict):
     output_cost_per_mtok: float
     is_active: bool
     is_hidden: NotRequired[bool]  # Hidden from UI selectors but data preserved
-    rate_limit: NotRequired[float | None]
+    rate_limit: NotRequired[float | None]  # Requests per minute per upstream model
+    rate_limit_burst: NotRequired[float | None]  # Token bucket size, default rate_limit
+    max_concurrency: NotRequired[int | None]  # In-flight calls per upstream model
     thinking_budget: NotRequired[int | None]
     temperature: NotRequired[float | None]
     reasoning: NotRequired[dict[str, Any]]
@@ -36,6 +38,20 @@ class Config:
         "DATABASE_URI", f"sqlite:///{DATA_DIR}/dhivehi_translation_arena.db"
     )
 
+    # Shared rate limiter state (token buckets and concurrency slots)
+    RATE_LIMIT_DB: ClassVar[str] = os.environ.get(
+        "RATE_LIMIT_DB", f"{DATA_DIR}/rate_limits.db"
+    )
+    # Seconds a call may wait for a rate limit slot before failing (0 = reject)
+    RATE_LIMIT_WAIT_TIMEOUT: ClassVar[float] = float(
+        os.environ.get("RATE_LIMIT_WAIT_TIMEOUT", "30")
+    )
+
+    # Stats page snapshot shared by workers (see app/services/stats_snapshot.py)
+    STATS_SNAPSHOT_PATH: ClassVar[str] = os.environ.get(
+        "STATS_SNAPSHOT_PATH", f"{DATA_DIR}/stats_snapshot.json"
+    )
+
     # Application settings
     SECRET_KEY: ClassVar[str] = os.environ.get(
         "SECRET_KEY", "dev-secret-key-change-in-production"
@@ -55,9 +71,91 @@ class Config:
             )
 
     MAX_CACHE_SIZE: ClassVar[int] = int(os.environ.get("MAX_CACHE_SIZE", "100"))
+    # Seconds the per-model usage counts behind model selection are cached
+    MODEL_USAGE_CACHE_TTL: ClassVar[float] = float(
+        os.environ.get("MODEL_USAGE_CACHE_TTL", "60")
+    )
     MAX_MODELS_SELECTION: ClassVar[int] = int(
         os.environ.get("MAX_MODELS_SELECTION", "6")
     )
+    # Latency-aware rounds: at most MAX_SLOW_MODELS_PER_ROUND models whose
+    # median latency over their last MODEL_LATENCY_WINDOW upstream calls,
+    # failures and timeouts included, exceeds SLOW_MODEL_SECONDS (unset: no
+    # limit)
+    MAX_SLOW_MODELS_PER_ROUND: ClassVar[int | None] = (
+        int(os.environ["MAX_SLOW_MODELS_PER_ROUND"])
+        if os.environ.get("MAX_SLOW_MODELS_PER_ROUND")
+        else None
+    )
+    SLOW_MODEL_SECONDS: ClassVar[float] = float(
+        os.environ.get("SLOW_MODEL_SECONDS", "30")
+    )
+    MODEL_LATENCY_WINDOW: ClassVar[int] = int(
+        os.environ.get("MODEL_LATENCY_WINDOW", "50")
+    )
+
+    # Fan-out engine: upstream calls in flight per process, and threads used
+    # for the short database lookups/inserts around them
+    TRANSLATION_MAX_CONCURRENCY: ClassVar[int] = int(
+        os.environ.get("TRANSLATION_MAX_CONCURRENCY", "32")
+    )
+    TRANSLATION_DB_WORKERS: ClassVar[int] = int(
+        os.environ.get("TRANSLATION_DB_WORKERS", "4")
+    )
+
+    # Source text normalization for query keys (see app/text_normalization.py).
+    # Existing queries keep their keys when these change.
+    QUERY_STRIP_TATWEEL: ClassVar[bool] = (
+        os.environ.get("QUERY_STRIP_TATWEEL", "true").lower() == "true"
+    )
+    QUERY_STRIP_TASHKEEL: ClassVar[bool] = (
+        os.environ.get("QUERY_STRIP_TASHKEEL", "false").lower() == "true"
+    )
+
+    # Bradley-Terry ratings with bootstrap intervals on the stats page
+    # (see app/services/bradley_terry.py). 0 workers = one per CPU core. The
+    # bootstrap stops at BRADLEY_TERRY_BOOTSTRAP_SECONDS with the resamples
+    # done so far, so machines with few cores get intervals from fewer
+    # resamples instead of a slow snapshot build (0 = no time limit).
+    BRADLEY_TERRY_ENABLED: ClassVar[bool] = (
+        os.environ.get("BRADLEY_TERRY_ENABLED", "false").lower() == "true"
+    )
+    BRADLEY_TERRY_BOOTSTRAP_SAMPLES: ClassVar[int] = int(
+        os.environ.get("BRADLEY_TERRY_BOOTSTRAP_SAMPLES", "200")
+    )
+    BRADLEY_TERRY_WORKERS: ClassVar[int] = int(
+        os.environ.get("BRADLEY_TERRY_WORKERS", "0")
+    )
+    BRADLEY_TERRY_BOOTSTRAP_SECONDS: ClassVar[float] = float(
+        os.environ.get("BRADLEY_TERRY_BOOTSTRAP_SECONDS", "0.8")
+    )
+
+    # How Quick Compare ranks model pairs: "elo_gap" or "information_gain"
+    # (see app/services/pair_selection.py)
+    PAIR_SELECTION_STRATEGY: ClassVar[str] = os.environ.get(
+        "PAIR_SELECTION_STRATEGY", "elo_gap"
+    )
+
+    # Prometheus metrics on /metrics (see app/metrics.py), readable by admins
+    # or with `Authorization: Bearer <METRICS_TOKEN>` for scrapers
+    METRICS_ENABLED: ClassVar[bool] = (
+        os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+    )
+    METRICS_TOKEN: ClassVar[str | None] = os.environ.get("METRICS_TOKEN") or None
+
+    # Per-call upstream telemetry (the `upstream_calls` table), written in
+    # batches every UPSTREAM_TELEMETRY_FLUSH_SECONDS by a background thread
+    UPSTREAM_TELEMETRY_ENABLED: ClassVar[bool] = (
+        os.environ.get("UPSTREAM_TELEMETRY_ENABLED", "true").lower() == "true"
+    )
+    UPSTREAM_TELEMETRY_FLUSH_SECONDS: ClassVar[float] = float(
+        os.environ.get("UPSTREAM_TELEMETRY_FLUSH_SECONDS", "2")
+    )
+    # Seconds the stats page's upstream latency table is cached; telemetry
+    # lands every few seconds, so it is not part of the stats data version
+    UPSTREAM_STATS_CACHE_TTL: ClassVar[float] = float(
+        os.environ.get("UPSTREAM_STATS_CACHE_TTL", "300")
+    )
 
     # Translation settings
     SYSTEM_PROMPT: ClassVar[str] = (
@@ -387,8 +485,29 @@ class Config:
         },
     }
 
-    # API settings
-    OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+    # API settings (point at scripts/stub_openrouter.py for load tests)
+    OPENROUTER_BASE_URL: ClassVar[str] = os.environ.get(
+        "OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"
+    )
+
+    # Shared HTTP connection pool for upstream API clients
+    HTTP_POOL_MAX_CONNECTIONS: ClassVar[int] = int(
+        os.environ.get("HTTP_POOL_MAX_CONNECTIONS", "20")
+    )
+    HTTP_POOL_MAX_KEEPALIVE: ClassVar[int] = int(
+        os.environ.get("HTTP_POOL_MAX_KEEPALIVE", "10")
+    )
+    HTTP_POOL_KEEPALIVE_EXPIRY: ClassVar[float] = float(
+        os.environ.get("HTTP_POOL_KEEPALIVE_EXPIRY", "120")
+    )
+    # HTTP/2 is only used when the optional `h2` package is installed
+    HTTP2_ENABLED: ClassVar[bool] = (
+        os.environ.get("HTTP2_ENABLED", "true").lower() == "true"
+    )
+    # Connections opened at startup so the first arena round skips TLS setup
+    HTTP_POOL_WARM_CONNECTIONS: ClassVar[int] = int(
+        os.environ.get("HTTP_POOL_WARM_CONNECTIONS", str(MAX_MODELS_SELECTION))
+    )
 
     # Functionality settings
     DEFAULT_TEMPERATURE = 0.1  # Changed from 0.85 to 0.1
@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
 
+from app.metrics import instrument_engine
+
 engine = None
 SessionFactory = sessionmaker(autocommit=False, autoflush=False)
 db_session = scoped_session(SessionFactory)
@@ -21,6 +23,9 @@ def init_db(app):
             cursor.execute("PRAGMA synchronous=NORMAL")
             cursor.close()
 
+    if app.config.get("METRICS_ENABLED"):
+        instrument_engine(engine)
+
     db_session.configure(bind=engine)
     Base.metadata.bind = engine
 
@@ -0,0 +1,259 @@
+"""Process-wide pooled HTTP clients for upstream LLM APIs.
+
+Every model in an arena round talks to the same upstream host, so the
+clients are shared per ``(base_url, api_key)`` and keep their connections
+alive between rounds instead of paying a TCP + TLS handshake per call.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from app.config import get_config
+
+config = get_config()
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Thread-safe counters describing how the shared pools are used."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._lock = threading.Lock()
+        self.clients_created = 0
+        self.client_hits = 0
+        self.requests = 0
+        self.pool_hits = 0
+        self.new_connections = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_client(self, *, created: bool):
+        with self._lock:
+            if created:
+                self.clients_created += 1
+            else:
+                self.client_hits += 1
+
+    def record_request(self, *, new_connection: bool, wait_seconds: float):
+        with self._lock:
+            self.requests += 1
+            if new_connection:
+                self.new_connections += 1
+            else:
+                self.pool_hits += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "clients_created": self.clients_created,
+                "client_hits": self.client_hits,
+                "requests": self.requests,
+                "pool_hits": self.pool_hits,
+                "new_connections": self.new_connections,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": (self.wait_seconds_total / self.requests)
+                if self.requests
+                else 0.0,
+            }
+
+
+pool_stats = PoolStats()
+
+
+class _RequestTrace:
+    """httpcore trace callback that detects reuse and pool wait for one request.
+
+    The first transport event after the request is handed to the pool tells us
+    what happened: ``connection.connect_tcp`` means a new connection had to be
+    opened, while ``send_request_headers`` means an idle one was reused. The
+    time until that event is how long the request waited for a connection.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.recorded = False
+
+    def __call__(self, event_name: str, info: dict):
+        if self.recorded:
+            return
+        if event_name == "connection.connect_tcp.started":
+            new_connection = True
+        elif event_name.endswith("send_request_headers.started"):
+            new_connection = False
+        else:
+            return
+        self.recorded = True
+        pool_stats.record_request(
+            new_connection=new_connection,
+            wait_seconds=time.perf_counter() - self.started,
+        )
+
+
+class _AsyncRequestTrace(_RequestTrace):
+    """Async flavour of `_RequestTrace` (httpcore awaits async trace callbacks)."""
+
+    async def __call__(self, event_name: str, info: dict):
+        super().__call__(event_name, info)
+
+
+def _attach_trace(request: httpx.Request):
+    request.extensions["trace"] = _RequestTrace()
+
+
+async def _attach_async_trace(request: httpx.Request):
+    request.extensions["trace"] = _AsyncRequestTrace()
+
+
+def http2_available() -> bool:
+    """Whether HTTP/2 is enabled and the transport supports it."""
+    return config.HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=config.HTTP_POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def _registry_key(base_url: str, api_key: str) -> tuple[str, str]:
+    # Hash the key so raw secrets are not kept around as dict keys
+    return base_url, hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+_lock = threading.Lock()
+_clients: dict[tuple[str, str], OpenAI] = {}
+_http_clients: dict[tuple[str, str], httpx.Client] = {}
+
+
+def get_openai_client(base_url: str, api_key: str) -> OpenAI:
+    """Return the shared OpenAI client for an upstream, creating it on first use."""
+    key = _registry_key(base_url, api_key)
+    client = _clients.get(key)
+    if client is not None:
+        pool_stats.record_client(created=False)
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            http_client = httpx.Client(
+                limits=_pool_limits(),
+                http2=http2_available(),
+                event_hooks={"request": [_attach_trace]},
+            )
+            client = OpenAI(base_url=base_url, api_key=api_key, http_client=http_client)
+            _clients[key] = client
+            _http_clients[key] = http_client
+            pool_stats.record_client(created=True)
+            logger.info(
+                f"Created pooled HTTP client for {base_url} "
+                f"(http2={http2_available()}, "
+                f"max_connections={config.HTTP_POOL_MAX_CONNECTIONS})"
+            )
+        else:
+            pool_stats.record_client(created=False)
+    return client
+
+
+_async_clients: dict[tuple[str, str, int], AsyncOpenAI] = {}
+
+
+def get_async_openai_client(base_url: str, api_key: str) -> AsyncOpenAI:
+    """Return the shared async OpenAI client for an upstream.
+
+    Async connections are bound to the event loop that opened them, so there is
+    one client per running loop (in practice the single fan-out engine loop).
+    """
+    loop_id = id(asyncio.get_running_loop())
+    key = (*_registry_key(base_url, api_key), loop_id)
+    client = _async_clients.get(key)
+    if client is not None:
+        pool_stats.record_client(created=False)
+        return client
+
+    with _lock:
+        client = _async_clients.get(key)
+        if client is None:
+            http_client = httpx.AsyncClient(
+                limits=_pool_limits(),
+                http2=http2_available(),
+                event_hooks={"request": [_attach_async_trace]},
+            )
+            client = AsyncOpenAI(
+                base_url=base_url, api_key=api_key, http_client=http_client
+            )
+            _async_clients[key] = client
+            pool_stats.record_client(created=True)
+            logger.info(f"Created pooled async HTTP client for {base_url}")
+        else:
+            pool_stats.record_client(created=False)
+    return client
+
+
+def get_pool_stats() -> dict:
+    """Return a snapshot of the shared pool metrics."""
+    stats = pool_stats.snapshot()
+    stats["http2"] = http2_available()
+    stats["clients"] = len(_clients) + len(_async_clients)
+    return stats
+
+
+def warm_connections(base_url: str, api_key: str, count: int) -> None:
+    """Open ``count`` keep-alive connections to an upstream in the background.
+
+    Any HTTP response (even a 404) leaves the TLS connection in the pool, so a
+    cheap HEAD request against the base URL is enough.
+    """
+    if count <= 0 or not api_key:
+        return
+
+    get_openai_client(base_url, api_key)
+    http_client = _http_clients[_registry_key(base_url, api_key)]
+    # HTTP/2 multiplexes every request over one connection
+    count = 1 if http2_available() else min(count, config.HTTP_POOL_MAX_KEEPALIVE)
+
+    def _warm():
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [
+                executor.submit(http_client.head, base_url, timeout=10.0)
+                for _ in range(count)
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except httpx.HTTPError as e:
+                    logger.warning(f"Connection warm-up to {base_url} failed: {e!s}")
+        logger.info(f"Warmed {count} connection(s) to {base_url}")
+
+    threading.Thread(target=_warm, name="http-pool-warmup", daemon=True).start()
+
+
+def reset_clients() -> None:
+    """Drop all pooled clients (connections are not shared across fork)."""
+    global _lock  # noqa: PLW0603
+    _lock = threading.Lock()  # may have been held by another thread at fork time
+    _clients.clear()
+    _http_clients.clear()
+    _async_clients.clear()
+    pool_stats.reset()
+
+
+os.register_at_fork(after_in_child=reset_clients)
@@ -31,6 +31,16 @@ TRANSLATIONS = {
         "stats_subheader": "Detailed tracking of model performance, costs, and ratings.",
         "stats_table_header": "Detailed Breakdown",
         "cost_breakdown_header": "Cost Breakdown per Model",
+        "upstream_latency_header": "Upstream Latency and Errors (last 30 days)",
+        "upstream_calls": "Calls",
+        "latency_p50": "Latency p50",
+        "latency_p95": "Latency p95",
+        "ttfb_p95": "First Token p95",
+        "queue_wait_p95": "Queue Wait p95",
+        "error_rate": "Error Rate",
+        "timeout_rate": "Timeouts",
+        "avg_retries": "Avg. Retries",
+        "configured_timeout": "Configured Timeout",
         "rank": "Rank",
         "model_name": "Model Name",
         "avg_score": "Avg. Score",
@@ -78,6 +88,8 @@ TRANSLATIONS = {
         "mark_as_tie": "Mark as Tie",
         "skip": "Skip",
         "elo_rating": "ELO Rating",
+        "bt_rating": "Bradley-Terry",
+        "bt_confidence_interval": "95% CI",
         "total_translations": "Total Translations",
         "combined_score": "Combined Score",
         # Instructions & Budget
@@ -137,6 +149,16 @@ TRANSLATIONS = {
         "stats_subheader": "މޮޑެލްތަކުގެ ޚަރަދާއި، ރޭޓިންގ އަދި ފެންވަރުގެ ތަފްސީލު.",
         "stats_table_header": "ތަފްސީލު ހިސާބުތައް",
         "cost_breakdown_header": "މޮޑެލްތަކުގެ ޚަރަދު ތަފްސީލު",
+        "upstream_latency_header": "މޮޑެލްތަކުގެ ޖަވާބު ދިނުމުގެ ވަގުތާއި އެރަރތައް (ފަހު 30 ދުވަސް)",
+        "upstream_calls": "ކޯލް",
+        "latency_p50": "ލޭޓެންސީ p50",
+        "latency_p95": "ލޭޓެންސީ p95",
+        "ttfb_p95": "ފުރަތަމަ ޓޯކަން p95",
+        "queue_wait_p95": "ކިއު ވަގުތު p95",
+        "error_rate": "އެރަރ ރޭޓް",
+        "timeout_rate": "ޓައިމްއައުޓް",
+        "avg_retries": "އެވްރެޖް ރީޓްރައި",
+        "configured_timeout": "ސެޓްކުރެވިފައިވާ ޓައިމްއައުޓް",
         "rank": "ރޭންކް",
         "model_name": "މޮޑެލްގެ ނަން",
         "avg_score": "އެވްރެޖް. ސްކޯ",
@@ -184,6 +206,8 @@ TRANSLATIONS = {
         "mark_as_tie": "ދެ ތަރުޖަމާ އެއްވަރު",
         "skip": "ދޫކޮށްލާ",
         "elo_rating": "އީލޯ ރޭޓިންގް",
+        "bt_rating": "ބްރެޑްލީ-ޓެރީ",
+        "bt_confidence_interval": "95% CI",
         "total_translations": "ޖުމްލަ ތަރުޖަމާ",
         "combined_score": "ކޮމްބައިންޑް ސްކޯ",
         # Instructions & Budget
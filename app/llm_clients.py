@@ -1,9 +1,21 @@
+import asyncio
 import logging
-import time
-
-from openai import APITimeoutError, OpenAI
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any
+
+from openai import (
+    DEFAULT_MAX_RETRIES,
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+)
 
 from app.config import ModelConfig, get_config
+from app.http_pool import get_async_openai_client, get_openai_client
+from app.rate_limiter import RateLimitExceeded, get_rate_limiter, limit_for
+from app.upstream_telemetry import UpstreamCallTrace
 
 config = get_config()
 
@@ -15,21 +27,28 @@ class TranslationClient:
 
     SYSTEM_PROMPT = config.SYSTEM_PROMPT
 
-    def __init__(self, model_config: ModelConfig):
+    def __init__(self, model_config: ModelConfig, model_key: str):
         """Initialize the translation client."""
+        self.model_key = model_key
         self.model_name = model_config["name"]
         self.input_cost_per_mtok = model_config["input_cost_per_mtok"]
         self.output_cost_per_mtok = model_config["output_cost_per_mtok"]
-        self.rate_limit = model_config.get("rate_limit")
-        self.last_request_time = 0.0
-        self.request_count = 0
-
-    def translate(self, text: str) -> tuple[str, float]:
+        # Shared by every preset of the same upstream model, across workers
+        self.limit = limit_for(self.model_name)
+        # A crashed call's concurrency slot expires after the request could
+        # no longer be running
+        self.lease_ttl = model_config.get("timeout", 90.0) + 60.0
+
+    def translate(
+        self, text: str, *, queued_at: float | None = None
+    ) -> tuple[str, float]:
         """
         Translate the given text using the specified model.
 
         Args:
             text: Text to translate.
+            queued_at: time.monotonic() when the caller started waiting for
+                the call, so telemetry can report the queue wait.
 
         Returns:
             Translated text and the cost of the API call.
@@ -37,6 +56,31 @@ class TranslationClient:
         msg = "Subclasses must implement translate()"
         raise NotImplementedError(msg)
 
+    async def translate_async(
+        self, text: str, *, queued_at: float | None = None
+    ) -> tuple[str, float]:
+        """Async variant of `translate`, used by the fan-out engine."""
+        msg = "Subclasses must implement translate_async()"
+        raise NotImplementedError(msg)
+
+    async def translate_stream_async(
+        self,
+        text: str,
+        on_delta: Callable[[str], None],
+        *,
+        queued_at: float | None = None,
+    ) -> tuple[str, float]:
+        """
+        Streaming variant of `translate_async`.
+
+        Clients without upstream streaming report the whole translation as a
+        single delta.
+        """
+        result_text, cost = await self.translate_async(text, queued_at=queued_at)
+        if not result_text.startswith("Error:"):
+            on_delta(result_text)
+        return result_text, cost
+
     def _calculate_cost(self, input_tokens: float, output_tokens: float) -> float:
         """Calculate the cost of the API call."""
         cost = (
@@ -49,115 +93,277 @@ class TranslationClient:
         )
         return cost
 
-    def _check_rate_limit(self) -> bool:
-        """Check if the rate limit has been exceeded."""
-        if not self.rate_limit:
-            return True
-
-        current_time = time.time()
-        # Default rate limit window is 60 seconds
-        rate_limit_window = 60
-        if current_time - self.last_request_time < rate_limit_window:
-            if self.request_count >= self.rate_limit:
-                return False
-            self.request_count += 1
-        else:
-            self.last_request_time = current_time
-            self.request_count = 1
-        return True
+    @contextmanager
+    def _rate_limited(self) -> Iterator[None]:
+        """Hold a rate limit slot for the upstream model during a call."""
+        if self.limit.is_unlimited:
+            yield
+            return
+        limiter = get_rate_limiter()
+        lease = limiter.acquire(
+            self.model_name, self.limit, self.lease_ttl, config.RATE_LIMIT_WAIT_TIMEOUT
+        )
+        try:
+            yield
+        finally:
+            limiter.release(lease)
+
+    @asynccontextmanager
+    async def _rate_limited_async(self) -> AsyncIterator[None]:
+        """Async variant of `_rate_limited` that waits without blocking the loop."""
+        if self.limit.is_unlimited:
+            yield
+            return
+        limiter = get_rate_limiter()
+        lease = await limiter.acquire_async(
+            self.model_name, self.limit, self.lease_ttl, config.RATE_LIMIT_WAIT_TIMEOUT
+        )
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(limiter.release, lease)
 
 
 class OpenRouterClient(TranslationClient):
     """Client for OpenRouter models."""
 
-    def __init__(self, model_config: ModelConfig):
+    def __init__(self, model_config: ModelConfig, model_key: str):
         """Initialize the OpenRouter client."""
-        super().__init__(model_config)
+        super().__init__(model_config, model_key)
         self.reasoning = model_config.get("reasoning")
         self.custom_temperature = model_config.get("temperature")
         self.timeout = model_config.get("timeout", 90.0)  # Thinking models use 180s
 
-    def translate(self, text: str) -> tuple[str, float]:
+    def translate(
+        self, text: str, *, queued_at: float | None = None
+    ) -> tuple[str, float]:
         """Translate text using the OpenRouter API."""
         if not config.OPENROUTER_API_KEY:
             return "Error: API key not configured for OpenRouter", 0.0
 
+        trace = self._trace(streamed=False, queued_at=queued_at)
         try:
-            client = OpenAI(
-                base_url=config.OPENROUTER_BASE_URL,
-                api_key=config.OPENROUTER_API_KEY,
+            client = get_openai_client(
+                config.OPENROUTER_BASE_URL, config.OPENROUTER_API_KEY
             )
+            with self._rate_limited():
+                trace.start()
+                response = client.chat.completions.with_raw_response.create(
+                    **self._request_kwargs(text)
+                )
+            trace.retries = response.retries_taken
+            return self._parse_completion(response.parse(), text, trace)
+        except Exception as e:  # noqa: BLE001 - errors become the "Error:" result
+            return self._handle_error(e, trace)
+
+    async def translate_async(
+        self, text: str, *, queued_at: float | None = None
+    ) -> tuple[str, float]:
+        """Translate text using the OpenRouter API without blocking a thread."""
+        if not config.OPENROUTER_API_KEY:
+            return "Error: API key not configured for OpenRouter", 0.0
 
-            # Extra body parameters for reasoning models
-            extra_body = {}
-            if self.reasoning:
-                extra_body["reasoning"] = self.reasoning
-
-            completion = client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    {"role": "user", "content": text},
-                ],
-                temperature=self.custom_temperature
-                if self.custom_temperature is not None
-                else config.DEFAULT_TEMPERATURE,
-                extra_body=extra_body if extra_body else None,
-                timeout=self.timeout,
+        trace = self._trace(streamed=False, queued_at=queued_at)
+        try:
+            client = get_async_openai_client(
+                config.OPENROUTER_BASE_URL, config.OPENROUTER_API_KEY
             )
+            async with self._rate_limited_async():
+                trace.start()
+                response = await client.chat.completions.with_raw_response.create(
+                    **self._request_kwargs(text)
+                )
+            trace.retries = response.retries_taken
+            return self._parse_completion(response.parse(), text, trace)
+        except Exception as e:  # noqa: BLE001 - errors become the "Error:" result
+            return self._handle_error(e, trace)
+
+    async def translate_stream_async(
+        self,
+        text: str,
+        on_delta: Callable[[str], None],
+        *,
+        queued_at: float | None = None,
+    ) -> tuple[str, float]:
+        """
+        Translate with `stream=True`, passing each text delta to `on_delta`.
 
-            logger.info(
-                f"Full OpenRouter Response for {self.model_name}: {completion!r}"
-            )
+        Returns the same (translation, cost) result as `translate_async` once
+        the stream finishes; usage comes from the final chunk.
+        """
+        if not config.OPENROUTER_API_KEY:
+            return "Error: API key not configured for OpenRouter", 0.0
 
-            if not completion.choices:
-                logger.warning(
-                    f"OpenRouter response for {self.model_name} had no choices."
+        trace = self._trace(streamed=True, queued_at=queued_at)
+        try:
+            client = get_async_openai_client(
+                config.OPENROUTER_BASE_URL, config.OPENROUTER_API_KEY
+            )
+            async with self._rate_limited_async():
+                trace.start()
+                response = await client.chat.completions.with_raw_response.create(
+                    **self._request_kwargs(text),
+                    stream=True,
+                    stream_options={"include_usage": True},
                 )
+                trace.retries = response.retries_taken
+                stream = response.parse()
+
+                parts: list[str] = []
+                finish_reason = None
+                usage = None
+                async for chunk in stream:
+                    trace.first_byte()
+                    if chunk.usage:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
+                    delta = choice.delta.content if choice.delta else None
+                    if delta:
+                        parts.append(delta)
+                        on_delta(delta)
+
+            logger.info(
+                f"OpenRouter stream for {self.model_name} finished: "
+                f"finish_reason={finish_reason!r}, usage={usage!r}"
+            )
+            if not parts and finish_reason is None:
+                logger.warning(f"OpenRouter stream for {self.model_name} was empty.")
+                trace.finish(error="EmptyResponse")
                 return "Error: No response generated by model.", 0.0
 
-            choice = completion.choices[0]
+            return self._finalize(text, "".join(parts), finish_reason, usage, trace)
+        except Exception as e:  # noqa: BLE001 - errors become the "Error:" result
+            return self._handle_error(e, trace)
 
-            # Check for finish reason
-            if choice.finish_reason == "length":
-                error_msg = "Error: The response was cut off because it reached the maximum token limit."
-                logger.warning(f"{error_msg} for model {self.model_name}")
-                return error_msg, 0.0
+    def _trace(self, *, streamed: bool, queued_at: float | None) -> UpstreamCallTrace:
+        return UpstreamCallTrace(
+            self.model_key, self.model_name, streamed=streamed, queued_at=queued_at
+        )
 
-            translation = choice.message.content or ""
+    def _request_kwargs(self, text: str) -> dict[str, Any]:
+        """Build the chat completion arguments shared by sync and async calls."""
+        # Extra body parameters for reasoning models
+        extra_body = {}
+        if self.reasoning:
+            extra_body["reasoning"] = self.reasoning
+
+        return {
+            "model": self.model_name,
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": text},
+            ],
+            "temperature": self.custom_temperature
+            if self.custom_temperature is not None
+            else config.DEFAULT_TEMPERATURE,
+            "extra_body": extra_body if extra_body else None,
+            "timeout": self.timeout,
+        }
+
+    def _parse_completion(
+        self, completion, text: str, trace: UpstreamCallTrace
+    ) -> tuple[str, float]:
+        """Extract the translation and its cost from a chat completion."""
+        logger.info(f"Full OpenRouter Response for {self.model_name}: {completion!r}")
+
+        if not completion.choices:
+            logger.warning(f"OpenRouter response for {self.model_name} had no choices.")
+            trace.finish(error="EmptyResponse")
+            return "Error: No response generated by model.", 0.0
+
+        choice = completion.choices[0]
+        return self._finalize(
+            text,
+            choice.message.content or "",
+            choice.finish_reason,
+            completion.usage,
+            trace,
+        )
 
-            usage = completion.usage
-            input_tokens = (
-                usage.prompt_tokens
-                if usage and usage.prompt_tokens is not None
-                else len(text) / 4
-            )
-            output_tokens = (
-                usage.completion_tokens
-                if usage and usage.completion_tokens is not None
-                else len(translation) / 4
-            )
+    def _finalize(
+        self,
+        text: str,
+        translation: str,
+        finish_reason: str | None,
+        usage,
+        trace: UpstreamCallTrace,
+    ) -> tuple[str, float]:
+        """Validate the finish reason and price the call from its token usage."""
+        trace.finish(
+            finish_reason=finish_reason,
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None,
+        )
+        # Check for finish reason
+        if finish_reason == "length":
+            error_msg = "Error: The response was cut off because it reached the maximum token limit."
+            logger.warning(f"{error_msg} for model {self.model_name}")
+            return error_msg, 0.0
+
+        input_tokens = (
+            usage.prompt_tokens
+            if usage and usage.prompt_tokens is not None
+            else len(text) / 4
+        )
+        output_tokens = (
+            usage.completion_tokens
+            if usage and usage.completion_tokens is not None
+            else len(translation) / 4
+        )
 
-            cost = self._calculate_cost(input_tokens, output_tokens)
+        cost = self._calculate_cost(input_tokens, output_tokens)
 
-        except APITimeoutError:
+        logger.info(f"OpenRouter translation successful for {self.model_name}.")
+        return translation, cost
+
+    def _handle_error(
+        self, error: Exception, trace: UpstreamCallTrace
+    ) -> tuple[str, float]:
+        """Convert an API failure into the error result returned to callers."""
+        if _is_retried(error):
+            # The API client gave up after its last retry
+            trace.retries = DEFAULT_MAX_RETRIES
+        trace.finish(error=type(error).__name__)
+
+        if isinstance(error, RateLimitExceeded):
+            error_msg = f"Error: {error!s}"
+            logger.warning(error_msg)
+            return error_msg, 0.0
+
+        if isinstance(error, APITimeoutError):
             error_msg = f"Error: Request timed out for model {self.model_name}."
             logger.error(error_msg)
             return error_msg, 0.0
 
-        except Exception as e:
-            logger.exception(
-                f"OpenRouter translation failed for {self.model_name}: {e!s}"
-            )
-            return f"Error: {e!s}", 0.0
-        else:
-            logger.info(f"OpenRouter translation successful for {self.model_name}.")
-            return translation, cost
+        logger.exception(
+            f"OpenRouter translation failed for {self.model_name}: {error!s}"
+        )
+        return f"Error: {error!s}", 0.0
+
+
+def _is_retried(error: Exception) -> bool:
+    """Whether the API client retries a call that fails with this error."""
+    if isinstance(error, APIConnectionError):  # Includes timeouts
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+_client_cache: dict[str, TranslationClient] = {}
+_client_cache_lock = threading.Lock()
 
 
 def get_translation_client(model_key: str) -> TranslationClient:
     """
-    Create a translation client for the given model key.
+    Get the shared translation client for the given model key.
+
+    Clients are created once per process and reused, so they share the pooled
+    HTTP connections from `app.http_pool`.
 
     Args:
         model_key: The key of the model in the configuration.
@@ -168,6 +374,18 @@ def get_translation_client(model_key: str) -> TranslationClient:
     Raises:
         ValueError: If the model key or type is unknown.
     """
+    client = _client_cache.get(model_key)
+    if client is None:
+        with _client_cache_lock:
+            client = _client_cache.get(model_key)
+            if client is None:
+                client = _create_translation_client(model_key)
+                _client_cache[model_key] = client
+    return client
+
+
+def _create_translation_client(model_key: str) -> TranslationClient:
+    """Create a translation client for the given model key."""
     model_config = config.MODELS.get(model_key)
     if not model_config:
         msg = f"Unknown model: {model_key}"
@@ -178,7 +396,7 @@ def get_translation_client(model_key: str) -> TranslationClient:
     model_type = model_config.get("type", "openrouter")
 
     if model_type == "openrouter":
-        return OpenRouterClient(model_config)
+        return OpenRouterClient(model_config, model_key)
 
     # Fallback or error for now? User said "Remove Gemini Client... use OpenRouter for all models".
     # So we force OpenRouterClient even if type says gemini (if we updated config correctly, type is openrouter).
@@ -191,7 +409,7 @@ def get_translation_client(model_key: str) -> TranslationClient:
         logger.warning(
             f"Model {model_key} has type 'gemini' but GeminiClient is removed. Using OpenRouterClient."
         )
-        return OpenRouterClient(model_config)
+        return OpenRouterClient(model_config, model_key)
 
     msg = f"Unsupported model type: {model_type}"
     raise ValueError(msg)
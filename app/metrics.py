@@ -0,0 +1,423 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain thread-safe objects updated on
+the hot paths; scrape-time collectors add the numbers other modules already
+keep (cache hit ratios, the HTTP pool, the translation engine). Everything
+is rendered on `/metrics` (see `app/blueprints/metrics.py`).
+
+What is measured:
+
+- every request, by Flask endpoint: count by status and latency histogram
+  (for SSE responses, until the view returns; the stream is timed
+  separately);
+- SQL statements, through engine events: totals for the process, and per
+  request a histogram of statement count and time spent in SQL;
+- SSE streams open and their duration;
+- the translation engine's upstream calls in flight and waiting for a
+  slot, and the depth of its database thread pool queue.
+- the upstream call telemetry writer's queue and written/dropped rows.
+
+Metrics are per process. With several gunicorn workers, each scrape sees
+the worker that answered it.
+"""
+
+import bisect
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import TypeVar
+
+from flask import Flask, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.cache import get_cache_stats
+from app.config import get_config
+from app.http_pool import get_pool_stats
+
+config = get_config()
+
+# Request latency buckets (seconds); SSE rounds run up to the model timeouts
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SQL_SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+# (name, type, help, [(labels, value)]) rows produced at scrape time
+Family = tuple[str, str, str, list[tuple[dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"'
+        for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """A named metric with a fixed list of label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, per label values."""
+
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                    0,
+                ]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = [
+                (labels, list(counts), total, count)
+                for labels, (counts, total, count) in self._series.items()
+            ]
+        lines = self._header()
+        names = (*self.label_names, "le")
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(
+                (*self.buckets, math.inf), counts, strict=True
+            ):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(names, (*labels, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            plain = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+            lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    """Metrics and scrape-time collectors rendered together."""
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], Iterable[Family]]] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(
+                    f"{name}{_format_labels(list(labels), list(labels.values()))}"
+                    f" {_format_value(value)}"
+                    for labels, value in samples
+                )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter(
+        "arena_http_requests_total",
+        "HTTP requests by endpoint, method and status.",
+        ("endpoint", "method", "status"),
+    )
+)
+HTTP_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "arena_http_request_duration_seconds",
+        "HTTP request latency by endpoint, until the view returns.",
+        ("endpoint", "method"),
+    )
+)
+SQL_STATEMENTS = REGISTRY.register(
+    Counter("arena_db_statements_total", "SQL statements executed.")
+)
+SQL_SECONDS = REGISTRY.register(
+    Counter("arena_db_statement_seconds_total", "Time spent executing SQL.")
+)
+REQUEST_SQL_STATEMENTS = REGISTRY.register(
+    Histogram(
+        "arena_db_request_statements",
+        "SQL statements per HTTP request by endpoint.",
+        ("endpoint",),
+        SQL_COUNT_BUCKETS,
+    )
+)
+REQUEST_SQL_SECONDS = REGISTRY.register(
+    Histogram(
+        "arena_db_request_seconds",
+        "Time spent in SQL per HTTP request by endpoint.",
+        ("endpoint",),
+        SQL_SECONDS_BUCKETS,
+    )
+)
+SSE_STREAMS_ACTIVE = REGISTRY.register(
+    Gauge("arena_sse_streams_active", "Translation SSE streams currently open.")
+)
+SSE_STREAM_SECONDS = REGISTRY.register(
+    Histogram(
+        "arena_sse_stream_duration_seconds", "Duration of translation SSE streams."
+    )
+)
+
+# Per-thread SQL totals of the request being served: [statements, seconds]
+_request_sql = threading.local()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every statement run on `engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_started"].pop()
+        elapsed = time.perf_counter() - started
+        SQL_STATEMENTS.inc()
+        SQL_SECONDS.inc(amount=elapsed)
+        totals = getattr(_request_sql, "totals", None)
+        if totals is not None:
+            totals[0] += 1
+            totals[1] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # Failed statements never reach after_cursor_execute
+        started = (
+            context.connection.info.get("metrics_started")
+            if context.connection
+            else None
+        )
+        if started:
+            started.pop()
+
+
+def track_stream(stream: Iterator[str]) -> Iterator[str]:
+    """Count an SSE stream as open while it is being consumed."""
+    SSE_STREAMS_ACTIVE.inc()
+    started = time.perf_counter()
+    try:
+        yield from stream
+    finally:
+        SSE_STREAMS_ACTIVE.dec()
+        SSE_STREAM_SECONDS.observe(time.perf_counter() - started)
+
+
+def _endpoint() -> str:
+    return request.endpoint or "unmatched"
+
+
+def init_app(app: Flask) -> None:
+    """Time every request and attribute its SQL statements to its endpoint."""
+
+    @app.before_request
+    def _start_request():
+        g.metrics_started = time.perf_counter()
+        _request_sql.totals = [0, 0.0]
+
+    @app.after_request
+    def _record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request(exception=None):
+        started = g.pop("metrics_started", None)
+        totals = getattr(_request_sql, "totals", None)
+        _request_sql.totals = None
+        if started is None:
+            return
+        endpoint = _endpoint()
+        status = g.pop("metrics_status", 500)
+        HTTP_REQUESTS.inc(endpoint, request.method, str(status))
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started, endpoint, request.method
+        )
+        if totals is not None:
+            REQUEST_SQL_STATEMENTS.observe(totals[0], endpoint)
+            REQUEST_SQL_SECONDS.observe(totals[1], endpoint)
+
+
+def _collect_caches() -> Iterable[Family]:
+    stats = get_cache_stats()
+    for field, kind, documentation in (
+        ("hits", "counter", "Cache lookups that found a live entry."),
+        ("misses", "counter", "Cache lookups that missed or found an expired entry."),
+        ("hit_ratio", "gauge", "Share of cache lookups that hit."),
+        ("size", "gauge", "Entries held by the cache."),
+    ):
+        suffix = "_total" if kind == "counter" else ""
+        yield (
+            f"arena_cache_{field}{suffix}",
+            kind,
+            documentation,
+            [({"cache": name}, values[field]) for name, values in stats.items()],
+        )
+
+
+def _collect_http_pool() -> Iterable[Family]:
+    stats = get_pool_stats()
+    yield (
+        "arena_upstream_requests_total",
+        "counter",
+        "Upstream HTTP requests by whether they reused a pooled connection.",
+        [
+            ({"connection": "reused"}, stats["pool_hits"]),
+            ({"connection": "new"}, stats["new_connections"]),
+        ],
+    )
+    yield (
+        "arena_upstream_pool_wait_seconds_total",
+        "counter",
+        "Time upstream requests waited for a pooled connection.",
+        [({}, stats["wait_seconds_total"])],
+    )
+
+
+def _collect_translation_engine() -> Iterable[Family]:
+    from app.services.translation_engine import get_engine_stats  # noqa: PLC0415
+
+    stats = get_engine_stats()
+    if stats is None:
+        return
+    for field, documentation in (
+        ("rounds_active", "Translation rounds (fan-outs) in progress."),
+        ("calls_active", "Upstream translation calls holding a concurrency slot."),
+        ("calls_waiting", "Upstream translation calls waiting for a slot."),
+        ("db_queue_depth", "Database tasks queued for the engine's thread pool."),
+        ("flights_active", "Distinct (query, model) upstream calls in flight."),
+        ("flights_shared_total", "Translation requests that joined a call in flight."),
+    ):
+        yield (
+            f"arena_translation_{field}",
+            "counter" if field.endswith("_total") else "gauge",
+            documentation,
+            [({}, stats[field])],
+        )
+
+
+def _collect_upstream_telemetry() -> Iterable[Family]:
+    from app.upstream_telemetry import get_telemetry_writer  # noqa: PLC0415
+
+    stats = get_telemetry_writer().stats()
+    yield (
+        "arena_upstream_telemetry_queued",
+        "gauge",
+        "Upstream call telemetry rows waiting to be written.",
+        [({}, stats["queued"])],
+    )
+    yield (
+        "arena_upstream_telemetry_rows_total",
+        "counter",
+        "Upstream call telemetry rows by outcome.",
+        [
+            ({"outcome": outcome}, stats[outcome])
+            for outcome in ("written", "dropped", "failed")
+        ],
+    )
+
+
+REGISTRY.register_collector(_collect_caches)
+REGISTRY.register_collector(_collect_http_pool)
+REGISTRY.register_collector(_collect_translation_engine)
+REGISTRY.register_collector(_collect_upstream_telemetry)
@@ -4,6 +4,7 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -34,6 +35,8 @@ class Query(Base):
 
     id = Column(Integer, primary_key=True)
     source_text = Column(Text, nullable=False)
+    # SHA-256 of the normalized source text; NULL only for legacy duplicates
+    source_hash = Column(String(64), nullable=True, unique=True, index=True)
     timestamp = Column(DateTime, default=func.now())
 
     translations = relationship(
@@ -47,6 +50,14 @@ class Query(Base):
 
 class Translation(Base):
     __tablename__ = "translations"
+    __table_args__ = (
+        # Cache lookups per round and per-query listings (prefix)
+        Index("ix_translations_query_model", "query_id", "model"),
+        # Covers the monthly budget SUM(cost) without touching the table
+        Index("ix_translations_user_created_cost", "user_id", "created_at", "cost"),
+        # A model's most recent translations, for its latency estimate
+        Index("ix_translations_model_id", "model", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     query_id = Column(Integer, ForeignKey("queries.id"), nullable=False)
@@ -61,6 +72,9 @@ class Translation(Base):
     )  # For blind testing, position in the UI (1, 2, or 3)
     cost = Column(Float, default=0.0)  # Cost of the API call
     response_hash = Column(String(64), nullable=True)
+    # Milliseconds from getting a concurrency slot to the full response;
+    # NULL for translations stored before it was recorded
+    generation_ms = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=func.now())
 
     query = relationship("Query", back_populates="translations")
@@ -73,6 +87,31 @@ class Translation(Base):
         return f"<Translation id={self.id} model={self.model}>"
 
 
+class PendingTranslation(Base):
+    """Advisory claim marking a (query, model) translation as being generated.
+
+    Workers don't share memory, so before calling the API a worker claims the
+    pair here; other workers wait for the claimed translation instead of paying
+    for the same upstream call. Claims expire so a crashed worker can't block
+    a pair forever.
+    """
+
+    __tablename__ = "pending_translations"
+    __table_args__ = (
+        UniqueConstraint("query_id", "model", name="unique_pending_query_model"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    query_id = Column(Integer, ForeignKey("queries.id"), nullable=False)
+    model = Column(String(50), nullable=False)
+    owner = Column(String(32), nullable=False)  # Random token of the claiming call
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+    def __repr__(self):
+        return f"<PendingTranslation query_id={self.query_id} model={self.model}>"
+
+
 class Vote(Base):
     __tablename__ = "votes"
     __table_args__ = (
@@ -82,6 +121,7 @@ class Vote(Base):
             "translation_id",
             name="unique_user_query_translation_vote",
         ),
+        Index("ix_votes_translation_id", "translation_id"),
     )
 
     id = Column(Integer, primary_key=True)
@@ -109,6 +149,18 @@ class PairwiseComparison(Base):
     """
 
     __tablename__ = "pairwise_comparisons"
+    __table_args__ = (
+        # Covers the per-query "already compared" lookup in /compare/random and
+        # the per-user explicit count (prefix)
+        Index(
+            "ix_pairwise_user_source_query_pair",
+            "user_id",
+            "source",
+            "query_id",
+            "translation_a_id",
+            "translation_b_id",
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     query_id = Column(Integer, ForeignKey("queries.id"), nullable=False)
@@ -157,3 +209,88 @@ class ModelELO(Base):
         if total == 0:
             return 0.0
         return (self.wins or 0) / total
+
+
+class ModelStats(Base):
+    """Per-model leaderboard aggregates, maintained at write time.
+
+    Updated in the same transaction as each translation insert and vote
+    upsert, so the leaderboard reads one row per model instead of scanning
+    every translation and vote. `revision` increases on every change and lets
+    readers detect stale derived data. Bulk edits that bypass the repositories
+    should be followed by `flask rebuild-model-stats`.
+    """
+
+    __tablename__ = "model_stats"
+
+    id = Column(Integer, primary_key=True)
+    model = Column(String(50), nullable=False, unique=True)
+    appearances = Column(Integer, nullable=False, default=0)
+    total_cost = Column(Float, nullable=False, default=0.0)
+    source_word_count = Column(Integer, nullable=False, default=0)
+    votes_cast = Column(Integer, nullable=False, default=0)
+    excellent_count = Column(Integer, nullable=False, default=0)
+    good_count = Column(Integer, nullable=False, default=0)
+    okay_count = Column(Integer, nullable=False, default=0)
+    rejected_count = Column(Integer, nullable=False, default=0)
+    score = Column(Integer, nullable=False, default=0)
+    revision = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ModelStats model={self.model} appearances={self.appearances} score={self.score}>"
+
+
+class Counter(Base):
+    """Named integer counters, maintained at write time.
+
+    Holds the Quick Compare progress numbers: `total_pairs` grows by n-1
+    when the n-th translation of a query is stored, and each user's explicit
+    comparison count grows as they compare, so the progress bar reads two
+    rows instead of grouping every translation. Bulk edits that bypass the
+    services should be followed by `flask rebuild-counters`.
+    """
+
+    __tablename__ = "counters"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False, unique=True)
+    value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<Counter name={self.name} value={self.value}>"
+
+
+class UpstreamCall(Base):
+    """Telemetry of one upstream model call, successful or not.
+
+    Written in batches by a background thread (`app/upstream_telemetry.py`),
+    so rows may lag the calls by a couple of seconds. Times are milliseconds:
+    `queue_wait_ms` covers the engine's concurrency slot and the rate limiter,
+    `ttfb_ms` (streamed calls only) and `latency_ms` run from sending the
+    request, including retries made by the API client.
+    """
+
+    __tablename__ = "upstream_calls"
+    __table_args__ = (Index("ix_upstream_calls_model_created", "model", "created_at"),)
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False, default=func.now())
+    model = Column(String(50), nullable=False)  # Key in Config.MODELS
+    upstream = Column(String(100), nullable=False)  # Upstream model name
+    streamed = Column(Boolean, nullable=False, default=False)
+    queue_wait_ms = Column(Integer, nullable=False, default=0)
+    ttfb_ms = Column(Integer, nullable=True)
+    latency_ms = Column(Integer, nullable=False)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    finish_reason = Column(String(20), nullable=True)
+    error = Column(String(50), nullable=True)  # Exception class; NULL = success
+    retries = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (
+            f"<UpstreamCall model={self.model} latency_ms={self.latency_ms} "
+            f"error={self.error}>"
+        )
@@ -0,0 +1,234 @@
+"""Token-bucket and concurrency limits for upstream models, shared across workers.
+
+Limits are keyed by the upstream model name, so every preset of the same
+upstream model (e.g. the T0.1 and T0.85 variants) draws from one budget.
+State lives in a small SQLite file next to the main database; each acquire is
+a single `BEGIN IMMEDIATE` transaction, which makes it atomic across threads
+and gunicorn workers without a separate lock service.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.config import get_config
+
+config = get_config()
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a limit could not be acquired within the allowed wait."""
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Limits for one upstream model."""
+
+    requests_per_minute: float | None = None
+    burst: float | None = None
+    max_concurrency: int | None = None
+
+    @property
+    def is_unlimited(self) -> bool:
+        return not self.requests_per_minute and not self.max_concurrency
+
+    @property
+    def capacity(self) -> float:
+        # Default burst allows a full minute's worth of requests at once
+        return max(1.0, self.burst or self.requests_per_minute or 1.0)
+
+
+@dataclass(frozen=True)
+class Lease:
+    """A granted acquire; release it when the upstream call finishes."""
+
+    name: str
+    lease_id: str | None  # Only set when a concurrency slot was taken
+
+
+def limit_for(upstream_name: str) -> Limit:
+    """
+    Build the limit for an upstream model from `Config.MODELS`.
+
+    Presets sharing an upstream model can configure limits independently; the
+    strictest configured value wins.
+    """
+    rates, bursts, concurrencies = [], [], []
+    for model_config in config.MODELS.values():
+        if model_config["name"] != upstream_name:
+            continue
+        if model_config.get("rate_limit"):
+            rates.append(model_config["rate_limit"])
+        if model_config.get("rate_limit_burst"):
+            bursts.append(model_config["rate_limit_burst"])
+        if model_config.get("max_concurrency"):
+            concurrencies.append(model_config["max_concurrency"])
+    return Limit(
+        requests_per_minute=min(rates) if rates else None,
+        burst=min(bursts) if bursts else None,
+        max_concurrency=min(concurrencies) if concurrencies else None,
+    )
+
+
+class RateLimiter:
+    """SQLite-backed token buckets and concurrency slots."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS leases (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_leases_name ON leases (name);
+                """
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def try_acquire(
+        self, name: str, limit: Limit, lease_ttl: float
+    ) -> tuple[Lease | None, float]:
+        """
+        Try to take a token and a concurrency slot without waiting.
+
+        Returns:
+            The lease if granted, otherwise None and the number of seconds
+            after which retrying may succeed.
+        """
+        if limit.is_unlimited:
+            return Lease(name, None), 0.0
+
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if limit.max_concurrency:
+                conn.execute(
+                    "DELETE FROM leases WHERE name = ? AND expires_at < ?", (name, now)
+                )
+                (in_flight,) = conn.execute(
+                    "SELECT COUNT(*) FROM leases WHERE name = ?", (name,)
+                ).fetchone()
+                if in_flight >= limit.max_concurrency:
+                    conn.execute("COMMIT")
+                    # Slots free up when calls finish; poll again shortly
+                    return None, 0.25
+
+            if limit.requests_per_minute:
+                rate = limit.requests_per_minute / 60.0
+                row = conn.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)
+                ).fetchone()
+                tokens = limit.capacity
+                if row:
+                    tokens = min(limit.capacity, row[0] + (now - row[1]) * rate)
+                if tokens < 1.0:
+                    conn.execute("COMMIT")
+                    return None, (1.0 - tokens) / rate
+                conn.execute(
+                    "INSERT INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET "
+                    "tokens = excluded.tokens, updated_at = excluded.updated_at",
+                    (name, tokens - 1.0, now),
+                )
+
+            lease_id = None
+            if limit.max_concurrency:
+                lease_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO leases (id, name, expires_at) VALUES (?, ?, ?)",
+                    (lease_id, name, now + lease_ttl),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return Lease(name, lease_id), 0.0
+
+    def acquire(
+        self, name: str, limit: Limit, lease_ttl: float, timeout: float
+    ) -> Lease:
+        """Acquire, sleeping up to `timeout` seconds; raises RateLimitExceeded."""
+        deadline = time.monotonic() + timeout
+        while True:
+            lease, wait = self.try_acquire(name, limit, lease_ttl)
+            if lease:
+                return lease
+            if time.monotonic() + wait > deadline:
+                msg = f"Rate limit exceeded for {name}"
+                raise RateLimitExceeded(msg)
+            time.sleep(wait)
+
+    async def acquire_async(
+        self, name: str, limit: Limit, lease_ttl: float, timeout: float
+    ) -> Lease:
+        """Async variant of `acquire` that waits without blocking the loop."""
+        if limit.is_unlimited:
+            return Lease(name, None)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            lease, wait = await asyncio.to_thread(
+                self.try_acquire, name, limit, lease_ttl
+            )
+            if lease:
+                return lease
+            if loop.time() + wait > deadline:
+                msg = f"Rate limit exceeded for {name}"
+                raise RateLimitExceeded(msg)
+            await asyncio.sleep(wait)
+
+    def release(self, lease: Lease) -> None:
+        """Return a concurrency slot (tokens are not refunded)."""
+        if lease.lease_id is None:
+            return
+        self._conn.execute("DELETE FROM leases WHERE id = ?", (lease.lease_id,))
+
+
+_limiter: RateLimiter | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide limiter backed by `Config.RATE_LIMIT_DB`."""
+    global _limiter  # noqa: PLW0603
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(config.RATE_LIMIT_DB)
+    return _limiter
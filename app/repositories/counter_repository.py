@@ -0,0 +1,120 @@
+"""Counter repository for the write-time Quick Compare progress counters."""
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import Counter, PairwiseComparison, Translation
+
+TOTAL_PAIRS = "total_pairs"
+
+
+def explicit_comparisons_key(user_id: int) -> str:
+    """Counter name of a user's explicit comparison count."""
+    return f"explicit_comparisons:{user_id}"
+
+
+class CounterRepository:
+    """
+    Repository for the `counters` table.
+
+    The `record_*` methods run SQL-side increments inside the caller's
+    transaction and do not commit, so a counter changes atomically with the
+    translation or comparison that caused it.
+    """
+
+    def __init__(self, db_session: Session):
+        """Initialize repository with database session."""
+        self.db_session = db_session
+
+    def get_many(self, names: list[str]) -> dict[str, int]:
+        """Values of the named counters; missing counters are 0."""
+        stored = {
+            name: value
+            for name, value in self.db_session.execute(
+                select(Counter.name, Counter.value).where(Counter.name.in_(names))
+            )
+        }
+        return {name: stored.get(name, 0) for name in names}
+
+    def record_translation(self, query_id: int) -> None:
+        """
+        Count the pairs a new translation of a query adds.
+
+        Call before inserting the translation: the n-th translation of a
+        query pairs with the n-1 already stored.
+        """
+        existing = (
+            self.db_session.query(func.count(Translation.id))
+            .filter(Translation.query_id == query_id)
+            .scalar()
+        ) or 0
+        if existing:
+            self.increment(TOTAL_PAIRS, existing)
+
+    def record_explicit_comparisons(self, user_id: int, count: int = 1) -> None:
+        """Count a user's new Quick Compare comparisons."""
+        self.increment(explicit_comparisons_key(user_id), count)
+
+    def increment(self, name: str, delta: int) -> None:
+        stmt = insert(Counter).values(name=name, value=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Counter.name],
+            set_={
+                "value": Counter.value + stmt.excluded.value,
+                "updated_at": func.now(),
+            },
+        )
+        self.db_session.execute(stmt)
+
+    def compute(self) -> dict[str, int]:
+        """Aggregate every counter from the translations and comparisons."""
+        per_query = (
+            select(func.count(Translation.id).label("n"))
+            .group_by(Translation.query_id)
+            .subquery()
+        )
+        total_pairs = self.db_session.scalar(
+            select(func.coalesce(func.sum(per_query.c.n * (per_query.c.n - 1) // 2), 0))
+        )
+        counters = {TOTAL_PAIRS: int(total_pairs or 0)}
+
+        for user_id, count in (
+            self.db_session.query(
+                PairwiseComparison.user_id, func.count(PairwiseComparison.id)
+            )
+            .filter(PairwiseComparison.source == "explicit")
+            .group_by(PairwiseComparison.user_id)
+        ):
+            counters[explicit_comparisons_key(user_id)] = count
+        return counters
+
+    def check(self) -> list[tuple[str, int, int]]:
+        """
+        Compare the stored counters with a fresh aggregation.
+
+        Returns:
+            (name, stored, expected) for every counter that drifted.
+        """
+        expected = self.compute()
+        stored = {
+            name: value
+            for name, value in self.db_session.execute(
+                select(Counter.name, Counter.value)
+            )
+        }
+        return [
+            (name, stored.get(name, 0), expected.get(name, 0))
+            for name in sorted(expected.keys() | stored.keys())
+            if stored.get(name, 0) != expected.get(name, 0)
+        ]
+
+    def rebuild(self) -> int:
+        """Replace the counters with a fresh aggregation; returns their count."""
+        expected = self.compute()
+        self.db_session.query(Counter).delete()
+        self.db_session.add_all(
+            Counter(name=name, value=value) for name, value in expected.items()
+        )
+        self.db_session.commit()
+        return len(expected)
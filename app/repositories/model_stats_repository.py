@@ -0,0 +1,232 @@
+"""Model stats repository for the write-time leaderboard aggregates."""
+
+from collections import defaultdict
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import ModelStats, Query, Translation, Vote
+
+# Leaderboard points per star rating (3=Excellent, 2=Good, 1=Okay, -1=Trash)
+RATING_SCORES = {3: 3, 2: 1, 1: 0, -1: -2}
+RATING_COLUMNS = {
+    3: "excellent_count",
+    2: "good_count",
+    1: "okay_count",
+    -1: "rejected_count",
+}
+
+COUNTER_FIELDS = (
+    "appearances",
+    "total_cost",
+    "source_word_count",
+    "votes_cast",
+    "excellent_count",
+    "good_count",
+    "okay_count",
+    "rejected_count",
+    "score",
+)
+
+
+class ModelStatsRepository:
+    """
+    Repository for the `model_stats` rollup.
+
+    The `record_*` methods run SQL-side increments inside the caller's
+    transaction and do not commit, so the rollup changes atomically with the
+    translation or vote that caused it.
+    """
+
+    def __init__(self, db_session: Session):
+        """Initialize repository with database session."""
+        self.db_session = db_session
+
+    def get_all(self) -> list[ModelStats]:
+        """Get the stats row of every model."""
+        return self.db_session.query(ModelStats).all()
+
+    def record_translation(
+        self, model: str, cost: float | None, source_word_count: int
+    ) -> None:
+        """Count a newly generated translation."""
+        self._increment(
+            model,
+            {
+                "appearances": 1,
+                "total_cost": cost or 0.0,
+                "source_word_count": source_word_count,
+            },
+        )
+
+    def record_vote(self, model: str, rating: int | None) -> None:
+        """Count a new vote."""
+        deltas = _rating_deltas(rating, 1)
+        deltas["votes_cast"] += 1
+        self._increment(model, deltas)
+
+    def record_vote_change(
+        self, model: str, old_rating: int | None, new_rating: int | None
+    ) -> None:
+        """Move an existing vote from one rating to another."""
+        if old_rating == new_rating:
+            return
+        deltas = _rating_deltas(old_rating, -1)
+        for field, delta in _rating_deltas(new_rating, 1).items():
+            deltas[field] += delta
+        self._increment(model, deltas)
+
+    def record_vote_removed(self, model: str, rating: int | None) -> None:
+        """Uncount a deleted vote."""
+        deltas = _rating_deltas(rating, -1)
+        deltas["votes_cast"] -= 1
+        self._increment(model, deltas)
+
+    def record_votes(
+        self,
+        new_votes: list[tuple[str, int | None]],
+        changed_votes: list[tuple[str, int | None, int | None]] = (),
+    ) -> None:
+        """
+        Count a batch of votes in one statement.
+
+        Args:
+            new_votes: (model, rating) per new vote.
+            changed_votes: (model, old_rating, new_rating) per updated vote.
+        """
+        per_model: dict[str, defaultdict[str, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        for model, rating in new_votes:
+            deltas = per_model[model]
+            deltas["votes_cast"] += 1
+            for field, delta in _rating_deltas(rating, 1).items():
+                deltas[field] += delta
+        for model, old_rating, new_rating in changed_votes:
+            if old_rating == new_rating:
+                continue
+            deltas = per_model[model]
+            for field, delta in _rating_deltas(old_rating, -1).items():
+                deltas[field] += delta
+            for field, delta in _rating_deltas(new_rating, 1).items():
+                deltas[field] += delta
+        if not per_model:
+            return
+
+        stmt = insert(ModelStats)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ModelStats.model],
+            set_={
+                **{
+                    field: getattr(ModelStats, field) + stmt.excluded[field]
+                    for field in COUNTER_FIELDS
+                },
+                "revision": ModelStats.revision + 1,
+                "updated_at": func.now(),
+            },
+        )
+        self.db_session.execute(
+            stmt,
+            [
+                {
+                    "model": model,
+                    "revision": 1,
+                    **{field: deltas.get(field, 0) for field in COUNTER_FIELDS},
+                }
+                for model, deltas in per_model.items()
+            ],
+        )
+
+    def _increment(self, model: str, deltas: dict[str, float]) -> None:
+        values = {field: deltas.get(field, 0) for field in COUNTER_FIELDS}
+        stmt = insert(ModelStats).values(model=model, revision=1, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ModelStats.model],
+            set_={
+                **{
+                    field: getattr(ModelStats, field) + stmt.excluded[field]
+                    for field in deltas
+                },
+                "revision": ModelStats.revision + 1,
+                "updated_at": func.now(),
+            },
+        )
+        self.db_session.execute(stmt)
+
+    def compute(self) -> dict[str, dict[str, float]]:
+        """Aggregate the stats of every model from the translations and votes."""
+        stats: dict[str, dict[str, float]] = defaultdict(
+            lambda: dict.fromkeys(COUNTER_FIELDS, 0)
+        )
+
+        for model, appearances, total_cost in self.db_session.query(
+            Translation.model,
+            func.count(Translation.id),
+            func.coalesce(func.sum(Translation.cost), 0.0),
+        ).group_by(Translation.model):
+            stats[model]["appearances"] = appearances
+            stats[model]["total_cost"] = total_cost
+
+        # Word counts need Python's str.split(), so count each query once
+        word_counts = {
+            query_id: len(source_text.split()) if source_text else 0
+            for query_id, source_text in self.db_session.query(
+                Query.id, Query.source_text
+            )
+        }
+        for model, query_id, count in self.db_session.query(
+            Translation.model, Translation.query_id, func.count(Translation.id)
+        ).group_by(Translation.model, Translation.query_id):
+            stats[model]["source_word_count"] += word_counts.get(query_id, 0) * count
+
+        for model, rating, count in (
+            self.db_session.query(Translation.model, Vote.rating, func.count(Vote.id))
+            .join(Translation, Vote.translation_id == Translation.id)
+            .group_by(Translation.model, Vote.rating)
+        ):
+            stats[model]["votes_cast"] += count
+            for field, delta in _rating_deltas(rating, count).items():
+                stats[model][field] += delta
+
+        return dict(stats)
+
+    def check(self) -> list[tuple[str, str, float, float]]:
+        """
+        Compare the stored rollup with a fresh aggregation.
+
+        Returns:
+            (model, field, stored, expected) for every value that drifted.
+        """
+        expected = self.compute()
+        stored = {row.model: row for row in self.get_all()}
+        drift = []
+        for model in sorted(expected.keys() | stored.keys()):
+            fresh = expected.get(model, dict.fromkeys(COUNTER_FIELDS, 0))
+            row = stored.get(model)
+            for field in COUNTER_FIELDS:
+                current = getattr(row, field) if row else 0
+                if abs((current or 0) - fresh[field]) > 1e-9:
+                    drift.append((model, field, current, fresh[field]))
+        return drift
+
+    def rebuild(self) -> int:
+        """Replace the rollup with a fresh aggregation; returns the model count."""
+        expected = self.compute()
+        revisions = {row.model: row.revision or 0 for row in self.get_all()}
+        self.db_session.query(ModelStats).delete()
+        self.db_session.add_all(
+            ModelStats(model=model, revision=revisions.get(model, 0) + 1, **values)
+            for model, values in expected.items()
+        )
+        self.db_session.commit()
+        return len(expected)
+
+
+def _rating_deltas(rating: int | None, count: int) -> defaultdict[str, int]:
+    """Counter changes for adding `count` votes with `rating` (negative removes)."""
+    deltas: defaultdict[str, int] = defaultdict(int)
+    if rating in RATING_COLUMNS:
+        deltas[RATING_COLUMNS[rating]] += count
+        deltas["score"] += RATING_SCORES[rating] * count
+    return deltas
@@ -0,0 +1,72 @@
+"""Pending translation repository for cross-worker single-flight claims."""
+
+import datetime
+import uuid
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import PendingTranslation
+
+
+class PendingTranslationRepository:
+    """Repository for PendingTranslation claim operations."""
+
+    def __init__(self, db_session: Session):
+        """Initialize repository with database session."""
+        self.db_session = db_session
+
+    def claim(self, query_id: int, model: str, ttl_seconds: float) -> str | None:
+        """
+        Claim a (query, model) pair for generation.
+
+        Expired claims are cleared first. Returns the owner token to pass to
+        `release`, or None if another live claim already exists.
+        """
+        now = datetime.datetime.now()
+        self.db_session.query(PendingTranslation).filter(
+            PendingTranslation.query_id == query_id,
+            PendingTranslation.model == model,
+            PendingTranslation.expires_at < now,
+        ).delete(synchronize_session=False)
+
+        owner = uuid.uuid4().hex
+        self.db_session.add(
+            PendingTranslation(
+                query_id=query_id,
+                model=model,
+                owner=owner,
+                expires_at=now + datetime.timedelta(seconds=ttl_seconds),
+            )
+        )
+        try:
+            self.db_session.commit()
+        except IntegrityError:
+            self.db_session.rollback()
+            return None
+        return owner
+
+    def is_claimed(self, query_id: int, model: str) -> bool:
+        """Check whether a live claim exists for a (query, model) pair."""
+        return (
+            self.db_session.query(PendingTranslation.id)
+            .filter(
+                PendingTranslation.query_id == query_id,
+                PendingTranslation.model == model,
+                PendingTranslation.expires_at >= datetime.datetime.now(),
+            )
+            .first()
+            is not None
+        )
+
+    def release(
+        self, query_id: int, model: str, owner: str, *, commit: bool = True
+    ) -> None:
+        """Remove a claim held by `owner` (optionally as part of a larger commit)."""
+        self.db_session.query(PendingTranslation).filter(
+            PendingTranslation.query_id == query_id,
+            PendingTranslation.model == model,
+            PendingTranslation.owner == owner,
+        ).delete(synchronize_session=False)
+        if commit:
+            self.db_session.commit()
@@ -1,8 +1,10 @@
 """Query repository for database operations related to Query model."""
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models import Query
+from app.text_normalization import source_hash
 
 
 class QueryRepository:
@@ -23,12 +25,35 @@ class QueryRepository:
         return self.db_session.query(Query).filter(Query.id == query_id).first()
 
     def get_by_source_text(self, source_text: str) -> Query | None:
-        """Get query by source text."""
-        return (
-            self.db_session.query(Query)
-            .filter(Query.source_text == source_text)
-            .first()
-        )
+        """Get query by source text, matching on its normalized hash."""
+        return self.get_by_source_hash(source_hash(source_text))
+
+    def get_by_source_hash(self, key: str) -> Query | None:
+        """Get query by `Query.source_hash`."""
+        return self.db_session.query(Query).filter(Query.source_hash == key).first()
+
+    def get_or_create(self, source_text: str) -> Query:
+        """
+        Get the query for a source text, creating it if needed.
+
+        Safe against concurrent creators: the unique `source_hash` index makes
+        the losing insert fail, and it then returns the winner's row.
+        """
+        key = source_hash(source_text)
+        query = self.get_by_source_hash(key)
+        if query:
+            return query
+
+        query = Query(source_text=source_text, source_hash=key)
+        self.db_session.add(query)
+        try:
+            self.db_session.commit()
+        except IntegrityError:
+            self.db_session.rollback()
+            query = self.get_by_source_hash(key)
+            if query is None:
+                raise
+        return query
 
     def get_all(self) -> list[Query]:
         """Get all queries."""
@@ -36,12 +61,7 @@ class QueryRepository:
 
     def create_if_not_exists(self, source_text: str) -> Query:
         """Create a new query if it doesn't exist, otherwise return existing."""
-        query = self.get_by_source_text(source_text)
-        if not query:
-            query = Query(source_text=source_text)
-            self.db_session.add(query)
-            self.db_session.commit()
-        return query
+        return self.get_or_create(source_text)
 
     def update(self, query: Query) -> Query:
         """Update an existing query."""
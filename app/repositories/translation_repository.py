@@ -1,5 +1,9 @@
 """Translation repository for database operations related to Translation model."""
 
+from collections import defaultdict
+from collections.abc import Iterable
+
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.models import Translation
@@ -42,6 +46,31 @@ class TranslationRepository:
             .all()
         )
 
+    def get_recent_generation_ms(
+        self, models: Iterable[str], limit: int
+    ) -> dict[str, list[int]]:
+        """Generation times of each model's last `limit` timed translations."""
+        ranked = (
+            select(
+                Translation.model.label("model"),
+                Translation.generation_ms.label("generation_ms"),
+                func.row_number()
+                .over(partition_by=Translation.model, order_by=Translation.id.desc())
+                .label("rank"),
+            )
+            .where(
+                Translation.model.in_(list(models)),
+                Translation.generation_ms.is_not(None),
+            )
+            .subquery()
+        )
+        samples = defaultdict(list)
+        for model, generation_ms in self.db_session.execute(
+            select(ranked.c.model, ranked.c.generation_ms).where(ranked.c.rank <= limit)
+        ):
+            samples[model].append(generation_ms)
+        return dict(samples)
+
     def get_all(self) -> list[Translation]:
         """Get all translations."""
         return self.db_session.query(Translation).all()
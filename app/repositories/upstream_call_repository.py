@@ -0,0 +1,147 @@
+"""Upstream call repository for the per-model latency and error stats."""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime
+
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models import UpstreamCall
+
+TIMEOUT_ERRORS = ("APITimeoutError",)
+
+# Calls that gave up waiting for the local rate limiter and never reached the
+# model, so their latency says nothing about it
+LOCAL_ERRORS = ("RateLimitExceeded",)
+
+
+class UpstreamCallRepository:
+    """Repository for the `upstream_calls` telemetry table."""
+
+    def __init__(self, db_session: Session):
+        """Initialize repository with database session."""
+        self.db_session = db_session
+
+    def stats_by_model(self, since: datetime) -> dict[str, dict]:
+        """
+        Per-model call counts, error rates and latency percentiles since a time.
+
+        Latency and time-to-first-byte percentiles cover successful calls
+        only, so fast failures do not flatter a model; queue waits cover every
+        call. Percentiles are nearest-rank and None without samples.
+        """
+        recent = UpstreamCall.created_at >= since
+        succeeded = and_(recent, UpstreamCall.error.is_(None))
+
+        stats = {
+            model: {
+                "model": model,
+                "calls": calls,
+                "errors": errors or 0,
+                "timeouts": timeouts or 0,
+                "error_rate": (errors or 0) / calls,
+                "timeout_rate": (timeouts or 0) / calls,
+                "avg_retries": float(avg_retries or 0.0),
+                "p50_latency_ms": None,
+                "p95_latency_ms": None,
+                "p50_ttfb_ms": None,
+                "p95_ttfb_ms": None,
+                "p95_queue_wait_ms": None,
+            }
+            for model, calls, errors, timeouts, avg_retries in self.db_session.execute(
+                select(
+                    UpstreamCall.model,
+                    func.count(UpstreamCall.id),
+                    func.sum(case((UpstreamCall.error.is_not(None), 1), else_=0)),
+                    func.sum(
+                        case((UpstreamCall.error.in_(TIMEOUT_ERRORS), 1), else_=0)
+                    ),
+                    func.avg(UpstreamCall.retries),
+                )
+                .where(recent)
+                .group_by(UpstreamCall.model)
+            )
+        }
+
+        percentiles = [
+            (UpstreamCall.latency_ms, succeeded, "latency_ms", (50, 95)),
+            (
+                UpstreamCall.ttfb_ms,
+                and_(succeeded, UpstreamCall.ttfb_ms.is_not(None)),
+                "ttfb_ms",
+                (50, 95),
+            ),
+            (UpstreamCall.queue_wait_ms, recent, "queue_wait_ms", (95,)),
+        ]
+        for column, condition, name, wanted in percentiles:
+            for model, percent, value in self._percentiles(column, condition, wanted):
+                if model in stats:
+                    stats[model][f"p{percent}_{name}"] = value
+        return stats
+
+    def get_recent_latencies(
+        self, models: Iterable[str], since: datetime, limit: int
+    ) -> dict[str, list[tuple[int, str | None]]]:
+        """
+        (latency_ms, error) of each model's last `limit` calls since a time.
+
+        Failed and timed-out calls are included; calls rejected by the local
+        rate limiter are not. One window query covers every model.
+        """
+        ranked = (
+            select(
+                UpstreamCall.model.label("model"),
+                UpstreamCall.latency_ms.label("latency_ms"),
+                UpstreamCall.error.label("error"),
+                func.row_number()
+                .over(
+                    partition_by=UpstreamCall.model,
+                    order_by=UpstreamCall.id.desc(),
+                )
+                .label("rank"),
+            )
+            .where(
+                UpstreamCall.model.in_(list(models)),
+                UpstreamCall.created_at >= since,
+                or_(
+                    UpstreamCall.error.is_(None),
+                    UpstreamCall.error.not_in(LOCAL_ERRORS),
+                ),
+            )
+            .subquery()
+        )
+        latencies = defaultdict(list)
+        for model, latency_ms, error in self.db_session.execute(
+            select(ranked.c.model, ranked.c.latency_ms, ranked.c.error).where(
+                ranked.c.rank <= limit
+            )
+        ):
+            latencies[model].append((latency_ms, error))
+        return dict(latencies)
+
+    def _percentiles(self, column, condition, wanted: tuple[int, ...]):
+        """
+        Nearest-rank percentiles of a column per model, in one window query.
+
+        Yields (model, percent, value) for every percent in `wanted`.
+        """
+        ranked = (
+            select(
+                UpstreamCall.model.label("model"),
+                column.label("value"),
+                func.row_number()
+                .over(partition_by=UpstreamCall.model, order_by=column)
+                .label("rank"),
+                func.count().over(partition_by=UpstreamCall.model).label("samples"),
+            )
+            .where(condition)
+            .subquery()
+        )
+        for percent in wanted:
+            # ceil(samples * percent / 100) in integer arithmetic
+            target = (ranked.c.samples * percent + 99) // 100
+            for model, value in self.db_session.execute(
+                select(ranked.c.model, ranked.c.value).where(ranked.c.rank == target)
+            ):
+                yield model, percent, value
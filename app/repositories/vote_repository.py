@@ -1,9 +1,11 @@
 """Vote repository for database operations related to Vote model."""
 
 from sqlalchemy import and_
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
 
 from app.models import Vote
+from app.repositories.model_stats_repository import ModelStatsRepository
 
 
 class VoteRepository:
@@ -13,10 +15,11 @@ class VoteRepository:
         """Initialize repository with database session."""
         self.db_session = db_session
 
-    def add(self, vote: Vote) -> Vote:
-        """Add a new vote to the database."""
+    def add(self, vote: Vote, *, commit: bool = True) -> Vote:
+        """Add a new vote (optionally as part of a larger commit)."""
         self.db_session.add(vote)
-        self.db_session.commit()
+        if commit:
+            self.db_session.commit()
         return vote
 
     def bulk_add(self, votes: list[Vote]) -> None:
@@ -53,6 +56,87 @@ class VoteRepository:
             .first()
         )
 
+    def get_ratings(
+        self, user_id: int, query_id: int, translation_ids: list[int]
+    ) -> dict[int, int | None]:
+        """Current ratings of a user's votes on these translations of a query."""
+        rows = self.db_session.query(Vote.translation_id, Vote.rating).filter(
+            Vote.user_id == user_id,
+            Vote.query_id == query_id,
+            Vote.translation_id.in_(translation_ids),
+        )
+        return {translation_id: rating for translation_id, rating in rows}
+
+    def insert_new(
+        self, user_id: int, query_id: int, ratings: dict[int, int]
+    ) -> set[int]:
+        """
+        Insert the votes the user has not cast yet, leaving existing ones alone.
+
+        Being a write, this takes SQLite's write lock for the rest of the
+        transaction, so votes that already existed can then be read and
+        updated without another worker changing them in between.
+
+        Returns:
+            IDs of the translations whose votes were inserted.
+        """
+        if not ratings:
+            return set()
+        stmt = (
+            insert(Vote)
+            .values(
+                [
+                    {
+                        "user_id": user_id,
+                        "query_id": query_id,
+                        "translation_id": translation_id,
+                        "rating": rating,
+                    }
+                    for translation_id, rating in ratings.items()
+                ]
+            )
+            .on_conflict_do_nothing(
+                index_elements=[Vote.user_id, Vote.query_id, Vote.translation_id]
+            )
+            .returning(Vote.translation_id)
+        )
+        return set(self.db_session.scalars(stmt))
+
+    def upsert_many(
+        self,
+        user_id: int,
+        query_id: int,
+        ratings: dict[int, int],
+        *,
+        commit: bool = True,
+    ) -> None:
+        """
+        Insert or update a user's votes on a query in one statement.
+
+        Args:
+            ratings: Rating per translation ID.
+        """
+        if not ratings:
+            return
+        stmt = insert(Vote).values(
+            [
+                {
+                    "user_id": user_id,
+                    "query_id": query_id,
+                    "translation_id": translation_id,
+                    "rating": rating,
+                }
+                for translation_id, rating in ratings.items()
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Vote.user_id, Vote.query_id, Vote.translation_id],
+            set_={"rating": stmt.excluded.rating},
+        )
+        self.db_session.execute(stmt)
+        if commit:
+            self.db_session.commit()
+
     def get_all(self) -> list[Vote]:
         """Get all votes."""
         return self.db_session.query(Vote).all()
@@ -60,16 +144,22 @@ class VoteRepository:
     def delete_by_user_and_query(self, user_id: int, query_id: int) -> None:
         """Delete all votes by user for a specific query."""
         votes = self.get_by_user_and_query(user_id, query_id)
+        stats_repo = ModelStatsRepository(self.db_session)
         for vote in votes:
+            stats_repo.record_vote_removed(vote.translation.model, vote.rating)
             self.db_session.delete(vote)
         self.db_session.commit()
 
     def delete(self, vote: Vote) -> None:
         """Delete a vote."""
+        ModelStatsRepository(self.db_session).record_vote_removed(
+            vote.translation.model, vote.rating
+        )
         self.db_session.delete(vote)
         self.db_session.commit()
 
-    def update(self, vote: Vote) -> Vote:
-        """Update an existing vote."""
-        self.db_session.commit()
+    def update(self, vote: Vote, *, commit: bool = True) -> Vote:
+        """Update an existing vote (optionally as part of a larger commit)."""
+        if commit:
+            self.db_session.commit()
         return vote
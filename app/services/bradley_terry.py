@@ -0,0 +1,388 @@
+"""Bradley-Terry ratings with bootstrap confidence intervals.
+
+An order-independent alternative to the online ELO ratings. Strengths are
+the maximum-likelihood Bradley-Terry fit over every pairwise comparison
+(ties count as half a win for each side), computed from per-pair
+aggregates, so the cost of a fit depends on the number of models and not
+on the number of comparisons. Confidence intervals come from refitting
+resampled comparison sets in a process pool, within a time budget.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import cast
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+
+from app.config import get_config
+from app.database import db_session
+from app.models import PairwiseComparison, Translation
+
+config = get_config()
+
+logger = logging.getLogger(__name__)
+
+# Every model plays this many virtual games, half won, against an anchor of
+# strength 1. This keeps unbeaten or winless models finite, connects
+# disjoint groups of models and pins the scale so ratings centre on 1500.
+PRIOR_GAMES = 1.0
+
+# Ratings are reported on the ELO scale: 1500 + 400 * log10(strength)
+BASE_RATING = 1500.0
+RATING_SCALE = 400.0
+
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-10  # Largest Newton step of any log-strength at convergence
+MAX_STEP = 2.0
+
+# Poisson draws above this mean use the normal approximation
+POISSON_NORMAL_THRESHOLD = 30
+
+CONFIDENCE = 0.95
+
+
+@dataclass
+class PairCounts:
+    """Aggregated outcomes per unordered model pair (i < j)."""
+
+    models: list[str] = field(default_factory=list)
+    # (i, j) -> [wins of i over j, wins of j over i, ties]
+    pairs: dict[tuple[int, int], list[int]] = field(default_factory=dict)
+
+    @property
+    def comparisons(self) -> int:
+        return sum(sum(outcomes) for outcomes in self.pairs.values())
+
+
+@dataclass(frozen=True)
+class BradleyTerryRating:
+    """Fitted rating of one model with its bootstrap interval."""
+
+    model: str
+    rating: float
+    ci_low: float
+    ci_high: float
+    comparisons: int
+
+
+def load_pair_counts(session: Session | None = None) -> PairCounts:
+    """
+    Aggregate the comparison history per model pair in SQL.
+
+    Uses the same rules as `ELOService.record_comparison`: a winner and a
+    loser make a win, no winner with both translations makes a tie between
+    their models. Comparisons of a model with itself carry no information
+    and are skipped.
+    """
+    session = session or cast(Session, db_session)
+    counts = PairCounts()
+    index: dict[str, int] = {}
+
+    def model_index(model: str) -> int:
+        i = index.get(model)
+        if i is None:
+            i = index[model] = len(counts.models)
+            counts.models.append(model)
+        return i
+
+    def add(model_a: str, model_b: str, outcome: int, count: int) -> None:
+        # outcome: 0 = a won, 1 = b won, 2 = tie
+        if model_a == model_b:
+            return
+        i, j = model_index(model_a), model_index(model_b)
+        if i > j:
+            i, j = j, i
+            outcome = {0: 1, 1: 0}.get(outcome, outcome)
+        counts.pairs.setdefault((i, j), [0, 0, 0])[outcome] += count
+
+    decisive = session.execute(
+        select(
+            PairwiseComparison.winner_model,
+            PairwiseComparison.loser_model,
+            func.count(),
+        )
+        .where(
+            PairwiseComparison.winner_model.isnot(None),
+            PairwiseComparison.loser_model.isnot(None),
+        )
+        .group_by(PairwiseComparison.winner_model, PairwiseComparison.loser_model)
+    )
+    for winner, loser, count in decisive:
+        add(winner, loser, 0, count)
+
+    translation_a = aliased(Translation)
+    translation_b = aliased(Translation)
+    ties = session.execute(
+        select(translation_a.model, translation_b.model, func.count())
+        .select_from(PairwiseComparison)
+        .join(translation_a, translation_a.id == PairwiseComparison.translation_a_id)
+        .join(translation_b, translation_b.id == PairwiseComparison.translation_b_id)
+        .where(PairwiseComparison.winner_model.is_(None))
+        .group_by(translation_a.model, translation_b.model)
+    )
+    for model_a, model_b, count in ties:
+        add(model_a, model_b, 2, count)
+
+    return counts
+
+
+def fit(
+    n_models: int,
+    pairs: dict[tuple[int, int], list[int]],
+    initial: list[float] | None = None,
+) -> list[float]:
+    """
+    Maximum-likelihood log-strengths via Newton's method.
+
+    The log-likelihood is strictly concave thanks to the prior, and the
+    Hessian is only models x models, so a handful of Newton steps over the
+    per-pair aggregates converge far faster than the classic MM updates.
+
+    Returns:
+        The log-strength of each model; the prior's anchor is 0.
+    """
+    # Each model's total wins (ties as halves) including the prior's half
+    wins = [PRIOR_GAMES / 2] * n_models
+    games = []
+    for (i, j), (wins_i, wins_j, ties) in pairs.items():
+        wins[i] += wins_i + ties / 2
+        wins[j] += wins_j + ties / 2
+        games.append((i, j, wins_i + wins_j + ties))
+
+    theta = list(initial) if initial else [0.0] * n_models
+    for _ in range(MAX_ITERATIONS):
+        gradient = list(wins)
+        hessian = [[0.0] * n_models for _ in range(n_models)]
+        for i in range(n_models):
+            # Expected share of the prior's games against the anchor
+            p = 1 / (1 + math.exp(-theta[i]))
+            gradient[i] -= PRIOR_GAMES * p
+            hessian[i][i] += PRIOR_GAMES * p * (1 - p)
+        for i, j, n in games:
+            p = 1 / (1 + math.exp(theta[j] - theta[i]))
+            gradient[i] -= n * p
+            gradient[j] -= n * (1 - p)
+            weight = n * p * (1 - p)
+            hessian[i][i] += weight
+            hessian[j][j] += weight
+            hessian[i][j] -= weight
+            hessian[j][i] -= weight
+
+        step = _solve_positive_definite(hessian, gradient)
+        largest = max((abs(x) for x in step), default=0.0)
+        if largest < TOLERANCE:
+            break
+        # Damp huge first steps from extreme records; the likelihood is flat there
+        scale = min(1.0, MAX_STEP / largest)
+        theta = [t + scale * x for t, x in zip(theta, step, strict=True)]
+    return theta
+
+
+def _solve_positive_definite(
+    matrix: list[list[float]], rhs: list[float]
+) -> list[float]:
+    """Solve `matrix @ x = rhs` by Cholesky decomposition (matrix is overwritten)."""
+    n = len(rhs)
+    for k in range(n):
+        row_k = matrix[k]
+        pivot = math.sqrt(row_k[k] - sum(x * x for x in row_k[:k]))
+        row_k[k] = pivot
+        for i in range(k + 1, n):
+            row_i = matrix[i]
+            row_i[k] = (
+                row_i[k] - sum(a * b for a, b in zip(row_i[:k], row_k[:k], strict=True))
+            ) / pivot
+
+    y = [0.0] * n
+    for i in range(n):
+        row_i = matrix[i]
+        y[i] = (rhs[i] - sum(row_i[k] * y[k] for k in range(i))) / row_i[i]
+    x = [0.0] * n
+    for i in reversed(range(n)):
+        x[i] = (y[i] - sum(matrix[k][i] * x[k] for k in range(i + 1, n))) / matrix[i][i]
+    return x
+
+
+def to_rating(theta: float) -> float:
+    """Log-strength on the ELO scale."""
+    return BASE_RATING + RATING_SCALE * theta / math.log(10)
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    """Poisson draw; normal approximation for large means."""
+    if mean >= POISSON_NORMAL_THRESHOLD:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    limit = math.exp(-mean)
+    count, product = 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def _bootstrap_chunk(
+    n_models: int,
+    pairs: dict[tuple[int, int], list[int]],
+    initial: list[float],
+    samples: int,
+    seed: int,
+    deadline: float | None = None,
+) -> list[list[float]]:
+    """
+    Refit `samples` resampled histories (runs in a worker process).
+
+    Uses the Poisson bootstrap: every (pair, outcome) count is replaced by a
+    Poisson draw with that mean, which matches resampling the comparisons
+    with replacement without touching them one by one. Stops early once the
+    wall-clock `deadline` (a `time.time()` value) has passed.
+    """
+    rng = random.Random(seed)
+    results = []
+    for _ in range(samples):
+        if deadline is not None and time.time() >= deadline:
+            break
+        resampled = {
+            pair: [_poisson(rng, count) if count else 0 for count in outcomes]
+            for pair, outcomes in pairs.items()
+        }
+        results.append([to_rating(t) for t in fit(n_models, resampled, initial)])
+    return results
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _worker_count() -> int:
+    return config.BRADLEY_TERRY_WORKERS or os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the process-wide bootstrap pool, starting it on first use."""
+    global _pool  # noqa: PLW0603
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawn, not fork: the web server's threads, locks and
+                # database connections must not be copied into workers
+                _pool = ProcessPoolExecutor(
+                    max_workers=_worker_count(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def _reset_pool() -> None:
+    global _pool  # noqa: PLW0603
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def bootstrap(
+    counts: PairCounts,
+    theta: list[float],
+    samples: int,
+    seed: int = 0,
+    seconds: float | None = None,
+) -> list[list[float]]:
+    """
+    Ratings of the resamples, split into one chunk per worker.
+
+    Resampling stops after `seconds` (default `BRADLEY_TERRY_BOOTSTRAP_SECONDS`,
+    0 for no limit), so fewer than `samples` may be returned.
+    """
+    if not counts.pairs or samples <= 0:
+        return []
+    if seconds is None:
+        seconds = config.BRADLEY_TERRY_BOOTSTRAP_SECONDS
+    deadline = time.time() + seconds if seconds > 0 else None
+
+    workers = min(_worker_count(), samples)
+    chunks = [samples // workers + (k < samples % workers) for k in range(workers)]
+    args = [
+        (len(counts.models), counts.pairs, theta, size, seed + k, deadline)
+        for k, size in enumerate(chunks)
+    ]
+
+    if workers == 1:
+        resampled = _bootstrap_chunk(*args[0])
+    else:
+        try:
+            pool = _get_pool()
+            futures = [
+                pool.submit(_bootstrap_chunk, *chunk_args) for chunk_args in args
+            ]
+            resampled = [ratings for future in futures for ratings in future.result()]
+        except BrokenProcessPool:
+            logger.exception("Bootstrap pool failed; resampling in this process")
+            _reset_pool()
+            resampled = [
+                ratings
+                for chunk_args in args
+                for ratings in _bootstrap_chunk(*chunk_args)
+            ]
+    if len(resampled) < samples:
+        logger.info(
+            f"Bootstrap stopped after {seconds:g}s with "
+            f"{len(resampled)}/{samples} resamples"
+        )
+    return resampled
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    position = (len(sorted_values) - 1) * q
+    low = math.floor(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (
+        position - low
+    )
+
+
+def compute_bradley_terry(
+    session: Session | None = None,
+    samples: int | None = None,
+    seed: int = 0,
+    seconds: float | None = None,
+) -> list[BradleyTerryRating]:
+    """
+    Fit ratings for every compared model, best first.
+
+    Intervals are the central `CONFIDENCE` range of the bootstrap ratings,
+    resampled for at most `seconds` (see `bootstrap`); with no resamples
+    they collapse to the point estimate.
+    """
+    counts = load_pair_counts(session)
+    if samples is None:
+        samples = config.BRADLEY_TERRY_BOOTSTRAP_SAMPLES
+    n_models = len(counts.models)
+    theta = fit(n_models, counts.pairs)
+    resampled = bootstrap(counts, theta, samples, seed, seconds)
+
+    played = [0] * n_models
+    for (i, j), outcomes in counts.pairs.items():
+        played[i] += sum(outcomes)
+        played[j] += sum(outcomes)
+
+    tail = (1 - CONFIDENCE) / 2
+    results = []
+    for i, model in enumerate(counts.models):
+        rating = to_rating(theta[i])
+        ci_low = ci_high = rating
+        if resampled:
+            values = sorted(ratings[i] for ratings in resampled)
+            ci_low, ci_high = _percentile(values, tail), _percentile(values, 1 - tail)
+        results.append(BradleyTerryRating(model, rating, ci_low, ci_high, played[i]))
+    results.sort(key=lambda r: r.rating, reverse=True)
+    return results
@@ -0,0 +1,169 @@
+"""Full-history ELO replay.
+
+Rebuilds `ModelELO` from the `PairwiseComparison` history, for example after
+changing `K_FACTOR`, renaming models or deleting bad data. The history is
+loaded once into compact integer arrays and replayed in a single pass that
+applies exactly the same arithmetic, in the same order, as the online
+updates in `ELOService`, so replaying unchanged history reproduces the
+stored ratings bit for bit.
+"""
+
+import logging
+from array import array
+from dataclasses import dataclass, field
+from typing import cast
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+
+from app.database import db_session
+from app.models import ModelELO, PairwiseComparison, Translation
+from app.services.elo_service import DEFAULT_ELO, K_FACTOR, elo_update
+
+logger = logging.getLogger(__name__)
+
+# Outcome codes in EloHistory.outcomes
+WIN = 1  # Model a beat model b
+TIE = 0
+
+
+@dataclass
+class EloHistory:
+    """Comparisons that affect ratings, as parallel arrays of model indices."""
+
+    models: list[str] = field(default_factory=list)
+    a: array = field(default_factory=lambda: array("l"))
+    b: array = field(default_factory=lambda: array("l"))
+    outcomes: array = field(default_factory=lambda: array("b"))
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+
+@dataclass(frozen=True)
+class EloResult:
+    """Final rating and record of one model after a replay."""
+
+    model: str
+    elo_rating: float
+    wins: int
+    losses: int
+    ties: int
+
+
+def load_history(session: Session | None = None) -> EloHistory:
+    """
+    Load every rating-relevant comparison in the order it was applied.
+
+    Mirrors `ELOService.record_comparison`: a comparison with both winner and
+    loser is a win; one without a winner but with both translation ids is a
+    tie between the translations' models; anything else never touched the
+    ratings and is skipped. Online updates are applied as comparisons are
+    inserted, so id order is application order.
+    """
+    session = session or cast(Session, db_session)
+    translation_a = aliased(Translation)
+    translation_b = aliased(Translation)
+    rows = session.execute(
+        select(
+            PairwiseComparison.winner_model,
+            PairwiseComparison.loser_model,
+            translation_a.model,
+            translation_b.model,
+        )
+        .outerjoin(
+            translation_a, translation_a.id == PairwiseComparison.translation_a_id
+        )
+        .outerjoin(
+            translation_b, translation_b.id == PairwiseComparison.translation_b_id
+        )
+        .order_by(PairwiseComparison.id)
+        .execution_options(yield_per=10_000)
+    )
+
+    history = EloHistory()
+    index: dict[str, int] = {}
+
+    def model_index(model: str) -> int:
+        i = index.get(model)
+        if i is None:
+            i = index[model] = len(history.models)
+            history.models.append(model)
+        return i
+
+    for winner, loser, model_a, model_b in rows:
+        if winner and loser:
+            history.a.append(model_index(winner))
+            history.b.append(model_index(loser))
+            history.outcomes.append(WIN)
+        elif not winner and model_a and model_b:
+            history.a.append(model_index(model_a))
+            history.b.append(model_index(model_b))
+            history.outcomes.append(TIE)
+    return history
+
+
+def replay(history: EloHistory, k_factor: float = K_FACTOR) -> list[EloResult]:
+    """Apply every comparison in order and return each model's final state."""
+    n = len(history.models)
+    ratings = [DEFAULT_ELO] * n
+    wins = [0] * n
+    losses = [0] * n
+    ties = [0] * n
+
+    # Same formula as the online path, so results are identical
+    for a, b, outcome in zip(history.a, history.b, history.outcomes, strict=True):
+        delta_a, delta_b = elo_update(
+            ratings[a], ratings[b], 1 if outcome == WIN else 0.5, k_factor
+        )
+        ratings[a] += delta_a
+        ratings[b] += delta_b
+        if outcome == WIN:
+            wins[a] += 1
+            losses[b] += 1
+        else:
+            ties[a] += 1
+            ties[b] += 1
+
+    return [
+        EloResult(model, ratings[i], wins[i], losses[i], ties[i])
+        for i, model in enumerate(history.models)
+    ]
+
+
+def recompute_elo(
+    session: Session | None = None,
+    k_factor: float = K_FACTOR,
+    *,
+    dry_run: bool = False,
+) -> list[EloResult]:
+    """
+    Replay the full history and replace `ModelELO` in one transaction.
+
+    Models without any rating-relevant comparison are removed.
+    """
+    session = session or cast(Session, db_session)
+    history = load_history(session)
+    results = replay(history, k_factor)
+    logger.info(f"Replayed {len(history)} comparisons for {len(results)} models")
+    if dry_run:
+        return results
+
+    try:
+        existing = {r.model: r for r in session.query(ModelELO).all()}
+        for result in results:
+            record = existing.pop(result.model, None)
+            if record is None:
+                record = ModelELO(model=result.model)
+                session.add(record)
+            record.elo_rating = result.elo_rating
+            record.wins = result.wins
+            record.losses = result.losses
+            record.ties = result.ties
+        for record in existing.values():
+            session.delete(record)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return results
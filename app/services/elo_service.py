@@ -6,13 +6,20 @@ This service manages ELO ratings for translation models, supporting both:
 """
 
 import logging
+import threading
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import ExitStack, contextmanager
 from itertools import combinations
 from typing import cast
 
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
 
 from app.database import db_session
 from app.models import ModelELO, PairwiseComparison, Translation, Vote
+from app.repositories.counter_repository import CounterRepository
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +27,56 @@ logger = logging.getLogger(__name__)
 K_FACTOR = 32  # Higher K = faster convergence, good for low data volume
 DEFAULT_ELO = 1500.0
 
+# Comparisons inserted per statement by record_comparisons
+INSERT_BATCH_SIZE = 5_000
+
+
+def elo_update(
+    rating_a: float, rating_b: float, score_a: float, k_factor: float = K_FACTOR
+) -> tuple[float, float]:
+    """
+    Rating changes of models a and b after one match.
+
+    The single ELO formula shared by the live updates, the bulk ingest and
+    the full-history replay.
+
+    Args:
+        score_a: 1 if a won, 0.5 for a tie, 0 if b won.
+
+    Returns:
+        The deltas to add to a's and b's ratings.
+    """
+    expected_a = 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+    return (
+        k_factor * (score_a - expected_a),
+        k_factor * ((1 - score_a) - (1 - expected_a)),
+    )
+
+
+_model_locks: dict[str, threading.RLock] = {}
+_model_locks_guard = threading.Lock()
+
+
+@contextmanager
+def model_locks(models: Iterable[str]) -> Iterator[None]:
+    """
+    Serialize rating updates of these models within this process.
+
+    Locks are taken in sorted order and are reentrant, so nested sections
+    over a subset of the same models are safe. Take them before the
+    transaction's first write: SQLite holds its write lock until commit,
+    and waiting for a model lock while holding it would stall other writers.
+    """
+    with _model_locks_guard:
+        locks = [
+            _model_locks.setdefault(model, threading.RLock())
+            for model in sorted(set(models))
+        ]
+    with ExitStack() as stack:
+        for lock in locks:
+            stack.enter_context(lock)
+        yield
+
 
 class ELOService:
     """Service for managing ELO ratings and pairwise comparisons."""
@@ -38,46 +95,87 @@ class ELOService:
             self.session.flush()
         return elo_record
 
-    def update_ratings(self, winner: str, loser: str) -> tuple[float, float]:
+    def update_ratings(
+        self, winner: str, loser: str, *, commit: bool = True
+    ) -> tuple[float, float]:
         """Update ELO ratings after a match. Returns (new_winner_elo, new_loser_elo)."""
-        winner_record = self.get_or_create(winner)
-        loser_record = self.get_or_create(loser)
-
-        # Calculate expected scores
-        expected_winner = 1 / (
-            1 + 10 ** ((loser_record.elo_rating - winner_record.elo_rating) / 400)
-        )
-        expected_loser = 1 - expected_winner
-
-        # Update ratings
-        winner_record.elo_rating += K_FACTOR * (1 - expected_winner)
-        loser_record.elo_rating += K_FACTOR * (0 - expected_loser)
+        with model_locks([winner, loser]):
+            ratings = self._current_ratings([winner, loser])
+            winner_delta, loser_delta = elo_update(ratings[winner], ratings[loser], 1)
 
-        # Update win/loss counters
-        winner_record.wins = (winner_record.wins or 0) + 1
-        loser_record.losses = (loser_record.losses or 0) + 1
+            # Update ratings and win/loss counters
+            self._increment(winner, winner_delta, wins=1)
+            self._increment(loser, loser_delta, losses=1)
 
-        self.session.commit()
+            new_ratings = self._current_ratings([winner, loser])
+            if commit:
+                self.session.commit()
 
-        return winner_record.elo_rating, loser_record.elo_rating
+        return new_ratings[winner], new_ratings[loser]
 
-    def record_tie(self, model_a: str, model_b: str) -> tuple[float, float]:
+    def record_tie(
+        self, model_a: str, model_b: str, *, commit: bool = True
+    ) -> tuple[float, float]:
         """Record a tie between two models. Ratings converge toward each other."""
-        a_record = self.get_or_create(model_a)
-        b_record = self.get_or_create(model_b)
-
-        # For ties, each player scores 0.5
-        expected_a = 1 / (1 + 10 ** ((b_record.elo_rating - a_record.elo_rating) / 400))
-
-        a_record.elo_rating += K_FACTOR * (0.5 - expected_a)
-        b_record.elo_rating += K_FACTOR * (0.5 - (1 - expected_a))
-
-        a_record.ties = (a_record.ties or 0) + 1
-        b_record.ties = (b_record.ties or 0) + 1
-
-        self.session.commit()
+        with model_locks([model_a, model_b]):
+            ratings = self._current_ratings([model_a, model_b])
+            # For ties, each player scores 0.5
+            delta_a, delta_b = elo_update(ratings[model_a], ratings[model_b], 0.5)
+
+            self._increment(model_a, delta_a, ties=1)
+            self._increment(model_b, delta_b, ties=1)
+
+            new_ratings = self._current_ratings([model_a, model_b])
+            if commit:
+                self.session.commit()
+
+        return new_ratings[model_a], new_ratings[model_b]
+
+    def _current_ratings(self, models: list[str]) -> dict[str, float]:
+        """Read the latest committed ratings, creating missing rows at the default."""
+        self.session.execute(
+            insert(ModelELO)
+            .values(
+                [
+                    {
+                        "model": model,
+                        "elo_rating": DEFAULT_ELO,
+                        "wins": 0,
+                        "losses": 0,
+                        "ties": 0,
+                    }
+                    for model in set(models)
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[ModelELO.model])
+        )
+        rows = self.session.execute(
+            select(ModelELO.model, ModelELO.elo_rating).where(
+                ModelELO.model.in_(models)
+            )
+        )
+        return {model: elo_rating for model, elo_rating in rows}
 
-        return a_record.elo_rating, b_record.elo_rating
+    def _increment(
+        self,
+        model: str,
+        rating_delta: float,
+        wins: int = 0,
+        losses: int = 0,
+        ties: int = 0,
+    ) -> None:
+        """Apply a rating change and counter increments in SQL."""
+        self.session.execute(
+            update(ModelELO)
+            .where(ModelELO.model == model)
+            .values(
+                elo_rating=ModelELO.elo_rating + rating_delta,
+                wins=func.coalesce(ModelELO.wins, 0) + wins,
+                losses=func.coalesce(ModelELO.losses, 0) + losses,
+                ties=func.coalesce(ModelELO.ties, 0) + ties,
+                updated_at=func.now(),
+            )
+        )
 
     def record_comparison(
         self,
@@ -88,8 +186,29 @@ class ELOService:
         translation_a_id: int | None = None,
         translation_b_id: int | None = None,
         source: str = "explicit",
+        *,
+        commit: bool = True,
     ) -> PairwiseComparison:
-        """Record a pairwise comparison and update ELO ratings."""
+        """
+        Record a pairwise comparison and update ELO ratings.
+
+        The comparison is inserted first, which takes SQLite's write lock, so
+        the ratings read afterwards are the latest ones and no other writer
+        can change them before this transaction commits. Ratings and counters
+        are then changed with SQL-side increments under `model_locks`.
+
+        Pass `commit=False` to add more writes to the same transaction; the
+        caller must then hold `model_locks` for every model involved from
+        before its first write until it commits.
+        """
+        # It's a tie if there is no winner - get model names from translations
+        tie_models = None
+        if not winner_model and translation_a_id and translation_b_id:
+            t_a = self.session.get(Translation, translation_a_id)
+            t_b = self.session.get(Translation, translation_b_id)
+            if t_a and t_b:
+                tie_models = (t_a.model, t_b.model)
+
         comparison = PairwiseComparison(
             query_id=query_id,
             user_id=user_id,
@@ -99,20 +218,162 @@ class ELOService:
             translation_b_id=translation_b_id,
             source=source,
         )
-        self.session.add(comparison)
-
-        # Update ELO based on result
-        if winner_model and loser_model:
-            self.update_ratings(winner_model, loser_model)
-        elif translation_a_id and translation_b_id and not winner_model:
-            # It's a tie - get model names from translations
-            t_a = self.session.query(Translation).get(translation_a_id)
-            t_b = self.session.query(Translation).get(translation_b_id)
-            if t_a and t_b:
-                self.record_tie(t_a.model, t_b.model)
+        models = [m for m in (winner_model, loser_model) if m] + list(tie_models or ())
+        try:
+            with model_locks(models):
+                self.session.add(comparison)
+                self.session.flush()
+                if source == "explicit":
+                    CounterRepository(self.session).record_explicit_comparisons(user_id)
+
+                # Update ELO based on result
+                if winner_model and loser_model:
+                    self.update_ratings(winner_model, loser_model, commit=False)
+                elif tie_models:
+                    self.record_tie(*tie_models, commit=False)
+
+                if commit:
+                    self.session.commit()
+        except Exception:
+            if commit:
+                self.session.rollback()
+            raise
 
         return comparison
 
+    def record_comparisons(
+        self,
+        rows: list[dict],
+        translation_models: dict[int, str] | None = None,
+        *,
+        commit: bool = True,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> None:
+        """
+        Record many comparisons with a constant number of statements.
+
+        Equivalent to calling `record_comparison` for each row in order: the
+        comparisons are bulk-inserted first (taking SQLite's write lock), the
+        ratings are read once, every update is applied in memory with the
+        same arithmetic, and each model is written back once, with its
+        counters as SQL-side increments.
+
+        Args:
+            rows: `PairwiseComparison` column values, one dict per comparison.
+            translation_models: Model of each translation, used to resolve
+                ties; translations missing from it are loaded.
+            commit: See `record_comparison`.
+            progress: Called as (comparisons_inserted, comparisons_total)
+                after every inserted batch.
+        """
+        if not rows:
+            return
+        translation_models = dict(translation_models or {})
+        missing = {
+            translation_id
+            for row in rows
+            if not row.get("winner_model")
+            for translation_id in (row["translation_a_id"], row["translation_b_id"])
+            if translation_id and translation_id not in translation_models
+        }
+        if missing:
+            translation_models.update(
+                self.session.query(Translation.id, Translation.model)
+                .filter(Translation.id.in_(missing))
+                .all()
+            )
+
+        # The same rules as record_comparison: (is_win, model_a, model_b)
+        outcomes = []
+        for row in rows:
+            if row.get("winner_model") and row.get("loser_model"):
+                outcomes.append((True, row["winner_model"], row["loser_model"]))
+            elif not row.get("winner_model"):
+                model_a = translation_models.get(row.get("translation_a_id"))
+                model_b = translation_models.get(row.get("translation_b_id"))
+                if model_a and model_b:
+                    outcomes.append((False, model_a, model_b))
+
+        models = {
+            model for _, model_a, model_b in outcomes for model in (model_a, model_b)
+        }
+        try:
+            with model_locks(models):
+                for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                    batch = rows[start : start + INSERT_BATCH_SIZE]
+                    self.session.execute(PairwiseComparison.__table__.insert(), batch)
+                    if progress:
+                        progress(start + len(batch), len(rows))
+                self._count_explicit(rows)
+
+                if outcomes:
+                    self._apply_outcomes(outcomes)
+                if commit:
+                    self.session.commit()
+        except Exception:
+            if commit:
+                self.session.rollback()
+            raise
+
+    def _count_explicit(self, rows: list[dict]) -> None:
+        explicit: defaultdict[int, int] = defaultdict(int)
+        for row in rows:
+            if row.get("source") == "explicit":
+                explicit[row["user_id"]] += 1
+        counters = CounterRepository(self.session)
+        for user_id, count in explicit.items():
+            counters.record_explicit_comparisons(user_id, count)
+
+    def _apply_outcomes(self, outcomes: list[tuple[bool, str, str]]) -> None:
+        """Apply results in order in memory, then write each model once."""
+        initial = self._current_ratings(
+            list(
+                {
+                    model
+                    for _, model_a, model_b in outcomes
+                    for model in (model_a, model_b)
+                }
+            )
+        )
+        # [elo_rating, wins, losses, ties] for the changes of this batch
+        state = {model: [rating, 0, 0, 0] for model, rating in initial.items()}
+        for is_win, model_a, model_b in outcomes:
+            a, b = state[model_a], state[model_b]
+            delta_a, delta_b = elo_update(a[0], b[0], 1 if is_win else 0.5)
+            a[0] += delta_a
+            b[0] += delta_b
+            if is_win:
+                a[1] += 1
+                b[2] += 1
+            else:
+                a[3] += 1
+                b[3] += 1
+
+        # The write lock is held since the insert, so the final ratings can be
+        # stored as they are; counters are still incremented in SQL
+        table = ModelELO.__table__
+        self.session.execute(
+            update(table)
+            .where(table.c.model == bindparam("b_model"))
+            .values(
+                elo_rating=bindparam("b_rating"),
+                wins=func.coalesce(table.c.wins, 0) + bindparam("b_wins"),
+                losses=func.coalesce(table.c.losses, 0) + bindparam("b_losses"),
+                ties=func.coalesce(table.c.ties, 0) + bindparam("b_ties"),
+                updated_at=func.now(),
+            ),
+            [
+                {
+                    "b_model": model,
+                    "b_rating": rating,
+                    "b_wins": wins,
+                    "b_losses": losses,
+                    "b_ties": ties,
+                }
+                for model, (rating, wins, losses, ties) in state.items()
+            ],
+        )
+
     def get_all_rankings(self) -> list[dict]:
         """Get all models ranked by ELO rating."""
         records = (
@@ -131,7 +392,11 @@ class ELOService:
             for r in records
         ]
 
-    def derive_from_existing_votes(self, user_id: int | None = None) -> int:
+    def derive_from_existing_votes(
+        self,
+        user_id: int | None = None,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> int:
         """
         Derive pairwise comparisons from existing star rating votes.
 
@@ -140,77 +405,94 @@ class ELOService:
         2. For each pair of votes on the same query, compares ratings
         3. Records winner/loser based on rating difference
 
+        Runs in bulk: the already derived pairs and every vote with its
+        translation's model are loaded up front, and the new comparisons go
+        through `record_comparisons` in a single transaction. Pairs that were
+        derived before are skipped, so it is safe to re-run.
+
+        Args:
+            user_id: Only derive comparisons from this user's votes.
+            progress: Called as (comparisons_inserted, comparisons_total) after
+                every inserted batch.
+
         Returns the number of comparisons derived.
         """
-        # Get all votes grouped by query
-        votes = self.session.query(Vote).all()
+        existing_filter = PairwiseComparison.source == "derived"
+        vote_query = (
+            select(
+                Vote.query_id,
+                Vote.user_id,
+                Vote.translation_id,
+                Vote.rating,
+                Translation.model,
+            )
+            .outerjoin(Translation, Translation.id == Vote.translation_id)
+            .order_by(Vote.id)
+        )
+        if user_id is not None:
+            existing_filter &= PairwiseComparison.user_id == user_id
+            vote_query = vote_query.where(Vote.user_id == user_id)
+
+        existing_pairs = set(
+            self.session.execute(
+                select(
+                    PairwiseComparison.query_id,
+                    PairwiseComparison.user_id,
+                    PairwiseComparison.translation_a_id,
+                    PairwiseComparison.translation_b_id,
+                ).where(existing_filter)
+            ).tuples()
+        )
 
         # Group by (query_id, user_id)
-        vote_groups: dict[tuple[int, int], list[Vote]] = {}
-        for vote in votes:
-            key = (int(vote.query_id), int(vote.user_id))
-            if key not in vote_groups:
-                vote_groups[key] = []
-            vote_groups[key].append(vote)
-
-        comparisons_created = 0
-
+        vote_groups: dict[tuple[int, int], list] = defaultdict(list)
+        for query_id, uid, translation_id, rating, model in self.session.execute(
+            vote_query
+        ):
+            vote_groups[(query_id, uid)].append((translation_id, rating, model))
+
+        rows: list[dict] = []
+        translation_models: dict[int, str] = {}
         for (query_id, uid), group_votes in vote_groups.items():
-            if len(group_votes) < 2:
-                continue
-
-            # Check if we should filter by user_id
-            if user_id is not None and uid != user_id:
-                continue
-
             # Create pairwise comparisons for all pairs
-            for v1, v2 in combinations(group_votes, 2):
-                if v1.rating is None or v2.rating is None:
+            for (t1_id, r1, model1), (t2_id, r2, model2) in combinations(
+                group_votes, 2
+            ):
+                if r1 is None or r2 is None:
                     continue
-
-                # Check if this comparison already exists
-                existing = (
-                    self.session.query(PairwiseComparison)
-                    .filter(
-                        PairwiseComparison.query_id == query_id,
-                        PairwiseComparison.user_id == uid,
-                        PairwiseComparison.translation_a_id == v1.translation_id,
-                        PairwiseComparison.translation_b_id == v2.translation_id,
-                        PairwiseComparison.source == "derived",
-                    )
-                    .first()
-                )
-                if existing:
-                    continue
-
-                # Get model names from translations
-                t1 = self.session.query(Translation).get(v1.translation_id)
-                t2 = self.session.query(Translation).get(v2.translation_id)
-                if not t1 or not t2:
+                key = (query_id, uid, t1_id, t2_id)
+                if key in existing_pairs or not model1 or not model2:
                     continue
+                existing_pairs.add(key)
+                translation_models[t1_id] = model1
+                translation_models[t2_id] = model2
 
                 winner_model = None
                 loser_model = None
-
-                if v1.rating > v2.rating:
-                    winner_model = t1.model
-                    loser_model = t2.model
-                elif v2.rating > v1.rating:
-                    winner_model = t2.model
-                    loser_model = t1.model
+                if r1 > r2:
+                    winner_model, loser_model = model1, model2
+                elif r2 > r1:
+                    winner_model, loser_model = model2, model1
                 # Equal ratings = tie (winner_model and loser_model stay None)
 
-                self.record_comparison(
-                    query_id=query_id,
-                    user_id=uid,
-                    winner_model=winner_model,
-                    loser_model=loser_model,
-                    translation_a_id=v1.translation_id,
-                    translation_b_id=v2.translation_id,
-                    source="derived",
+                rows.append(
+                    {
+                        "query_id": query_id,
+                        "user_id": uid,
+                        "winner_model": winner_model,
+                        "loser_model": loser_model,
+                        "translation_a_id": t1_id,
+                        "translation_b_id": t2_id,
+                        "source": "derived",
+                    }
                 )
-                comparisons_created += 1
 
+        comparisons_created = len(rows)
+        if not rows:
+            logger.info("No new pairwise comparisons to derive from votes")
+            return 0
+
+        self.record_comparisons(rows, translation_models, progress=progress)
         logger.info(f"Derived {comparisons_created} pairwise comparisons from votes")
         return comparisons_created
 
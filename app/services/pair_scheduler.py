@@ -0,0 +1,437 @@
+"""In-memory scheduler for Quick Compare pairs.
+
+Keeps, per user, the translation pairs they have not compared yet, bucketed
+by model pair. Picking the next pair ranks the non-empty buckets with the
+configured `PAIR_SELECTION_STRATEGY` (see `pair_selection`) and samples from
+the best ones, so its cost depends on the number of model pairs, not on the
+number of queries or translations.
+
+Pairs handed out in a batch are leased to the user for `LEASE_SECONDS`, so a
+client that prefetches several pairs and refills its queue in the background
+never gets a pair it already holds. Leases are kept per process.
+
+The index is built once per process and kept current incrementally: new
+translations and comparisons are read by id range since the last sync, so
+pairs added or compared through other workers are picked up too. A user's
+index is built outside the scheduler lock from a snapshot of the translations
+and then caught up, so building it does not hold up other users.
+"""
+
+import logging
+import random
+import threading
+import time
+from array import array
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import cast
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import get_config
+from app.database import db_session
+from app.models import PairwiseComparison, Translation
+from app.services.pair_selection import (
+    PairScorer,
+    get_pair_scorer,
+    load_beliefs,
+)
+
+config = get_config()
+
+logger = logging.getLogger(__name__)
+
+# Sample among this many of the best-scoring model pairs
+TOP_BUCKETS = 5
+
+# How long a prefetched pair is withheld from the same user's later batches
+LEASE_SECONDS = 300
+
+# Random draws from a bucket before scanning it for a pair that is not leased
+DRAW_ATTEMPTS = 8
+
+# Per-user indexes kept in memory; the least recently used are dropped
+MAX_USERS = 256
+
+_PAIR_SHIFT = 32
+_PAIR_MASK = (1 << _PAIR_SHIFT) - 1
+
+
+def _encode(translation_a: int, translation_b: int) -> int:
+    """Order-independent key of a translation pair."""
+    low, high = sorted((translation_a, translation_b))
+    return (low << _PAIR_SHIFT) | high
+
+
+def _decode(pair: int) -> tuple[int, int]:
+    return pair >> _PAIR_SHIFT, pair & _PAIR_MASK
+
+
+@dataclass
+class _UserIndex:
+    """Uncompared pairs of one user, bucketed by (model_a, model_b)."""
+
+    # Compared pairs are removed lazily, when they are drawn
+    buckets: dict[tuple[str, str], array] = field(
+        default_factory=lambda: defaultdict(lambda: array("q"))
+    )
+    compared: set[int] = field(default_factory=set)
+    # Pair -> lease expiry (time.monotonic())
+    leases: dict[int, float] = field(default_factory=dict)
+
+
+class PairScheduler:
+    """Per-user indexes of uncompared translation pairs."""
+
+    def __init__(self, scorer: PairScorer | None = None):
+        self._scorer = scorer or get_pair_scorer(config.PAIR_SELECTION_STRATEGY)
+        self._lock = threading.Lock()
+        # Translations of every query as (translation_id, model)
+        self._queries: dict[int, list[tuple[int, str]]] = defaultdict(list)
+        self._last_translation_id = 0
+        self._last_comparison_id = 0
+        self._users: OrderedDict[int, _UserIndex] = OrderedDict()
+        # One build at a time per user; other users are not blocked
+        self._build_locks: dict[int, threading.Lock] = {}
+
+    def next_pair(
+        self,
+        user_id: int,
+        target_models: set[str] | None = None,
+        session: Session | None = None,
+    ) -> tuple[int, int] | None:
+        """
+        Pick the best-scoring uncompared pair for a user.
+
+        Pairs leased to the user are skipped, but the returned pair is not
+        leased itself.
+
+        Returns:
+            Two translation IDs in random order, or None if the user has
+            compared every eligible pair.
+        """
+        pairs = self.next_pairs(user_id, 1, target_models, session, lease=False)
+        return pairs[0] if pairs else None
+
+    def next_pairs(
+        self,
+        user_id: int,
+        count: int,
+        target_models: set[str] | None = None,
+        session: Session | None = None,
+        *,
+        lease: bool = True,
+    ) -> list[tuple[int, int]]:
+        """
+        Pick up to `count` distinct uncompared pairs, best-scoring model pairs first.
+
+        With `target_models`, only pairs involving at least one of them are
+        considered. Each pick samples among the `TOP_BUCKETS` best-scoring
+        model pairs that still have an eligible pair. Pairs already leased to the
+        user are skipped, and with `lease` the returned ones are leased.
+
+        Returns:
+            Pairs of translation IDs, each in random order; fewer than
+            `count` (possibly none) when the user is running out of pairs.
+        """
+        session = session or cast(Session, db_session)
+        score_pair = self._scorer(load_beliefs(session))
+
+        while True:
+            index = self._user_index(user_id, session)
+            with self._lock:
+                self._sync(session)
+                if self._users.get(user_id) is index:
+                    return self._pick(index, count, target_models, score_pair, lease)
+            # Evicted by other users' builds in the meantime; build it again
+
+    def _pick(
+        self,
+        index: _UserIndex,
+        count: int,
+        target_models: set[str] | None,
+        score_pair: Callable[[str, str], float],
+        lease: bool,
+    ) -> list[tuple[int, int]]:
+        """Pick pairs from a synced user index; call with `self._lock` held."""
+        now = time.monotonic()
+        index.leases = {
+            pair: expiry
+            for pair, expiry in index.leases.items()
+            if expiry > now and pair not in index.compared
+        }
+        excluded = set(index.leases)
+
+        def score(bucket: tuple[str, str]) -> float:
+            return score_pair(*bucket)
+
+        candidates = sorted(
+            (
+                bucket
+                for bucket, pairs in index.buckets.items()
+                if pairs
+                and (
+                    not target_models
+                    or bucket[0] in target_models
+                    or bucket[1] in target_models
+                )
+            ),
+            key=score,
+            reverse=True,
+        )
+        picked = []
+        while candidates and len(picked) < count:
+            top = candidates[:TOP_BUCKETS]
+            bucket = random.choice(top)
+            pair = self._draw(index, bucket, excluded)
+            if pair is None:
+                # Only compared or leased pairs were left in this bucket
+                candidates.remove(bucket)
+                continue
+            excluded.add(pair)
+            if lease:
+                index.leases[pair] = now + LEASE_SECONDS
+            translation_a, translation_b = _decode(pair)
+            if random.random() < 0.5:
+                translation_a, translation_b = translation_b, translation_a
+            picked.append((translation_a, translation_b))
+        return picked
+
+    def release_leases(self, user_id: int) -> bool:
+        """
+        Make every pair leased to the user available again.
+
+        Returns:
+            Whether any unexpired lease was released.
+        """
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is None:
+                return False
+            now = time.monotonic()
+            held = any(expiry > now for expiry in index.leases.values())
+            index.leases.clear()
+            return held
+
+    def record_comparison(
+        self, user_id: int, translation_a: int, translation_b: int
+    ) -> None:
+        """Remove a pair the user has just compared."""
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is not None:
+                pair = _encode(translation_a, translation_b)
+                index.compared.add(pair)
+                index.leases.pop(pair, None)
+
+    def discard(self, user_id: int, translation_a: int, translation_b: int) -> None:
+        """Stop offering a pair, e.g. because a translation was deleted."""
+        self.record_comparison(user_id, translation_a, translation_b)
+
+    @staticmethod
+    def _draw(
+        index: _UserIndex, bucket: tuple[str, str], excluded: set[int]
+    ) -> int | None:
+        """
+        Pick a random uncompared pair from a bucket that is not in `excluded`.
+
+        The pair stays in the bucket until it is compared, so skipped pairs
+        can come up again.
+        """
+        pairs = index.buckets[bucket]
+        for _ in range(DRAW_ATTEMPTS):
+            if not pairs:
+                return None
+            i = random.randrange(len(pairs))
+            pair = pairs[i]
+            if pair in index.compared:
+                # Swap-remove: order within a bucket does not matter
+                pairs[i] = pairs[-1]
+                pairs.pop()
+            elif pair not in excluded:
+                return pair
+        # Mostly compared or leased: fall back to scanning the bucket
+        for pair in pairs:
+            if pair not in index.compared and pair not in excluded:
+                return pair
+        return None
+
+    def _cached_index(self, user_id: int) -> _UserIndex | None:
+        """The user's built index, marked recently used; call with the lock held."""
+        index = self._users.get(user_id)
+        if index is not None:
+            self._users.move_to_end(user_id)
+        return index
+
+    def _catch_up(
+        self,
+        index: _UserIndex,
+        user_id: int,
+        translation_mark: int,
+        comparison_mark: int,
+        session: Session,
+    ) -> None:
+        """
+        Bring an index built from a snapshot up to the last sync.
+
+        Call with the lock held, right after `_sync`. Comparisons come first,
+        so pairs of new translations the user already compared are skipped.
+        """
+        _load_compared(index, user_id, session, comparison_mark)
+        if self._last_translation_id <= translation_mark:
+            return
+        rows = session.execute(
+            select(Translation.id, Translation.query_id, Translation.model).where(
+                Translation.id > translation_mark,
+                Translation.id <= self._last_translation_id,
+            )
+        ).all()
+        for translation_id, query_id, model in rows:
+            for other_id, other_model in self._queries[query_id]:
+                # Pairs are added by their newer translation only
+                if other_id < translation_id:
+                    _add_pair(index, translation_id, model, other_id, other_model)
+
+    def _sync(self, session: Session) -> None:
+        """Catch up on translations and comparisons created since the last sync."""
+        rows = session.execute(
+            select(Translation.id, Translation.query_id, Translation.model)
+            .where(Translation.id > self._last_translation_id)
+            .order_by(Translation.id)
+        ).all()
+        for translation_id, query_id, model in rows:
+            siblings = self._queries[query_id]
+            for index in self._users.values():
+                for other_id, other_model in siblings:
+                    _add_pair(index, translation_id, model, other_id, other_model)
+            siblings.append((translation_id, model))
+            self._last_translation_id = translation_id
+
+        # Comparisons from any worker, read by primary key range; indexes
+        # built later load their user's history in full
+        last_id = session.scalar(select(func.max(PairwiseComparison.id))) or 0
+        if self._users and last_id > self._last_comparison_id:
+            rows = session.execute(
+                select(
+                    PairwiseComparison.user_id,
+                    PairwiseComparison.translation_a_id,
+                    PairwiseComparison.translation_b_id,
+                ).where(
+                    PairwiseComparison.id > self._last_comparison_id,
+                    PairwiseComparison.id <= last_id,
+                    PairwiseComparison.source == "explicit",
+                )
+            ).all()
+            for user_id, translation_a, translation_b in rows:
+                index = self._users.get(user_id)
+                if index is not None and translation_a and translation_b:
+                    index.compared.add(_encode(translation_a, translation_b))
+        self._last_comparison_id = last_id
+
+    def _user_index(self, user_id: int, session: Session) -> _UserIndex:
+        """
+        Return the user's index, building it on first use.
+
+        Call without `self._lock` held. The build walks every translation
+        pair, so it works on a snapshot of the translations taken under the
+        lock and runs outside it; the new index then catches up on whatever
+        was synced meanwhile before it is published.
+        """
+        with self._lock:
+            index = self._cached_index(user_id)
+            if index is not None:
+                return index
+            build_lock = self._build_locks.setdefault(user_id, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                # Built by a concurrent request while this one waited
+                index = self._cached_index(user_id)
+                if index is not None:
+                    return index
+                self._sync(session)
+                translation_mark = self._last_translation_id
+                # Lists are append-only and id-ordered, so later appends
+                # are told apart by id
+                queries = list(self._queries.values())
+
+            index = _UserIndex()
+            comparison_mark = _load_compared(index, user_id, session, 0)
+            for siblings in queries:
+                siblings = [s for s in siblings[:] if s[0] <= translation_mark]
+                for i, (translation_a, model_a) in enumerate(siblings):
+                    for translation_b, model_b in siblings[i + 1 :]:
+                        _add_pair(index, translation_a, model_a, translation_b, model_b)
+
+            with self._lock:
+                self._sync(session)
+                self._catch_up(
+                    index, user_id, translation_mark, comparison_mark, session
+                )
+                self._users[user_id] = index
+                while len(self._users) > MAX_USERS:
+                    self._users.popitem(last=False)
+                self._build_locks.pop(user_id, None)
+        logger.info(
+            f"Built compare pair index for user {user_id}: "
+            f"{sum(len(p) for p in index.buckets.values())} pairs"
+        )
+        return index
+
+
+def _load_compared(
+    index: _UserIndex, user_id: int, session: Session, after_id: int
+) -> int:
+    """
+    Mark the user's explicit comparisons with ids above `after_id` as compared.
+
+    Returns:
+        The highest comparison id loaded, or `after_id` if there were none.
+    """
+    rows = session.execute(
+        select(
+            PairwiseComparison.id,
+            PairwiseComparison.translation_a_id,
+            PairwiseComparison.translation_b_id,
+        ).where(
+            PairwiseComparison.user_id == user_id,
+            PairwiseComparison.source == "explicit",
+            PairwiseComparison.id > after_id,
+        )
+    )
+    last_id = after_id
+    for comparison_id, translation_a, translation_b in rows:
+        last_id = max(last_id, comparison_id)
+        if translation_a and translation_b:
+            index.compared.add(_encode(translation_a, translation_b))
+    return last_id
+
+
+def _add_pair(
+    index: _UserIndex,
+    translation_a: int,
+    model_a: str,
+    translation_b: int,
+    model_b: str,
+) -> None:
+    pair = _encode(translation_a, translation_b)
+    if pair in index.compared:
+        return
+    bucket = (model_a, model_b) if model_a <= model_b else (model_b, model_a)
+    index.buckets[bucket].append(pair)
+
+
+_scheduler: PairScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_pair_scheduler() -> PairScheduler:
+    """Return the process-wide pair scheduler."""
+    global _scheduler  # noqa: PLW0603
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = PairScheduler()
+    return _scheduler
@@ -1,18 +1,35 @@
 import datetime
 import math
+import statistics
 from collections import defaultdict
 from typing import cast
 
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 
+from app.cache import TTLCache
 from app.config import get_config
 from app.database import db_session
-from app.models import ModelELO
+from app.models import ModelELO, ModelStats, Translation, Vote
+from app.repositories.model_stats_repository import (
+    COUNTER_FIELDS,
+    ModelStatsRepository,
+)
 from app.repositories.translation_repository import TranslationRepository
-from app.repositories.vote_repository import VoteRepository
+from app.repositories.upstream_call_repository import (
+    TIMEOUT_ERRORS,
+    UpstreamCallRepository,
+)
 
 config = get_config()
 
+# Window of the upstream latency table on the stats page
+UPSTREAM_STATS_DAYS = 30
+
+_usage_cache = TTLCache("model_usage", ttl=config.MODEL_USAGE_CACHE_TTL)
+_latency_cache = TTLCache("model_latency", ttl=config.MODEL_USAGE_CACHE_TTL)
+_upstream_cache = TTLCache("upstream_latency", ttl=config.UPSTREAM_STATS_CACHE_TTL)
+
 
 def calculate_model_scores():
     """
@@ -20,60 +37,17 @@ def calculate_model_scores():
     Now includes ELO ratings from pairwise comparisons.
     """
     session = cast(Session, db_session)
-    vote_repo = VoteRepository(session)
-    translation_repo = TranslationRepository(session)
 
-    votes = vote_repo.get_all()
-    translations = translation_repo.get_all()
+    # One pre-aggregated row per model, maintained as translations and votes
+    # are written (see ModelStatsRepository)
+    model_stats = {
+        row.model: {field: getattr(row, field) for field in COUNTER_FIELDS}
+        for row in ModelStatsRepository(session).get_all()
+    }
 
     # Get ELO ratings for all models
     elo_records = {r.model: r for r in session.query(ModelELO).all()}
 
-    model_stats = {}
-
-    # Initialize all models from the translations table to capture costs
-    # even for models that haven't received votes yet.
-    for t in translations:
-        if t.model not in model_stats:
-            model_stats[t.model] = {
-                "score": 0,
-                "total_cost": 0.0,
-                "appearances": 0,  # Total times generated
-                "votes_cast": 0,
-                "excellent_count": 0,
-                "good_count": 0,
-                "okay_count": 0,
-                "rejected_count": 0,
-                "source_word_count": 0,
-            }
-
-    # Aggregate total cost and the number of times each model's translation was generated
-    for t in translations:
-        model_stats[t.model]["appearances"] += 1
-        model_stats[t.model]["total_cost"] += t.cost if t.cost else 0.0
-        if t.query and t.query.source_text:
-            model_stats[t.model]["source_word_count"] += len(
-                t.query.source_text.split()
-            )
-
-    # Aggregate scores based on votes
-    for vote in votes:
-        model_name = vote.translation.model
-        if model_name in model_stats:
-            model_stats[model_name]["votes_cast"] += 1
-
-            if vote.rating == 3:
-                model_stats[model_name]["score"] += 3
-                model_stats[model_name]["excellent_count"] += 1
-            elif vote.rating == 2:
-                model_stats[model_name]["score"] += 1
-                model_stats[model_name]["good_count"] += 1
-            elif vote.rating == 1:
-                model_stats[model_name]["okay_count"] += 1
-            elif vote.rating == -1:
-                model_stats[model_name]["score"] -= 2
-                model_stats[model_name]["rejected_count"] += 1
-
     # Calculate derived metrics and format for the view
     stats_list = []
     for model_name, stats in model_stats.items():
@@ -201,43 +175,115 @@ def calculate_model_scores():
 def get_model_usage_stats() -> dict[str, int]:
     """
     Returns a dictionary mapping model names to their usage count (appearances).
+
+    Read from the `model_stats` rollup and cached for `MODEL_USAGE_CACHE_TTL`
+    seconds; storing a translation invalidates this process's copy.
     """
-    stats = calculate_model_scores()
-    return {item["model_name"]: item["appearances"] for item in stats}
+    return _usage_cache.get_or_set("usage", _load_model_usage)
 
 
-def calculate_global_stats():
+def invalidate_model_usage_stats() -> None:
+    """Drop the cached usage counts after a translation is stored."""
+    _usage_cache.invalidate()
+
+
+def _load_model_usage() -> dict[str, int]:
+    session = cast(Session, db_session)
+    return dict(session.query(ModelStats.model, ModelStats.appearances).all())
+
+
+def get_model_latency_stats() -> dict[str, float]:
     """
-    Calculates global statistics for the dashboard.
+    Returns a dictionary mapping active models to their estimated generation time.
+
+    The estimate is the median latency of the model's last
+    `MODEL_LATENCY_WINDOW` upstream calls, in milliseconds. Failed calls
+    count too, and timeouts count as at least the model's `timeout`, so a
+    preset that keeps timing out is slow rather than unknown. Models without
+    upstream telemetry fall back to their timed translations; models with
+    neither are left out. Cached for `MODEL_USAGE_CACHE_TTL` seconds.
     """
+    return _latency_cache.get_or_set("latency", _load_model_latency)
+
+
+def _load_model_latency() -> dict[str, float]:
     session = cast(Session, db_session)
-    vote_repo = VoteRepository(session)
-    translation_repo = TranslationRepository(session)
+    active = {
+        key: model
+        for key, model in config.MODELS.items()
+        if model.get("is_active", True)
+    }
+    since = datetime.datetime.now(datetime.UTC).replace(
+        tzinfo=None
+    ) - datetime.timedelta(days=UPSTREAM_STATS_DAYS)
+    calls = UpstreamCallRepository(session).get_recent_latencies(
+        active, since, config.MODEL_LATENCY_WINDOW
+    )
+
+    samples: dict[str, list[float]] = {}
+    for model, rows in calls.items():
+        timeout_ms = active[model].get("timeout", 90.0) * 1000
+        samples[model] = [
+            max(latency_ms, timeout_ms) if error in TIMEOUT_ERRORS else latency_ms
+            for latency_ms, error in rows
+        ]
+    untracked = active.keys() - calls.keys()
+    if untracked:
+        samples.update(
+            TranslationRepository(session).get_recent_generation_ms(
+                untracked, config.MODEL_LATENCY_WINDOW
+            )
+        )
+    return {model: statistics.median(values) for model, values in samples.items()}
 
-    translations = translation_repo.get_all()
-    votes = vote_repo.get_all()
 
-    total_cost = 0.0
-    total_generations = len(translations)
-    voted_generations = len({v.translation_id for v in votes})
+def calculate_global_stats():
+    """
+    Calculates global statistics for the dashboard.
+    """
+    session = cast(Session, db_session)
 
     # Cost over time (Current Month and Current Day)
     now = datetime.datetime.now()
-    current_month_cost = 0.0
-    current_day_cost = 0.0
-
-    for t in translations:
-        cost = t.cost if t.cost else 0.0
-        total_cost += cost
-
-        if (
-            t.created_at
-            and t.created_at.year == now.year
-            and t.created_at.month == now.month
-        ):
-            current_month_cost += cost
-            if t.created_at.day == now.day:
-                current_day_cost += cost
+    day_start = datetime.datetime(now.year, now.month, now.day)
+    month_start = datetime.datetime(now.year, now.month, 1)
+    next_month = (month_start + datetime.timedelta(days=32)).replace(day=1)
+    next_day = day_start + datetime.timedelta(days=1)
+
+    cost = func.coalesce(Translation.cost, 0.0)
+    total_cost, total_generations, current_month_cost, current_day_cost = session.query(
+        func.coalesce(func.sum(cost), 0.0),
+        func.count(Translation.id),
+        func.coalesce(
+            func.sum(
+                case(
+                    (
+                        (Translation.created_at >= month_start)
+                        & (Translation.created_at < next_month),
+                        cost,
+                    ),
+                    else_=0.0,
+                )
+            ),
+            0.0,
+        ),
+        func.coalesce(
+            func.sum(
+                case(
+                    (
+                        (Translation.created_at >= day_start)
+                        & (Translation.created_at < next_day),
+                        cost,
+                    ),
+                    else_=0.0,
+                )
+            ),
+            0.0,
+        ),
+    ).one()
+    voted_generations = (
+        session.query(func.count(func.distinct(Vote.translation_id))).scalar() or 0
+    )
 
     return {
         "total_cost": total_cost,
@@ -256,8 +302,6 @@ def get_monthly_spending_stats():
     Returns monthly spending data for the last 12 months.
     """
     session = cast(Session, db_session)
-    translation_repo = TranslationRepository(session)
-    translations = translation_repo.get_all()
 
     monthly_data = defaultdict(float)
     now = datetime.datetime.now()
@@ -268,10 +312,13 @@ def get_monthly_spending_stats():
         key = d.strftime("%Y-%m")
         monthly_data[key] = 0.0
 
-    for t in translations:
-        if t.created_at and t.cost:
-            key = t.created_at.strftime("%Y-%m")
-            monthly_data[key] += t.cost
+    month = func.strftime("%Y-%m", Translation.created_at)
+    for key, cost in (
+        session.query(month, func.sum(Translation.cost))
+        .filter(Translation.created_at.isnot(None), Translation.cost != 0)
+        .group_by(month)
+    ):
+        monthly_data[key] += cost
 
     # Sort by date
     sorted_months = sorted(monthly_data.keys())
@@ -286,13 +333,23 @@ def get_cost_breakdown():
     Returns cost statistics grouped by upstream model ID (combining configurations).
     """
     session = cast(Session, db_session)
-    translation_repo = TranslationRepository(session)
-    vote_repo = VoteRepository(session)
-
-    translations = translation_repo.get_all()
-    votes = vote_repo.get_all()
 
-    voted_translation_ids = {v.translation_id for v in votes}
+    # Per configured model key from the stats rollup; grouped by upstream
+    # model below
+    per_model = {
+        row.model: {
+            "total_cost": row.total_cost or 0.0,
+            "total_generations": row.appearances or 0,
+            "source_word_count": row.source_word_count or 0,
+        }
+        for row in ModelStatsRepository(session).get_all()
+    }
+    voted_per_model = dict(
+        session.query(Translation.model, func.count(func.distinct(Vote.translation_id)))
+        .join(Translation, Vote.translation_id == Translation.id)
+        .group_by(Translation.model)
+        .all()
+    )
 
     grouped_stats = {}
 
@@ -314,8 +371,7 @@ def get_cost_breakdown():
         if b_name and u_name not in upstream_base_models:
             upstream_base_models[u_name] = b_name
 
-    for t in translations:
-        model_key = str(t.model)
+    for model_key, totals in per_model.items():
         # Fallback if model missing from config
         upstream_name = model_key
         display_name = model_key
@@ -339,13 +395,10 @@ def get_cost_breakdown():
             }
 
         stats = grouped_stats[upstream_name]
-        stats["total_cost"] += t.cost if t.cost else 0.0
-        stats["total_generations"] += 1
-        if t.id in voted_translation_ids:
-            stats["voted_generations"] += 1
-
-        if t.query and t.query.source_text:
-            stats["source_word_count"] += len(t.query.source_text.split())
+        stats["total_cost"] += totals["total_cost"]
+        stats["total_generations"] += totals["total_generations"]
+        stats["voted_generations"] += voted_per_model.get(model_key, 0)
+        stats["source_word_count"] += totals["source_word_count"]
 
     result = []
     for s in grouped_stats.values():
@@ -358,3 +411,35 @@ def get_cost_breakdown():
 
     result.sort(key=lambda x: x["total_cost"], reverse=True)
     return result
+
+
+def get_upstream_latency_stats():
+    """
+    Per-model upstream latency and error rates over the last `UPSTREAM_STATS_DAYS`.
+
+    Each row carries the model's configured `timeout`, so the p95 latency can
+    be compared with it when tuning `Config.MODELS`. Slowest models first.
+    Cached for `UPSTREAM_STATS_CACHE_TTL` seconds.
+    """
+    return _upstream_cache.get_or_set("upstream", _load_upstream_latency)
+
+
+def _load_upstream_latency():
+    session = cast(Session, db_session)
+    since = datetime.datetime.now(datetime.UTC).replace(
+        tzinfo=None
+    ) - datetime.timedelta(days=UPSTREAM_STATS_DAYS)
+    stats = UpstreamCallRepository(session).stats_by_model(since)
+
+    result = []
+    for model, row in stats.items():
+        model_config = config.MODELS.get(model, {})
+        result.append(
+            {
+                **row,
+                "display_name": model_config.get("display_name", model),
+                "timeout_s": model_config.get("timeout", 90.0),
+            }
+        )
+    result.sort(key=lambda r: r["p95_latency_ms"] or 0, reverse=True)
+    return result
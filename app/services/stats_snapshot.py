@@ -0,0 +1,217 @@
+"""Versioned snapshots of the stats page data.
+
+The leaderboard, global stats, monthly spending, cost breakdown and the
+optional Bradley-Terry ratings are computed together once per data version,
+kept in memory and written to a JSON file so other workers and restarts can
+reuse them. When the data changes, readers keep getting the previous
+snapshot while one background thread per process rebuilds it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, cast
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import get_config
+from app.database import db_session
+from app.models import (
+    ModelELO,
+    ModelStats,
+    PairwiseComparison,
+    Translation,
+    Vote,
+)
+from app.services.bradley_terry import compute_bradley_terry
+from app.services.stats_service import (
+    calculate_global_stats,
+    calculate_model_scores,
+    get_cost_breakdown,
+    get_monthly_spending_stats,
+)
+
+config = get_config()
+
+logger = logging.getLogger(__name__)
+
+# Display names, presets and flags come from the config, so a config change
+# invalidates snapshots even when the data does not
+_CONFIG_FINGERPRINT = hashlib.sha256(
+    json.dumps(
+        [config.MODELS, config.BRADLEY_TERRY_ENABLED], sort_keys=True, default=str
+    ).encode("utf-8")
+).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    """The stats page data for one data version."""
+
+    version: str
+    built_at: float
+    data: dict[str, Any]
+
+
+def get_data_version() -> str:
+    """
+    Cheap fingerprint of everything the stats page depends on.
+
+    New votes, comparisons and translations raise the max ids; vote rating
+    changes bump `model_stats.revision`; the `model_elo` rows (one per model)
+    are hashed, so ratings rewritten outside the write path count too
+    (`flask recompute-elo`, `scripts/rename_model.py`); the date covers the
+    "today" and "this month" costs. Upstream call telemetry is left out: it
+    lands every few seconds and has its own cache.
+    """
+    session = cast(Session, db_session)
+    row = session.execute(
+        select(
+            select(func.max(Vote.id)).scalar_subquery(),
+            select(func.max(PairwiseComparison.id)).scalar_subquery(),
+            select(func.max(Translation.id)).scalar_subquery(),
+            select(func.sum(ModelStats.revision)).scalar_subquery(),
+        )
+    ).one()
+    parts = [str(value or 0) for value in row]
+    elo = session.execute(
+        select(
+            ModelELO.model,
+            ModelELO.elo_rating,
+            ModelELO.wins,
+            ModelELO.losses,
+            ModelELO.ties,
+        ).order_by(ModelELO.model)
+    ).all()
+    elo_hash = hashlib.sha256(repr(elo).encode("utf-8")).hexdigest()[:12]
+    return "-".join([*parts, elo_hash, date.today().isoformat(), _CONFIG_FINGERPRINT])
+
+
+def build_snapshot_data() -> dict[str, Any]:
+    """Run the stats calculations, including the optional Bradley-Terry fit."""
+    bradley_terry = None
+    if config.BRADLEY_TERRY_ENABLED:
+        bradley_terry = [asdict(r) for r in compute_bradley_terry()]
+    return {
+        "model_scores": calculate_model_scores(),
+        "global_stats": calculate_global_stats(),
+        "spending_stats": get_monthly_spending_stats(),
+        "cost_breakdown": get_cost_breakdown(),
+        "bradley_terry": bradley_terry,
+    }
+
+
+class StatsSnapshotEngine:
+    """Serves the latest stats snapshot and rebuilds it when data changes."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._snapshot: StatsSnapshot | None = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.builds = 0
+
+    def get(self) -> StatsSnapshot:
+        """
+        Return a snapshot, preferring the current data version.
+
+        Only the first request of a process with no snapshot on disk waits
+        for a build; otherwise a stale snapshot is returned while a
+        background refresh runs.
+        """
+        version = get_data_version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            # Another worker may already have written this version
+            on_disk = self._load()
+            if on_disk and (snapshot is None or on_disk.version == version):
+                self._snapshot = snapshot = on_disk
+
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._build(version)
+                return self._snapshot
+
+        if snapshot.version != version:
+            self._refresh_in_background(version)
+        return snapshot
+
+    def _refresh_in_background(self, version: str) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                with self._lock:
+                    on_disk = self._load()
+                    if on_disk and on_disk.version == version:
+                        self._snapshot = on_disk
+                    else:
+                        self._snapshot = self._build(version)
+            except Exception:
+                logger.exception("Stats snapshot refresh failed")
+            finally:
+                db_session.remove()
+                self._refreshing = False
+
+        threading.Thread(target=run, name="stats-snapshot", daemon=True).start()
+
+    def _build(self, version: str) -> StatsSnapshot:
+        start = time.perf_counter()
+        snapshot = StatsSnapshot(version, time.time(), build_snapshot_data())
+        self.builds += 1
+        self._save(snapshot)
+        logger.info(
+            f"Built stats snapshot {version} in {time.perf_counter() - start:.2f}s"
+        )
+        return snapshot
+
+    def _load(self) -> StatsSnapshot | None:
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+            return StatsSnapshot(raw["version"], raw["built_at"], raw["data"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            logger.warning(f"Ignoring unreadable stats snapshot at {self.path}")
+            return None
+
+    def _save(self, snapshot: StatsSnapshot) -> None:
+        # Write then rename, so other workers never read a partial file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "version": snapshot.version,
+                    "built_at": snapshot.built_at,
+                    "data": snapshot.data,
+                }
+            ),
+            encoding="utf-8",
+        )
+        tmp_path.replace(self.path)
+
+
+_engine: StatsSnapshotEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_stats_snapshot_engine() -> StatsSnapshotEngine:
+    """Return the process-wide snapshot engine."""
+    global _engine  # noqa: PLW0603
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = StatsSnapshotEngine(config.STATS_SNAPSHOT_PATH)
+    return _engine
@@ -0,0 +1,236 @@
+"""Asyncio fan-out engine for arena translation rounds.
+
+A single background event loop per process runs every upstream translation
+call as a coroutine. Request threads submit a round and consume its results
+from a queue, so a round of N models costs one request thread (the SSE
+response) instead of N blocked worker threads.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.config import get_config
+from app.services.translation_service import (
+    get_flight_stats,
+    get_translation_for_model_async,
+    resolve_query,
+)
+
+config = get_config()
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a round on the result queue
+_DONE = object()
+
+
+class _TrackedSemaphore(asyncio.Semaphore):
+    """Semaphore that counts its holders and waiters for the metrics."""
+
+    def __init__(self, value: int):
+        super().__init__(value)
+        self.active = 0
+        self.waiting = 0
+
+    async def acquire(self) -> bool:
+        self.waiting += 1
+        try:
+            await super().acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        super().release()
+
+
+class TranslationEngine:
+    """Runs translation fan-outs on a dedicated event loop thread."""
+
+    def __init__(self, max_concurrency: int, db_workers: int):
+        self.max_concurrency = max_concurrency
+        self._loop = asyncio.new_event_loop()
+        # Blocking DB work (asyncio.to_thread) runs on this bounded pool
+        self._db_executor = ThreadPoolExecutor(
+            max_workers=db_workers, thread_name_prefix="fanout-db"
+        )
+        self._loop.set_default_executor(self._db_executor)
+        self._semaphore: _TrackedSemaphore | None = None
+        self.rounds_active = 0
+        self._ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="translation-engine", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = _TrackedSemaphore(self.max_concurrency)
+        self._ready.set()
+        self._loop.run_forever()
+
+    def stats(self) -> dict[str, int]:
+        """Current load, read from any thread for the metrics."""
+        semaphore = self._semaphore
+        flights = get_flight_stats()
+        return {
+            "rounds_active": self.rounds_active,
+            "calls_active": semaphore.active if semaphore else 0,
+            "calls_waiting": semaphore.waiting if semaphore else 0,
+            # Work submitted to the pool but not yet picked up by a thread
+            "db_queue_depth": self._db_executor._work_queue.qsize(),
+            "flights_active": flights["in_flight"],
+            "flights_shared_total": flights["shared"],
+        }
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine on the engine loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def translate(
+        self,
+        source_text: str,
+        model: str,
+        position: int,
+        user_id: int | None = None,
+        query_id: int | None = None,
+    ) -> dict:
+        """Run a single translation on the engine and wait for its result."""
+        return self.submit(
+            get_translation_for_model_async(
+                source_text,
+                model,
+                position,
+                user_id,
+                self._semaphore,
+                query_id=query_id,
+            )
+        ).result()
+
+    def fan_out(
+        self,
+        source_text: str,
+        models: list[str],
+        user_id: int | None = None,
+        poll_interval: float = 2.0,
+        *,
+        stream_tokens: bool = False,
+        query_id: int | None = None,
+    ) -> Iterator[tuple[str, str, dict | Exception] | None]:
+        """
+        Translate `source_text` with every model concurrently.
+
+        Yields `("result", model, dict)` or `("error", model, exception)` as
+        each model finishes (models are numbered by their order in `models`),
+        and `None` whenever `poll_interval` passes without a result so the
+        caller can send keep-alives. With `stream_tokens`, partial output is
+        also yielded as `("delta", model, {"position", "model", "delta"})`;
+        deltas that pile up while the consumer is busy are merged.
+
+        The Query is resolved once, here, unless `query_id` is given, so the
+        models' workers never race to create it. Results are still stored if
+        the consumer stops iterating early.
+        """
+        if query_id is None:
+            query_id = resolve_query(source_text)
+        results: queue.Queue = queue.Queue()
+
+        async def run_one(position: int, model_key: str):
+            def on_delta(delta: str):
+                payload = {"position": position, "model": model_key, "delta": delta}
+                results.put(("delta", model_key, payload))
+
+            try:
+                result = await get_translation_for_model_async(
+                    source_text,
+                    model_key,
+                    position,
+                    user_id,
+                    self._semaphore,
+                    on_delta if stream_tokens else None,
+                    query_id,
+                )
+            except Exception as e:  # noqa: BLE001 - forwarded to the consumer
+                results.put(("error", model_key, e))
+            else:
+                results.put(("result", model_key, result))
+
+        async def run_round():
+            self.rounds_active += 1
+            try:
+                await asyncio.gather(*(run_one(i + 1, m) for i, m in enumerate(models)))
+            finally:
+                self.rounds_active -= 1
+                results.put(_DONE)
+
+        self.submit(run_round())
+
+        while True:
+            try:
+                batch = [results.get(timeout=poll_interval)]
+            except queue.Empty:
+                yield None
+                continue
+            # Drain whatever else is ready so bursts of deltas go out together
+            while True:
+                try:
+                    batch.append(results.get_nowait())
+                except queue.Empty:
+                    break
+            for item in _merge_deltas(batch):
+                if item is _DONE:
+                    return
+                yield item
+
+
+def _is_delta(item) -> bool:
+    return item is not _DONE and item[0] == "delta"
+
+
+def _merge_deltas(batch: list) -> list:
+    """Merge consecutive delta items for the same model, keeping order."""
+    merged = []
+    for item in batch:
+        if (
+            merged
+            and _is_delta(item)
+            and _is_delta(merged[-1])
+            and merged[-1][1] == item[1]
+        ):
+            merged[-1][2]["delta"] += item[2]["delta"]
+        else:
+            merged.append(item)
+    return merged
+
+
+_engine: TranslationEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_translation_engine() -> TranslationEngine:
+    """Return the process-wide engine, starting its loop on first use."""
+    global _engine  # noqa: PLW0603
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = TranslationEngine(
+                    config.TRANSLATION_MAX_CONCURRENCY, config.TRANSLATION_DB_WORKERS
+                )
+                logger.info(
+                    "Started translation engine "
+                    f"(max_concurrency={config.TRANSLATION_MAX_CONCURRENCY})"
+                )
+    return _engine
+
+
+def get_engine_stats() -> dict[str, int] | None:
+    """Load of the process-wide engine, or None if it has not started."""
+    engine = _engine
+    return engine.stats() if engine is not None else None
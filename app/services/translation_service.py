@@ -1,85 +1,270 @@
+import asyncio
 import hashlib
+import time
+from collections.abc import Callable
 
 from sqlalchemy.orm import Session
 
+from app.config import get_config
 from app.database import SessionFactory
 from app.llm_clients import get_translation_client
 from app.models import Query, Translation
+from app.repositories.counter_repository import CounterRepository
+from app.repositories.model_stats_repository import ModelStatsRepository
+from app.repositories.pending_translation_repository import (
+    PendingTranslationRepository,
+)
 from app.repositories.query_repository import QueryRepository
 from app.repositories.translation_repository import TranslationRepository
+from app.services.stats_service import invalidate_model_usage_stats
+from app.singleflight import SingleFlight
 
+config = get_config()
 
-def get_translation_for_model(
-    source_text: str, model: str, position: int, user_id: int | None = None
+# Concurrent requests for the same (query, model) in this process share a call
+_translation_flights = SingleFlight()
+
+# How often a worker waiting on another worker's claim re-checks the database
+PENDING_POLL_INTERVAL = 1.0
+
+
+def get_flight_stats() -> dict[str, int]:
+    """Single-flight counters of this process's translation calls."""
+    return {
+        "calls": _translation_flights.calls,
+        "shared": _translation_flights.shared,
+        "in_flight": _translation_flights.in_flight(),
+    }
+
+
+async def get_translation_for_model_async(
+    source_text: str,
+    model: str,
+    position: int,
+    user_id: int | None = None,
+    concurrency: asyncio.Semaphore | None = None,
+    on_delta: Callable[[str], None] | None = None,
+    query_id: int | None = None,
 ) -> dict:
     """
-    Retrieves or creates a translation for a given source text and model.
+    Retrieve or create a translation of a source text by a model.
 
-    This function first checks the database for an existing translation.
-    If found, it returns the cached translation. Otherwise, it calls the
-    external translation API, stores the new translation in the database,
-    and then returns it.
+    This is the only path that generates translations; the fan-out engine
+    calls it for every model of a round. Database work runs on the event
+    loop's default executor, so only the short lookups and inserts occupy a
+    thread; the upstream call itself is awaited. When `concurrency` is given,
+    it bounds how many upstream calls are in flight at once (cache hits never
+    wait for a slot). When `on_delta` is given, the upstream call is streamed
+    and each text delta is passed to it; cached translations produce no
+    deltas. Pass `query_id` when the Query has already been resolved for the
+    round.
 
-    A new database session is created and managed within this function to ensure
-    thread safety when handling concurrent translation requests.
+    Concurrent requests for the same (query, model) share one upstream call:
+    within this process through single-flight, and across workers through an
+    advisory `PendingTranslation` claim. Callers that join another call get
+    its final result without deltas.
+    """
+    if query_id is None:
+        query_id = await asyncio.to_thread(resolve_query, source_text)
+    cached = await asyncio.to_thread(find_cached_translation, query_id, model, position)
+    if cached:
+        return cached
 
-    Args:
-        source_text: The text to be translated.
-        model: The identifier for the translation model to use.
-        position: The display order for the translation in the UI.
-        user_id: The ID of the user requesting the translation (for cost tracking).
+    result, _shared = await _translation_flights.do(
+        (query_id, model),
+        lambda: _generate_translation_async(
+            source_text, query_id, model, position, user_id, concurrency, on_delta
+        ),
+    )
+    # Callers that joined a shared call keep their own display position
+    return {**result, "position": position}
 
-    Returns:
-        A dictionary containing the translation details.
+
+async def _generate_translation_async(
+    source_text: str,
+    query_id: int,
+    model: str,
+    position: int,
+    user_id: int | None,
+    concurrency: asyncio.Semaphore | None,
+    on_delta: Callable[[str], None] | None,
+) -> dict:
+    """
+    Claim the (query, model) pair, call the API and store the result.
+
+    The API is only called while holding the claim. If another worker still
+    holds it after two waits and no translation has appeared, the call fails
+    rather than paying for and storing a second translation of the pair.
+    """
+    client = get_translation_client(model)
+    claim_ttl = config.MODELS.get(model, {}).get("timeout", 90.0) + 60.0
+
+    owner = None
+    for _ in range(2):
+        owner = await asyncio.to_thread(_claim_pair, query_id, model, claim_ttl)
+        if owner:
+            break
+        # Another worker is generating this pair; wait for its translation
+        existing = await _wait_for_claimed_pair(query_id, model, position, claim_ttl)
+        if existing:
+            return existing
+        # The other worker gave up without a result, so try to claim it ourselves
+    else:
+        existing = await asyncio.to_thread(
+            find_cached_translation, query_id, model, position
+        )
+        if existing:
+            return existing
+        msg = f"Translation by {model} is still in progress in another worker"
+        raise ConnectionError(msg)
+
+    async def call_upstream() -> tuple[str, float, int]:
+        # Generation time starts once a concurrency slot is held
+        started = time.monotonic()
+        if on_delta is None:
+            result_text, cost = await client.translate_async(
+                source_text, queued_at=queued_at
+            )
+        else:
+            result_text, cost = await client.translate_stream_async(
+                source_text, on_delta, queued_at=queued_at
+            )
+        return result_text, cost, _elapsed_ms(started)
+
+    # Telemetry counts the wait for a concurrency slot as queue wait
+    queued_at = time.monotonic()
+
+    try:
+        if concurrency is None:
+            result_text, cost, generation_ms = await call_upstream()
+        else:
+            async with concurrency:
+                result_text, cost, generation_ms = await call_upstream()
+        _raise_for_error_result(result_text)
+    except Exception as e:
+        await asyncio.to_thread(_release_pair, query_id, model, owner)
+        msg = f"API call failed for {model}: {e!s}"
+        raise ConnectionError(msg) from e
+
+    return await asyncio.to_thread(
+        store_translation,
+        query_id,
+        model,
+        position,
+        user_id,
+        result_text,
+        cost,
+        client.SYSTEM_PROMPT,
+        owner,
+        generation_ms,
+    )
+
+
+async def _wait_for_claimed_pair(
+    query_id: int, model: str, position: int, timeout: float
+) -> dict | None:
+    """Poll until another worker's claim produces a translation or goes away."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        await asyncio.sleep(PENDING_POLL_INTERVAL)
+        existing, still_claimed = await asyncio.to_thread(
+            _check_claimed_pair, query_id, model, position
+        )
+        if existing or not still_claimed:
+            return existing
+    return None
+
+
+def resolve_query(source_text: str) -> int:
+    """
+    Get or create the Query for `source_text` and return its ID.
+
+    Queries are keyed by the hash of the normalized text, so callers should
+    resolve once per round and pass the ID to every model's worker.
     """
     session: Session = SessionFactory()
     try:
-        query_repo = QueryRepository(session)
-        translation_repo = TranslationRepository(session)
+        return QueryRepository(session).get_or_create(source_text).id  # ty: ignore [invalid-return-type]
+
+    except Exception:
+        session.rollback()
+        raise
+
+    finally:
+        session.close()
 
-        query = query_repo.get_by_source_text(source_text)
-        if not query:
-            session.rollback()
-            query = query_repo.get_by_source_text(source_text)
-            if not query:
-                query = Query(source_text=source_text)
-                query = query_repo.add(query)
 
-        existing = translation_repo.get_by_query_and_model(query.id, model)  # ty: ignore [invalid-argument-type]
+def find_cached_translation(query_id: int, model: str, position: int) -> dict | None:
+    """
+    Look up an existing translation of a query by a model.
+
+    Returns:
+        The cached translation dict, or None if the model has not translated
+        this query yet.
+    """
+    session: Session = SessionFactory()
+    try:
+        existing = TranslationRepository(session).get_by_query_and_model(
+            query_id, model
+        )
         if existing:
-            return {
-                "query_id": existing.query_id,
-                "id": existing.id,
-                "model": model,
-                "position": position,
-                "translation": existing.translation,
-                "cost": existing.cost,
-                "response_hash": existing.response_hash,
-            }
-
-        client = get_translation_client(model)
-        try:
-            result_text, cost = client.translate(source_text)
-            if "Error:" in result_text or "Rate limit" in result_text:
-                raise ConnectionError(result_text)
-        except Exception as e:
-            msg = f"API call failed for {model}: {e!s}"
-            raise ConnectionError(msg) from e
+            return _translation_dict(existing, position)
+        return None
+
+    finally:
+        session.close()
+
+
+def store_translation(
+    query_id: int,
+    model: str,
+    position: int,
+    user_id: int | None,
+    result_text: str,
+    cost: float,
+    system_prompt: str,
+    claim_owner: str | None = None,
+    generation_ms: int | None = None,
+) -> dict:
+    """
+    Persist a freshly generated translation and return its details.
+
+    The model's stats rollup and the compare pair counter are updated, and a
+    claimed pair released, in the same transaction.
+    """
+    session: Session = SessionFactory()
+    try:
+        translation_repo = TranslationRepository(session)
+
+        if claim_owner:
+            PendingTranslationRepository(session).release(
+                query_id, model, claim_owner, commit=False
+            )
 
         # Calculate hash
         response_hash = hashlib.sha256(result_text.encode("utf-8")).hexdigest()
 
         translation = Translation(
-            query_id=query.id,
+            query_id=query_id,
             user_id=user_id,
             model=model,
             translation=result_text,
-            system_prompt=client.SYSTEM_PROMPT,
+            system_prompt=system_prompt,
             position=position,
             cost=cost,
             response_hash=response_hash,
+            generation_ms=generation_ms,
+        )
+        query = session.get(Query, query_id)
+        ModelStatsRepository(session).record_translation(
+            model, cost, len(query.source_text.split()) if query else 0
         )
+        # The rollup upsert above holds the write lock, so this count of the
+        # query's translations cannot race another worker's insert
+        CounterRepository(session).record_translation(query_id)
         new_translation = translation_repo.add(translation)
+        invalidate_model_usage_stats()
 
     except Exception:
         session.rollback()
@@ -98,3 +283,59 @@ def get_translation_for_model(
 
     finally:
         session.close()
+
+
+def _claim_pair(query_id: int, model: str, ttl_seconds: float) -> str | None:
+    """Claim a (query, model) pair across workers; returns the owner token."""
+    session: Session = SessionFactory()
+    try:
+        return PendingTranslationRepository(session).claim(query_id, model, ttl_seconds)
+    finally:
+        session.close()
+
+
+def _release_pair(query_id: int, model: str, owner: str) -> None:
+    """Release a claim after a failed upstream call."""
+    session: Session = SessionFactory()
+    try:
+        PendingTranslationRepository(session).release(query_id, model, owner)
+    finally:
+        session.close()
+
+
+def _check_claimed_pair(
+    query_id: int, model: str, position: int
+) -> tuple[dict | None, bool]:
+    """Return the pair's translation if it exists, and whether it is still claimed."""
+    session: Session = SessionFactory()
+    try:
+        existing = TranslationRepository(session).get_by_query_and_model(
+            query_id, model
+        )
+        if existing:
+            return _translation_dict(existing, position), False
+        return None, PendingTranslationRepository(session).is_claimed(query_id, model)
+    finally:
+        session.close()
+
+
+def _elapsed_ms(started: float) -> int:
+    return round((time.monotonic() - started) * 1000)
+
+
+def _translation_dict(translation: Translation, position: int) -> dict:
+    return {
+        "query_id": translation.query_id,
+        "id": translation.id,
+        "model": translation.model,
+        "position": position,
+        "translation": translation.translation,
+        "cost": translation.cost,
+        "response_hash": translation.response_hash,
+    }
+
+
+def _raise_for_error_result(result_text: str) -> None:
+    """Clients report failures as error strings; turn them into exceptions."""
+    if "Error:" in result_text or "Rate limit" in result_text:
+        raise ConnectionError(result_text)
@@ -7,9 +7,10 @@ from typing import cast
 from sqlalchemy.orm import Session
 
 from app.database import db_session
-from app.models import Translation, Vote
+from app.models import Translation
+from app.repositories.model_stats_repository import ModelStatsRepository
 from app.repositories.vote_repository import VoteRepository
-from app.services.elo_service import get_elo_service
+from app.services.elo_service import get_elo_service, model_locks
 
 logger = logging.getLogger(__name__)
 
@@ -30,50 +31,60 @@ def process_votes(user_id, query_id, votes_data):
     """
     session = cast(Session, db_session)
     vote_repo = VoteRepository(session)
+    stats_repo = ModelStatsRepository(session)
 
     try:
-        # Process votes with Upsert logic
-        processed_votes = []
+        # Rating per translation; a repeated translation keeps its last rating
+        ratings: dict[int, int] = {}
         for vote_data in votes_data:
             translation_id = vote_data.get("translation_id")
             rating = vote_data.get("rating")
 
             # Validate data
-            if not translation_id:
+            if not translation_id or isinstance(translation_id, bool):
+                continue
+            try:
+                translation_id = int(translation_id)
+            except (TypeError, ValueError):
                 continue
 
             # Validate rating value
             if rating not in [3, 2, 1, -1]:
                 continue
-
-            # Check if vote already exists
-            existing_vote = vote_repo.get_by_user_query_and_translation(
-                user_id, query_id, translation_id
+            ratings[translation_id] = rating
+
+        # Only translations of this query can be voted on
+        models = dict(
+            session.query(Translation.id, Translation.model)
+            .filter(Translation.id.in_(ratings), Translation.query_id == query_id)
+            .all()
+        )
+        ratings = {tid: rating for tid, rating in ratings.items() if tid in models}
+        if not ratings:
+            return {"success": True, "message": "Votes processed successfully"}
+
+        # Votes, the stats rollup, derived comparisons and ELO updates are
+        # committed together; the model locks come before the first write
+        with model_locks(models.values()):
+            # Inserting the new votes first takes the database write lock, so
+            # which votes are new is decided atomically across workers and the
+            # existing ratings read below cannot change before the commit
+            inserted = vote_repo.insert_new(user_id, query_id, ratings)
+            changed = {tid: r for tid, r in ratings.items() if tid not in inserted}
+            existing = vote_repo.get_ratings(user_id, query_id, list(changed))
+            stats_repo.record_votes(
+                [(models[tid], ratings[tid]) for tid in inserted],
+                [(models[tid], existing[tid], r) for tid, r in changed.items()],
             )
+            vote_repo.upsert_many(user_id, query_id, changed, commit=False)
 
-            if existing_vote:
-                existing_vote.rating = rating
-                vote_repo.update(existing_vote)
-                processed_votes.append(
-                    {"translation_id": translation_id, "rating": rating}
-                )
-            else:
-                vote = Vote(
-                    user_id=user_id,
-                    query_id=query_id,
-                    translation_id=translation_id,
-                    rating=rating,
-                )
-                vote_repo.add(vote)
-                processed_votes.append(
-                    {"translation_id": translation_id, "rating": rating}
-                )
-
-        # Derive pairwise comparisons from the votes just submitted
-        if len(processed_votes) >= 2:
-            _derive_pairwise_from_votes(session, user_id, query_id, processed_votes)
+            # Derive pairwise comparisons from the votes just submitted
+            if len(ratings) >= 2:
+                _derive_pairwise_from_votes(session, user_id, query_id, ratings, models)
+            session.commit()
 
     except Exception:
+        session.rollback()
         logger.exception("Error processing votes")
         return {"success": False, "error": "An error occurred while processing votes"}
 
@@ -81,45 +92,41 @@ def process_votes(user_id, query_id, votes_data):
         return {"success": True, "message": "Votes processed successfully"}
 
 
-def _derive_pairwise_from_votes(session, user_id, query_id, votes_data):
+def _derive_pairwise_from_votes(session, user_id, query_id, ratings, models):
     """
     Derive pairwise comparisons from star rating votes.
 
     For each pair of votes on the same query, if one rating is higher,
-    record it as a win for that model.
-    """
-    elo_service = get_elo_service(session)
-
-    for v1, v2 in combinations(votes_data, 2):
-        t1 = session.query(Translation).get(v1["translation_id"])
-        t2 = session.query(Translation).get(v2["translation_id"])
-
-        if not t1 or not t2:
-            continue
+    record it as a win for that model. Runs inside the caller's transaction
+    and model locks.
 
-        r1, r2 = v1["rating"], v2["rating"]
+    Args:
+        ratings: Rating per translation ID, in submission order.
+        models: Model per translation ID.
+    """
+    rows = []
+    for (t1_id, r1), (t2_id, r2) in combinations(ratings.items(), 2):
         winner_model = None
         loser_model = None
 
         if r1 > r2:
-            winner_model = t1.model
-            loser_model = t2.model
+            winner_model = models[t1_id]
+            loser_model = models[t2_id]
         elif r2 > r1:
-            winner_model = t2.model
-            loser_model = t1.model
+            winner_model = models[t2_id]
+            loser_model = models[t1_id]
         # Equal ratings = tie (winner and loser stay None)
 
-        try:
-            elo_service.record_comparison(
-                query_id=query_id,
-                user_id=user_id,
-                winner_model=winner_model,
-                loser_model=loser_model,
-                translation_a_id=v1["translation_id"],
-                translation_b_id=v2["translation_id"],
-                source="derived",
-            )
-        except Exception:
-            logger.exception(
-                f"Error recording pairwise comparison for {t1.model} vs {t2.model}"
-            )
+        rows.append(
+            {
+                "query_id": query_id,
+                "user_id": user_id,
+                "winner_model": winner_model,
+                "loser_model": loser_model,
+                "translation_a_id": t1_id,
+                "translation_b_id": t2_id,
+                "source": "derived",
+            }
+        )
+
+    get_elo_service(session).record_comparisons(rows, models, commit=False)
@@ -0,0 +1,59 @@
+"""Single-flight coalescing of concurrent async calls that share a key."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    """
+    Lets concurrent callers with the same key share one in-flight call.
+
+    The first caller for a key runs the call; callers that arrive while it is
+    running wait for the same result (or exception) instead of starting their
+    own. Once the call finishes the key is forgotten, so later callers start a
+    fresh call. Instances must only be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> tuple[Any, bool]:
+        """
+        Run `fn` for `key`, or join the call already in flight for it.
+
+        Returns:
+            The call's result and whether it was shared with an earlier caller.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.shared += 1
+            # Shield so a cancelled joiner doesn't cancel the leader's call
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.calls += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unjoined failure isn't logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._inflight[key]
+
+    def in_flight(self) -> int:
+        """Number of keys with a call currently running."""
+        return len(self._inflight)
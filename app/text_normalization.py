@@ -0,0 +1,53 @@
+"""Normalization of source texts into stable query keys.
+
+Two submissions that differ only in Unicode composition, spacing, or
+(optionally) Arabic elongation and diacritics map to the same `Query`, so
+they share cached translations and votes.
+"""
+
+import hashlib
+import re
+import unicodedata
+
+from app.config import get_config
+
+config = get_config()
+
+TATWEEL = "\u0640"
+# Arabic harakat, tanween, shadda, sukun, Quranic marks and superscript alef.
+# Thaana fili (U+07A6-U+07B0) are never stripped: Dhivehi needs them to be read.
+_TASHKEEL = re.compile(
+    r"[\u0610-\u061a\u064b-\u065f\u0670"
+    r"\u06d6-\u06dc\u06df-\u06e4\u06e7\u06e8\u06ea-\u06ed]"
+)
+
+
+def normalize_source_text(
+    text: str,
+    *,
+    strip_tatweel: bool | None = None,
+    strip_tashkeel: bool | None = None,
+) -> str:
+    """
+    Normalize a source text for keying.
+
+    Applies NFC, collapses runs of whitespace to a single space and trims the
+    ends. Tatweel and tashkeel stripping default to the
+    `QUERY_STRIP_TATWEEL` / `QUERY_STRIP_TASHKEEL` settings.
+    """
+    if strip_tatweel is None:
+        strip_tatweel = config.QUERY_STRIP_TATWEEL
+    if strip_tashkeel is None:
+        strip_tashkeel = config.QUERY_STRIP_TASHKEEL
+
+    text = unicodedata.normalize("NFC", text)
+    if strip_tatweel:
+        text = text.replace(TATWEEL, "")
+    if strip_tashkeel:
+        text = _TASHKEEL.sub("", text)
+    return " ".join(text.split())
+
+
+def source_hash(text: str) -> str:
+    """SHA-256 hex digest of the normalized text, used as `Query.source_hash`."""
+    return hashlib.sha256(normalize_source_text(text).encode("utf-8")).hexdigest()
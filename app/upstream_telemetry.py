@@ -0,0 +1,193 @@
+"""Per-call telemetry of upstream model requests.
+
+Every call made by `app.llm_clients` is traced with an `UpstreamCallTrace`
+and, once finished, queued as one `UpstreamCall` row. A background thread
+inserts the queued rows in batches every `UPSTREAM_TELEMETRY_FLUSH_SECONDS`,
+so recording a call never touches the database on the request thread or the
+translation engine's event loop. When the queue is full (the database is
+stuck), new rows are dropped and counted rather than blocking callers.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import UTC, datetime
+
+from sqlalchemy import insert
+
+from app import database
+from app.config import get_config
+from app.models import UpstreamCall
+
+config = get_config()
+
+logger = logging.getLogger(__name__)
+
+# Rows waiting for the writer; more are dropped
+MAX_QUEUED = 10_000
+
+# Rows per INSERT
+BATCH_SIZE = 500
+
+
+def _ms(seconds: float) -> int:
+    return round(seconds * 1000)
+
+
+class UpstreamCallTrace:
+    """
+    Timings of one upstream call.
+
+    Call `start` right before the request is sent (after waiting for a rate
+    limit slot), `first_byte` when the first streamed chunk arrives, and
+    `finish` exactly once with the outcome. Only streamed calls have a
+    time-to-first-byte: a plain completion arrives all at once.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        upstream: str,
+        *,
+        streamed: bool,
+        queued_at: float | None = None,
+    ):
+        self.model = model
+        self.upstream = upstream
+        self.streamed = streamed
+        # time.monotonic() when the caller started waiting for the call
+        self.queued_at = queued_at if queued_at is not None else time.monotonic()
+        self.created_at = datetime.now(UTC).replace(tzinfo=None)
+        self.sent_at: float | None = None
+        self.first_byte_at: float | None = None
+        self.retries = 0
+        self._finished = False
+
+    def start(self) -> None:
+        self.sent_at = time.monotonic()
+
+    def first_byte(self) -> None:
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+
+    def finish(
+        self,
+        *,
+        finish_reason: str | None = None,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Queue the call's row; later calls are ignored."""
+        if self._finished:
+            return
+        self._finished = True
+        now = time.monotonic()
+        # Calls that never got a rate limit slot spent all their time queued
+        sent_at = self.sent_at if self.sent_at is not None else now
+        get_telemetry_writer().record(
+            {
+                "created_at": self.created_at,
+                "model": self.model,
+                "upstream": self.upstream,
+                "streamed": self.streamed,
+                "queue_wait_ms": _ms(sent_at - self.queued_at),
+                "ttfb_ms": _ms(self.first_byte_at - sent_at)
+                if self.first_byte_at is not None
+                else None,
+                "latency_ms": _ms(now - sent_at),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "finish_reason": finish_reason,
+                "error": error,
+                "retries": self.retries,
+            }
+        )
+
+
+class TelemetryWriter:
+    """Queues telemetry rows and inserts them in batches on a daemon thread."""
+
+    def __init__(self, flush_seconds: float):
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: queue.Queue[dict] = queue.Queue(maxsize=MAX_QUEUED)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def record(self, row: dict) -> None:
+        """Queue a row without blocking."""
+        if not config.UPSTREAM_TELEMETRY_ENABLED:
+            return
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None:
+            self._start()
+
+    def flush(self) -> None:
+        """Insert every queued row."""
+        with self._flush_lock:
+            while True:
+                rows = []
+                while len(rows) < BATCH_SIZE:
+                    try:
+                        rows.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not rows:
+                    return
+                try:
+                    with database.engine.begin() as connection:
+                        connection.execute(insert(UpstreamCall), rows)
+                    self.written += len(rows)
+                except Exception:
+                    # Telemetry must never take the app down; lose the batch
+                    self.failed += len(rows)
+                    logger.exception(f"Failed to write {len(rows)} upstream calls")
+                    return
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="upstream-telemetry", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            if database.engine is not None:
+                self.flush()
+
+
+_writer: TelemetryWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_telemetry_writer() -> TelemetryWriter:
+    """Return the process-wide telemetry writer."""
+    global _writer  # noqa: PLW0603
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = TelemetryWriter(config.UPSTREAM_TELEMETRY_FLUSH_SECONDS)
+    return _writer
@@ -4,12 +4,25 @@
 import os
 from pathlib import Path
 
+from sqlalchemy import inspect, text
+
 # Note: In Docker, environment variables are already loaded
 # Import Flask app and database components
 from app import create_app, database
 from app.database import db_session
-from app.models import Base, ModelELO, PairwiseComparison, User
+from app.models import (
+    Base,
+    Counter,
+    ModelELO,
+    ModelStats,
+    PairwiseComparison,
+    Translation,
+    User,
+)
+from app.repositories.counter_repository import CounterRepository
+from app.repositories.model_stats_repository import ModelStatsRepository
 from app.services.user_service import create_user
+from app.text_normalization import source_hash
 
 
 def main():
@@ -29,6 +42,12 @@ def main():
         Base.metadata.create_all(bind=database.engine, checkfirst=True)
         print("Database schema created successfully.")
 
+        # create_all skips existing tables, so add columns and indexes
+        # introduced later
+        _migrate_query_hashes()
+        _migrate_generation_ms()
+        _migrate_indexes()
+
         # Create default users if none exist
         default_users = [
             # Default admin - set INIT_ADMIN_PASSWORD env var or change password immediately after first login
@@ -55,9 +74,119 @@ def main():
         # Run ELO migration if needed
         _migrate_elo_data()
 
+        # Backfill the leaderboard rollup for databases created before it
+        _migrate_model_stats()
+
+        # Backfill the compare progress counters for databases created before them
+        _migrate_counters()
+
         print("Database initialization completed successfully!")
 
 
+def _migrate_query_hashes():
+    """Add and backfill `queries.source_hash` on databases created before it.
+
+    The oldest query for each normalized text gets the hash; later duplicates
+    keep a NULL hash (and their existing translations and votes).
+    """
+    columns = {c["name"] for c in inspect(database.engine).get_columns("queries")}
+    with database.engine.begin() as conn:
+        if "source_hash" not in columns:
+            conn.execute(text("ALTER TABLE queries ADD COLUMN source_hash VARCHAR(64)"))
+            print("Added queries.source_hash column.")
+
+        taken = {
+            row[0]
+            for row in conn.execute(
+                text("SELECT source_hash FROM queries WHERE source_hash IS NOT NULL")
+            )
+        }
+        pending = conn.execute(
+            text(
+                "SELECT id, source_text FROM queries "
+                "WHERE source_hash IS NULL ORDER BY id"
+            )
+        ).all()
+
+        updates = []
+        duplicates = 0
+        for query_id, source_text in pending:
+            key = source_hash(source_text)
+            if key in taken:
+                duplicates += 1
+                continue
+            taken.add(key)
+            updates.append({"id": query_id, "source_hash": key})
+
+        if updates:
+            conn.execute(
+                text("UPDATE queries SET source_hash = :source_hash WHERE id = :id"),
+                updates,
+            )
+            print(f"Backfilled source_hash for {len(updates)} queries.")
+        if duplicates:
+            print(f"{duplicates} duplicate queries left without a source_hash.")
+
+
+def _migrate_generation_ms():
+    """Add `translations.generation_ms` on databases created before it.
+
+    Older translations keep a NULL generation time; latency estimates only
+    use translations that have one.
+    """
+    columns = {c["name"] for c in inspect(database.engine).get_columns("translations")}
+    if "generation_ms" in columns:
+        return
+    with database.engine.begin() as conn:
+        conn.execute(text("ALTER TABLE translations ADD COLUMN generation_ms INTEGER"))
+    print("Added translations.generation_ms column.")
+
+
+def _migrate_indexes():
+    """Create any model indexes missing from an existing database."""
+    created = []
+    for table in Base.metadata.sorted_tables:
+        existing = {
+            idx["name"] for idx in inspect(database.engine).get_indexes(table.name)
+        }
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=database.engine)
+                created.append(index.name)
+
+    if created:
+        # Refresh planner statistics so SQLite picks up the new indexes
+        with database.engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        print(f"Created indexes: {', '.join(created)}")
+    else:
+        print("All indexes present.")
+
+
+def _migrate_model_stats():
+    """Build model_stats from existing translations and votes if it is empty."""
+    if db_session.query(ModelStats).count() > 0:
+        print("Model stats already exist. Skipping backfill.")
+        return
+    if db_session.query(Translation).count() == 0:
+        return
+
+    count = ModelStatsRepository(db_session).rebuild()
+    print(f"Backfilled model_stats for {count} models.")
+
+
+def _migrate_counters():
+    """Build the compare progress counters from existing data if they are empty."""
+    if db_session.query(Counter).count() > 0:
+        print("Counters already exist. Skipping backfill.")
+        return
+    if db_session.query(Translation).count() == 0:
+        return
+
+    count = CounterRepository(db_session).rebuild()
+    print(f"Backfilled {count} counters.")
+
+
 def _migrate_elo_data():
     """Derive pairwise comparisons and ELO ratings from existing star ratings."""
     # Check if we already have ELO data
@@ -0,0 +1,137 @@
+"""Benchmark the Bradley-Terry fit and bootstrap on synthetic comparisons.
+
+Comparisons are drawn from known strengths, so the output also shows how
+well the fit recovers them and how often the true rating falls inside
+the bootstrap interval.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.models import Base, PairwiseComparison, Query, Translation, User
+from app.services import bradley_terry
+
+BATCH_SIZE = 10_000
+TIE_MARGIN = 0.1  # Outcomes this close to even are recorded as ties
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--comparisons", type=int, default=50_000)
+    parser.add_argument("--models", type=int, default=40)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument(
+        "--seconds",
+        type=float,
+        help="Bootstrap time budget (default: BRADLEY_TERRY_BOOTSTRAP_SECONDS)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    models = [f"model-{i:02d}" for i in range(args.models)]
+    true_ratings = {m: rng.gauss(1500, 150) for m in models}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(User(id=1, username="bench", password_hash="x"))
+            session.add(Query(id=1, source_text="bench"))
+            for i, model in enumerate(models, 1):
+                session.add(
+                    Translation(
+                        id=i,
+                        query_id=1,
+                        model=model,
+                        translation=model,
+                        system_prompt="bench",
+                        position=i,
+                    )
+                )
+            session.commit()
+
+        table = PairwiseComparison.__table__
+        with engine.begin() as conn:
+            rows = []
+            for _ in range(args.comparisons):
+                a, b = rng.sample(range(args.models), 2)
+                model_a, model_b = models[a], models[b]
+                p_a = 1 / (
+                    1 + 10 ** ((true_ratings[model_b] - true_ratings[model_a]) / 400)
+                )
+                draw = rng.random()
+                winner = loser = None
+                if draw < p_a - TIE_MARGIN / 2:
+                    winner, loser = model_a, model_b
+                elif draw > p_a + TIE_MARGIN / 2:
+                    winner, loser = model_b, model_a
+                rows.append(
+                    {
+                        "query_id": 1,
+                        "user_id": 1,
+                        "winner_model": winner,
+                        "loser_model": loser,
+                        "translation_a_id": a + 1,
+                        "translation_b_id": b + 1,
+                        "source": "explicit",
+                    }
+                )
+                if len(rows) >= BATCH_SIZE:
+                    conn.execute(table.insert(), rows)
+                    rows = []
+            if rows:
+                conn.execute(table.insert(), rows)
+
+        with Session(engine) as session:
+            start = time.perf_counter()
+            counts = bradley_terry.load_pair_counts(session)
+            loaded = time.perf_counter()
+            theta = bradley_terry.fit(len(counts.models), counts.pairs)
+            fitted = time.perf_counter()
+            resampled = bradley_terry.bootstrap(
+                counts, theta, args.samples, seconds=args.seconds
+            )
+            booted = time.perf_counter()
+            results = bradley_terry.compute_bradley_terry(
+                session, args.samples, seconds=args.seconds
+            )
+
+    workers = min(bradley_terry._worker_count(), args.samples)
+    print(f"{counts.comparisons:,} comparisons, {len(counts.pairs)} model pairs")
+    print(f"load pair counts {1000 * (loaded - start):9.1f} ms")
+    print(f"fit              {1000 * (fitted - loaded):9.1f} ms")
+    print(
+        f"bootstrap        {1000 * (booted - fitted):9.1f} ms "
+        f"({len(resampled)} resamples, {workers} workers)"
+    )
+
+    # The fit is only defined up to a shift, so compare centred ratings
+    true_mean = sum(true_ratings.values()) / len(true_ratings)
+    fit_mean = sum(r.rating for r in results) / len(results)
+    errors = [
+        r.rating - fit_mean - (true_ratings[r.model] - true_mean) for r in results
+    ]
+    covered = sum(
+        r.ci_low - fit_mean <= true_ratings[r.model] - true_mean <= r.ci_high - fit_mean
+        for r in results
+    )
+    rmse = math.sqrt(sum(e * e for e in errors) / len(errors))
+    print(
+        f"rating RMSE vs truth {rmse:.1f}; true rating inside CI for {covered}/{len(results)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Verify and benchmark the full-history ELO replay.
+
+--verify feeds random comparisons through the online ELOService path,
+then checks that replaying the stored history reproduces every rating and
+W/L/T count exactly. Without it, the script inserts synthetic comparisons
+(a million by default) and times loading, replaying and writing.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import get_config
+from app.models import Base, ModelELO, PairwiseComparison, Query, Translation, User
+from app.services.elo_replay import load_history, recompute_elo, replay
+from app.services.elo_service import ELOService
+
+BATCH_SIZE = 10_000
+
+
+def setup(session: Session, models: list[str]) -> dict[str, int]:
+    """Create a user, a query and one translation per model."""
+    session.add(User(id=1, username="bench", password_hash="x"))
+    session.add(Query(id=1, source_text="bench"))
+    translation_ids = {}
+    for i, model in enumerate(models, 1):
+        session.add(
+            Translation(
+                id=i,
+                query_id=1,
+                model=model,
+                translation=model,
+                system_prompt="bench",
+                position=i,
+            )
+        )
+        translation_ids[model] = i
+    session.commit()
+    return translation_ids
+
+
+def random_comparison(rng, models, translation_ids):
+    """A comparison covering every shape record_comparison handles."""
+    a, b = rng.choice(models), rng.choice(models)
+    kind = rng.random()
+    if kind < 0.7:
+        return a, b, translation_ids[a], translation_ids[b]
+    if kind < 0.9:
+        return None, None, translation_ids[a], translation_ids[b]
+    if kind < 0.95:
+        # No winner but a loser: online treats this as a tie too
+        return None, b, translation_ids[a], translation_ids[b]
+    # Missing translation: never affects ratings
+    return None, None, translation_ids[a], None
+
+
+def verify(count: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    models = list(get_config().MODELS)[:8]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/verify.db")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            translation_ids = setup(session, models)
+            elo_service = ELOService(session)
+            start = time.perf_counter()
+            for _ in range(count):
+                winner, loser, a_id, b_id = random_comparison(
+                    rng, models, translation_ids
+                )
+                elo_service.record_comparison(1, 1, winner, loser, a_id, b_id)
+            session.commit()
+            online_ms = (time.perf_counter() - start) * 1000 / count
+
+            online = {
+                r.model: (r.elo_rating, r.wins or 0, r.losses or 0, r.ties or 0)
+                for r in session.query(ModelELO)
+            }
+            replayed = {
+                r.model: (r.elo_rating, r.wins, r.losses, r.ties)
+                for r in recompute_elo(session, dry_run=True)
+            }
+
+    print(f"Online path: {online_ms:.2f} ms per comparison")
+    mismatches = [
+        m for m in online.keys() | replayed.keys() if online.get(m) != replayed.get(m)
+    ]
+    for model in mismatches:
+        print(
+            f"MISMATCH {model}: online={online.get(model)} replay={replayed.get(model)}"
+        )
+    if not mismatches:
+        print(f"OK: replay of {count} comparisons matches {len(online)} models exactly")
+    return not mismatches
+
+
+def bench(count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    models = list(get_config().MODELS)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            translation_ids = setup(session, models)
+
+        print(f"Inserting {count:,} comparisons...")
+        table = PairwiseComparison.__table__
+        with engine.begin() as conn:
+            rows = []
+            for _ in range(count):
+                winner, loser, a_id, b_id = random_comparison(
+                    rng, models, translation_ids
+                )
+                rows.append(
+                    {
+                        "query_id": 1,
+                        "user_id": 1,
+                        "winner_model": winner,
+                        "loser_model": loser,
+                        "translation_a_id": a_id,
+                        "translation_b_id": b_id,
+                        "source": "explicit",
+                    }
+                )
+                if len(rows) >= BATCH_SIZE:
+                    conn.execute(table.insert(), rows)
+                    rows = []
+            if rows:
+                conn.execute(table.insert(), rows)
+
+        with Session(engine) as session:
+            start = time.perf_counter()
+            history = load_history(session)
+            loaded = time.perf_counter()
+            replay(history)
+            replayed = time.perf_counter()
+            recompute_elo(session)
+            total = time.perf_counter()
+
+    print(f"{len(history):,} rating-relevant comparisons, {len(history.models)} models")
+    print(f"load history   {loaded - start:8.2f}s")
+    print(f"replay         {replayed - loaded:8.2f}s")
+    print(f"recompute-elo  {total - replayed:8.2f}s (load + replay + write)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verify", action="store_true")
+    parser.add_argument(
+        "--comparisons",
+        type=int,
+        default=None,
+        help="Defaults to 2,000 with --verify and 1,000,000 otherwise",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.verify:
+        sys.exit(0 if verify(args.comparisons or 2_000, args.seed) else 1)
+    bench(args.comparisons or 1_000_000, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Latency and SQL statement benchmark for the hot HTTP endpoints.
+
+Seeds a throwaway SQLite database with `seed_db` (or copies an existing
+one), logs a fresh user in through the Flask test client and requests each
+endpoint `--repeats` times:
+
+    GET  /                          arena page
+    GET  /get_available_models      model selection for a round
+    GET  /compare/random            one Quick Compare pair
+    GET  /compare/random?count=5    a prefetched batch of pairs
+    POST /compare/submit            the pairs handed out above
+    POST /vote                      star ratings for random queries
+    GET  /stats/stats               stats page
+
+For every endpoint it reports the first (cold) request, p50/p95 latency
+and the number of SQL statements per request, counted on the request
+thread only. `--json` saves the results and `--baseline` compares a run
+with a saved one, so regressions show up as numbers:
+
+    python scripts/bench_endpoints.py --json before.json
+    python scripts/bench_endpoints.py --baseline before.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, func, select
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.dirname(__file__))
+
+from seed_db import seed
+
+from app import create_app, database
+from app.config import Config
+from app.models import Translation
+from app.services.user_service import create_user
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+PREFETCH_COUNT = 5
+RATINGS = [3, 2, 1, -1]
+
+
+class StatementCounter:
+    """Counts SQL statements executed on one thread."""
+
+    def __init__(self, engine, thread_id: int):
+        self.count = 0
+        self.thread_id = thread_id
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *_args) -> None:
+        # Background work (snapshot rebuilds, index syncs) runs elsewhere
+        if threading.get_ident() == self.thread_id:
+            self.count += 1
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def measure(counter: StatementCounter, request) -> tuple[float, int, object]:
+    """Run one request; returns (milliseconds, statements, response)."""
+    counter.count = 0
+    start = time.perf_counter()
+    response = request()
+    elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code >= 400:
+        msg = f"{response.request.path} returned {response.status_code}"
+        raise RuntimeError(msg)
+    return elapsed, counter.count, response
+
+
+def run(client, counter: StatementCounter, repeats: int, rng: random.Random) -> dict:
+    """Request every endpoint `repeats` times; returns a summary per endpoint."""
+    session = database.db_session
+    # Queries with at least two translations, for votes
+    query_ids = session.scalars(
+        select(Translation.query_id)
+        .group_by(Translation.query_id)
+        .having(func.count(Translation.id) >= 2)
+    ).all()
+    vote_queries = rng.sample(query_ids, min(repeats, len(query_ids)))
+    database.db_session.remove()
+
+    pairs: list[dict] = []
+
+    def compare_random():
+        response = client.get("/compare/random")
+        pairs.append(response.get_json())
+        return response
+
+    def compare_batch():
+        response = client.get(f"/compare/random?count={PREFETCH_COUNT}")
+        pairs.extend(response.get_json()["pairs"])
+        return response
+
+    def compare_submit():
+        pair = pairs.pop()
+        a, b = (t["id"] for t in pair["translations"])
+        return client.post(
+            "/compare/submit",
+            json={
+                "query_id": pair["query_id"],
+                "winner_id": rng.choice([a, b, None]),
+                "translation_ids": [a, b],
+            },
+        )
+
+    def vote():
+        query_id = vote_queries.pop()
+        translation_ids = database.db_session.scalars(
+            select(Translation.id).where(Translation.query_id == query_id)
+        ).all()
+        database.db_session.remove()
+        return client.post(
+            "/vote",
+            json={
+                "query_id": query_id,
+                "votes": [
+                    {"translation_id": t_id, "rating": rng.choice(RATINGS)}
+                    for t_id in translation_ids
+                ],
+            },
+        )
+
+    endpoints = {
+        "GET /": lambda: client.get("/"),
+        "GET /get_available_models": lambda: client.get("/get_available_models"),
+        "GET /compare/random": compare_random,
+        f"GET /compare/random?count={PREFETCH_COUNT}": compare_batch,
+        "POST /compare/submit": compare_submit,
+        "POST /vote": vote,
+        "GET /stats/stats": lambda: client.get("/stats/stats"),
+    }
+
+    results = {}
+    for name, request in endpoints.items():
+        times, statements = [], []
+        # Votes and submits are limited by the queries and pairs available
+        if name == "POST /vote":
+            n = len(vote_queries)
+        elif name == "POST /compare/submit":
+            n = len(pairs)
+        else:
+            n = repeats
+        for _ in range(n):
+            elapsed, count, _response = measure(counter, request)
+            times.append(elapsed)
+            statements.append(count)
+        results[name] = {
+            "requests": n,
+            "cold_ms": times[0] if times else None,
+            "p50_ms": percentile(times, 0.5) if times else None,
+            "p95_ms": percentile(times, 0.95) if times else None,
+            "statements": statistics.median(statements) if statements else None,
+            "max_statements": max(statements) if statements else None,
+        }
+    return results
+
+
+def report(results: dict, baseline: dict | None) -> None:
+    header = (
+        f"{'endpoint':<32} {'n':>5} {'cold':>9} {'p50':>9} {'p95':>9} {'SQL':>5}"
+        f" {'max':>4}"
+    )
+    if baseline:
+        header += f" {'p50 vs base':>12} {'SQL vs base':>12}"
+    print(header)
+    for name, r in results.items():
+        if not r["requests"]:
+            print(f"{name:<32} {0:>5}  (nothing to request)")
+            continue
+        line = (
+            f"{name:<32} {r['requests']:>5} {r['cold_ms']:>7.1f}ms"
+            f" {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms"
+            f" {r['statements']:>5g} {r['max_statements']:>4}"
+        )
+        base = (baseline or {}).get(name)
+        if base and base.get("p50_ms"):
+            change = (r["p50_ms"] / base["p50_ms"] - 1) * 100
+            line += f" {change:>+11.0f}% {r['statements'] - base['statements']:>+12g}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=20_000,
+        help="Queries to seed (ignored with --database)",
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument(
+        "--database",
+        help="SQLite file to benchmark; a copy is used, since the benchmark writes",
+    )
+    parser.add_argument("--json", help="Save the results to this file")
+    parser.add_argument("--baseline", help="Compare with results saved by --json")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        if args.database:
+            shutil.copyfile(args.database, path)
+        else:
+            print(f"Seeding {args.queries:,} queries...")
+            start = time.perf_counter()
+            engine = create_engine(f"sqlite:///{path}")
+            counts = seed(
+                engine, queries=args.queries, users=args.users, seed=args.seed
+            )
+            engine.dispose()
+            print(
+                ", ".join(f"{count:,} {table}" for table, count in counts.items())
+                + f" in {time.perf_counter() - start:.0f}s\n"
+            )
+
+        # Keep every file the app writes inside the temporary directory
+        Config.DATABASE_URI = f"sqlite:///{path}"
+        Config.RATE_LIMIT_DB = os.path.join(tmp, "rate_limits.db")
+        Config.STATS_SNAPSHOT_PATH = os.path.join(tmp, "stats_snapshot.json")
+        Config.OPENROUTER_API_KEY = None
+
+        app = create_app()
+        app.config["WTF_CSRF_ENABLED"] = False
+        # create_app logs at INFO; keep the report readable
+        logging.getLogger().setLevel(logging.WARNING)
+        with app.app_context():
+            create_user(USERNAME, PASSWORD)
+        client = app.test_client()
+        response = client.post(
+            "/auth/login", json={"username": USERNAME, "password": PASSWORD}
+        )
+        if response.status_code != 200:
+            msg = f"Login failed: {response.status_code}"
+            raise RuntimeError(msg)
+
+        counter = StatementCounter(database.engine, threading.get_ident())
+        results = run(client, counter, args.repeats, random.Random(args.seed))
+
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        report(results, baseline)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        database.db_session.remove()
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
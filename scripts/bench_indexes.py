@@ -0,0 +1,143 @@
+"""Compare hot lookup latencies on a seeded database before and after indexes.
+
+Seeds a throwaway SQLite database, drops the model indexes, times the
+queries each endpoint runs, then applies the init_db index migration and
+times them again.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.dirname(__file__))
+
+from seed_db import seed
+
+from app import database
+from app.blueprints.main import _get_user_comparison_stats
+from app.models import Base, ModelELO, PairwiseComparison, Translation
+from app.repositories.translation_repository import TranslationRepository
+from app.services.cost_service import get_user_monthly_cost
+from init_db import _migrate_indexes
+
+
+def build_cases(session, rng):
+    query_ids = [row[0] for row in session.query(Translation.query_id).distinct()]
+    user_ids = [row[0] for row in session.query(Translation.user_id).distinct()]
+    models = [row[0] for row in session.query(ModelELO.model)]
+    repo = TranslationRepository(session)
+
+    def compared_pairs():
+        return (
+            session.query(
+                PairwiseComparison.translation_a_id, PairwiseComparison.translation_b_id
+            )
+            .filter(
+                PairwiseComparison.user_id == rng.choice(user_ids),
+                PairwiseComparison.query_id == rng.choice(query_ids),
+                PairwiseComparison.source == "explicit",
+            )
+            .all()
+        )
+
+    return [
+        (
+            "stream-translate: cached translation",
+            lambda: repo.get_by_query_and_model(
+                rng.choice(query_ids), rng.choice(models)
+            ),
+        ),
+        (
+            "stream-translate: monthly budget",
+            lambda: get_user_monthly_cost(rng.choice(user_ids)),
+        ),
+        (
+            "retry-single: query translations",
+            lambda: repo.get_by_query_id(rng.choice(query_ids)),
+        ),
+        ("compare/random: compared pairs", compared_pairs),
+        (
+            "compare/random: user stats",
+            lambda: _get_user_comparison_stats(rng.choice(user_ids)),
+        ),
+        (
+            "elo: rating lookup",
+            lambda: (
+                session.query(ModelELO)
+                .filter(ModelELO.model == rng.choice(models))
+                .first()
+            ),
+        ),
+    ]
+
+
+def time_cases(cases, repeats):
+    results = {}
+    for label, fn in cases:
+        fn()  # Warm the page cache
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        results[label] = (
+            statistics.median(samples),
+            samples[int(len(samples) * 0.95) - 1],
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        database.engine = engine
+        database.db_session.configure(bind=engine)
+
+        print("Seeding...")
+        counts = seed(engine, queries=args.queries, users=args.users)
+        print(", ".join(f"{count:,} {table}" for table, count in counts.items()))
+
+        with engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            conn.execute(text("ANALYZE"))
+
+        session = database.db_session()
+        cases = build_cases(session, random.Random(0))
+        before = time_cases(cases, args.repeats)
+        session.rollback()
+
+        _migrate_indexes()
+        after = time_cases(cases, args.repeats)
+        database.db_session.remove()
+
+    print(
+        f"\n{'operation':<38} {'before p50':>11} {'p95':>8}"
+        f" {'after p50':>10} {'p95':>8} {'speedup':>8}"
+    )
+    for label, (b50, b95) in before.items():
+        a50, a95 = after[label]
+        print(
+            f"{label:<38} {b50:>9.2f}ms {b95:>6.2f}ms"
+            f" {a50:>8.2f}ms {a95:>6.2f}ms {b50 / a50:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
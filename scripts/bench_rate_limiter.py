@@ -0,0 +1,54 @@
+"""Measure the overhead of one rate limiter acquire/release cycle."""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.rate_limiter import Limit, RateLimiter
+
+
+def run(limiter, limit, iterations, threads):
+    def worker():
+        for _ in range(iterations):
+            lease, _wait = limiter.try_acquire("bench/model", limit, 60.0)
+            if lease:
+                limiter.release(lease)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * threads) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = RateLimiter(os.path.join(tmp, "rate_limits.db"))
+        # Generous limits so every acquire succeeds and we time the happy path
+        limited = Limit(requests_per_minute=1e9, max_concurrency=1000)
+        cases = [
+            ("unlimited (fast path)", Limit(), 1),
+            ("token bucket + slots, 1 thread", limited, 1),
+            (f"token bucket + slots, {args.threads} threads", limited, args.threads),
+        ]
+        for label, limit, threads in cases:
+            per_call = run(limiter, limit, args.iterations, threads)
+            print(f"{label:<40} {per_call:10.1f} µs/acquire")
+
+
+if __name__ == "__main__":
+    main()
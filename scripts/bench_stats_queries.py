@@ -0,0 +1,97 @@
+"""Regression benchmark for the stats dashboard aggregations.
+
+Seeds a throwaway SQLite database (about a million translations by
+default) and reports the latency and peak Python memory of each stats
+function. Both should stay flat as the tables grow; compare runs with
+different --queries values to check.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.dirname(__file__))
+
+from seed_db import seed
+
+from app import database
+from app.services.stats_service import (
+    calculate_global_stats,
+    calculate_model_scores,
+    get_cost_breakdown,
+    get_monthly_spending_stats,
+)
+
+FUNCTIONS = [
+    calculate_global_stats,
+    get_monthly_spending_stats,
+    get_cost_breakdown,
+    calculate_model_scores,
+]
+
+
+def bench(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        database.db_session.remove()
+
+    tracemalloc.start()
+    fn()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    database.db_session.remove()
+    return statistics.median(samples), max(samples), peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=250_000,
+        help="Queries to seed (about 4 translations each)",
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--database",
+        help="Benchmark an existing database instead of seeding a new one",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = args.database or f"sqlite:///{tmp}/bench.db"
+        engine = create_engine(uri)
+        database.engine = engine
+        database.db_session.configure(bind=engine)
+
+        if not args.database:
+            print(f"Seeding {args.queries:,} queries...")
+            start = time.perf_counter()
+            counts = seed(engine, queries=args.queries, users=50)
+            print(
+                ", ".join(f"{count:,} {table}" for table, count in counts.items())
+                + f" in {time.perf_counter() - start:.0f}s"
+            )
+
+        print(f"\n{'function':<28} {'p50':>10} {'max':>10} {'peak mem':>10}")
+        for fn in FUNCTIONS:
+            p50, worst, peak_kib = bench(fn, args.repeats)
+            print(
+                f"{fn.__name__:<28} {p50:>8.1f}ms {worst:>8.1f}ms {peak_kib:>7.0f}KiB"
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
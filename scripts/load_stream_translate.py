@@ -0,0 +1,290 @@
+"""Load test for `/stream-translate` against a running server.
+
+Opens many concurrent SSE translation streams, as the arena page does, and
+measures per stream the time to the first event and to the final `end`
+event. Run it against the real server pointed at the
+stub upstream, so no money is spent:
+
+    python scripts/stub_openrouter.py --port 8089 &
+    OPENROUTER_BASE_URL=http://127.0.0.1:8089/v1 OPENROUTER_API_KEY=stub \\
+        UNLIMITED_USERS=loadtest DATA_DIR=/tmp/loadtest \\
+        gunicorn --bind 127.0.0.1:8101 --workers 1 --threads 8 wsgi:app &
+    DATA_DIR=/tmp/loadtest flask --app wsgi add-user loadtest <password>
+    python scripts/load_stream_translate.py --password <password> \\
+        --concurrency 1,4,8,16,32
+
+Each concurrency level keeps exactly that many streams open until
+`--streams` streams (default: three per slot) have finished. Every stream
+sends a fresh source text, so single-flight and the translation cache do not
+hide the upstream calls (`--repeat-query` measures the cached path instead).
+
+Thread saturation: an SSE response holds one server thread until the round
+ends, so once every gunicorn thread is busy, other requests wait for one to
+free up. Response headers only arrive with the first body chunk, so they
+cannot show that wait; instead the report shows, per level:
+
+- `open`: the most streams that were answering at the same time, which
+  stops growing at the server's thread count;
+- `probe`: latency of a cheap request (`--probe-path`) sent every
+  `--probe-interval` seconds during the level, which jumps when no thread
+  is free;
+- `saturated`: the share of probes slower than `--saturation-threshold`
+  seconds, roughly the share of time every thread was busy.
+"""
+
+import argparse
+import asyncio
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import httpx
+
+SAMPLE_TEXT = "ذهب الطالب إلى المكتبة ليقرأ كتابا عن تاريخ جزر المالديف"
+
+
+@dataclass
+class StreamResult:
+    """Timings of one stream, in seconds from the request."""
+
+    headers: float | None = None  # Sent with the first body chunk
+    first_event: float | None = None
+    last_event: float | None = None
+    results: int = 0
+    errors: int = 0
+    failure: str | None = None
+
+
+@dataclass
+class LevelStats:
+    """Everything measured at one concurrency level."""
+
+    concurrency: int
+    streams: list[StreamResult] = field(default_factory=list)
+    probes: list[float] = field(default_factory=list)
+    open_now: int = 0
+    peak_open: int = 0
+    elapsed: float = 0.0
+
+
+def percentile(samples: list[float], fraction: float) -> float | None:
+    """Nearest-rank percentile, None without samples."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> None:
+    """Log in with the CSRF token from the arena page."""
+    page = await client.get("/")
+    match = re.search(r'name="csrf-token" content="([^"]+)"', page.text)
+    headers = {"X-CSRFToken": match.group(1)} if match else {}
+    response = await client.post(
+        "/auth/login",
+        json={"username": username, "password": password},
+        headers=headers,
+    )
+    if response.status_code != 200:
+        msg = f"Login failed ({response.status_code}): {response.text[:200]}"
+        raise RuntimeError(msg)
+
+
+async def pick_models(client: httpx.AsyncClient, fixed: list[str] | None) -> list[str]:
+    """The models of one round: `--models`, or the server's own selection."""
+    if fixed:
+        return fixed
+    response = await client.get("/get_available_models")
+    response.raise_for_status()
+    models = response.json()["models"]
+    return [key for key, model in models.items() if model["selected"]]
+
+
+async def run_stream(
+    client: httpx.AsyncClient, args, level: LevelStats, query: str
+) -> StreamResult:
+    result = StreamResult()
+    params: dict = {"query": query, "models": await pick_models(client, args.models)}
+    if args.stream_tokens:
+        params["stream_tokens"] = "1"
+
+    start = time.perf_counter()
+    opened = False
+    try:
+        async with client.stream("GET", "/stream-translate", params=params) as response:
+            result.headers = time.perf_counter() - start
+            level.open_now += 1
+            level.peak_open = max(level.peak_open, level.open_now)
+            opened = True
+            event = "message"
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                    continue
+                if not line.startswith("data:"):
+                    # Blank separators and keep-alive comments
+                    if not line:
+                        event = "message"
+                    continue
+                now = time.perf_counter() - start
+                if result.first_event is None:
+                    result.first_event = now
+                if event == "end":
+                    result.last_event = now
+                elif event == "error":
+                    result.failure = line[5:].strip()[:120]
+                elif event == "message":
+                    if '"error"' in line:
+                        result.errors += 1
+                    else:
+                        result.results += 1
+    except httpx.HTTPError as e:
+        result.failure = f"{type(e).__name__}: {e}"
+    finally:
+        if opened:
+            level.open_now -= 1
+    if result.last_event is None and result.failure is None:
+        result.failure = "Stream ended without an end event"
+    return result
+
+
+async def probe(
+    client: httpx.AsyncClient, args, level: LevelStats, done: asyncio.Event
+):
+    while not done.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get(args.probe_path)
+            level.probes.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(done.wait(), args.probe_interval)
+        except TimeoutError:
+            pass
+
+
+async def run_level(client: httpx.AsyncClient, args, concurrency: int) -> LevelStats:
+    level = LevelStats(concurrency)
+    total = args.streams or 3 * concurrency
+    queries = iter(
+        SAMPLE_TEXT if args.repeat_query else f"{SAMPLE_TEXT} {uuid.uuid4().hex[:8]}"
+        for _ in range(total)
+    )
+
+    async def worker():
+        for query in queries:
+            level.streams.append(await run_stream(client, args, level, query))
+
+    done = asyncio.Event()
+    prober = asyncio.create_task(probe(client, args, level, done))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    level.elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+    return level
+
+
+def _ms(value: float | None) -> str:
+    return f"{value * 1000:.0f}" if value is not None else "-"
+
+
+def _spread(samples: list[float]) -> str:
+    return f"{_ms(percentile(samples, 0.5))}/{_ms(percentile(samples, 0.95))}"
+
+
+def report(levels: list[LevelStats], saturation_threshold: float) -> None:
+    print(
+        f"{'conc':>5} {'streams':>7} {'fail':>5} {'rate/s':>7}"
+        f" {'first p50/p95':>16} {'last p50/p95':>16}"
+        f" {'open':>5} {'probe p50/p95/max':>19} {'saturated':>10}"
+    )
+    for level in levels:
+        ok = [s for s in level.streams if s.failure is None]
+        first = [s.first_event for s in ok if s.first_event is not None]
+        last = [s.last_event for s in ok if s.last_event is not None]
+        saturated = sum(p > saturation_threshold for p in level.probes) / max(
+            len(level.probes), 1
+        )
+        probes = _spread(level.probes) + "/" + _ms(max(level.probes, default=None))
+        print(
+            f"{level.concurrency:>5} {len(level.streams):>7}"
+            f" {len(level.streams) - len(ok):>5}"
+            f" {len(level.streams) / level.elapsed:>7.2f}"
+            f" {_spread(first):>16} {_spread(last):>16}"
+            f" {level.peak_open:>5} {probes:>19} {saturated:>10.0%}"
+        )
+    print("(times in ms; 'open' = most streams holding a server thread at once)")
+
+    failures = {}
+    for level in levels:
+        for stream in level.streams:
+            if stream.failure:
+                failures[stream.failure] = failures.get(stream.failure, 0) + 1
+    for failure, count in sorted(failures.items(), key=lambda item: -item[1])[:5]:
+        print(f"  {count} x {failure}")
+    model_errors = sum(s.errors for level in levels for s in level.streams)
+    if model_errors:
+        print(f"  {model_errors} model results were errors")
+
+
+async def main_async(args) -> None:
+    levels_wanted = [int(n) for n in args.concurrency.split(",")]
+    limits = httpx.Limits(
+        max_connections=max(levels_wanted) + 4, max_keepalive_connections=None
+    )
+    timeout = httpx.Timeout(args.timeout, connect=10.0)
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=timeout
+    ) as client:
+        await login(client, args.username, args.password)
+        levels = []
+        for concurrency in levels_wanted:
+            level = await run_level(client, args, concurrency)
+            levels.append(level)
+            print(
+                f"concurrency {concurrency}: {len(level.streams)} streams"
+                f" in {level.elapsed:.1f}s"
+            )
+        print()
+        report(levels, args.saturation_threshold)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:8101")
+    parser.add_argument("--username", default="loadtest")
+    parser.add_argument("--password", required=True)
+    parser.add_argument(
+        "--concurrency", default="1,4,8,16", help="Comma-separated levels"
+    )
+    parser.add_argument(
+        "--streams", type=int, default=0, help="Streams per level (0 = 3 per slot)"
+    )
+    parser.add_argument(
+        "--models", nargs="+", help="Model keys per round (default: server selection)"
+    )
+    parser.add_argument(
+        "--stream-tokens", action="store_true", help="Request token deltas"
+    )
+    parser.add_argument(
+        "--repeat-query",
+        action="store_true",
+        help="Send the same text every time (cached path)",
+    )
+    parser.add_argument("--probe-path", default="/get_available_models")
+    parser.add_argument("--probe-interval", type=float, default=0.25)
+    parser.add_argument("--saturation-threshold", type=float, default=0.25)
+    parser.add_argument(
+        "--timeout", type=float, default=300.0, help="Read timeout per stream"
+    )
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ This script updates model references in:
 - pairwise_comparisons.winner_model
 - pairwise_comparisons.loser_model
 - model_elo.model
+- model_stats.model
 
 Usage:
     python scripts/rename_model.py <old_name> <new_name> [--dry-run]
@@ -27,7 +28,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import Config
-from app.models import ModelELO, PairwiseComparison, Translation
+from app.models import ModelELO, ModelStats, PairwiseComparison, Translation
+from app.repositories.model_stats_repository import COUNTER_FIELDS
 
 # Create standalone database connection
 database_uri = f"sqlite:///{Config.DATA_DIR}/dhivehi_translation_arena.db"
@@ -63,6 +65,11 @@ def count_references(session, old_name: str) -> dict[str, int]:
         session.query(ModelELO).filter(ModelELO.model == old_name).count()
     )
 
+    # Count leaderboard rollup records
+    counts["stats_records"] = (
+        session.query(ModelStats).filter(ModelStats.model == old_name).count()
+    )
+
     return counts
 
 
@@ -89,6 +96,11 @@ def check_new_name_exists(session, new_name: str) -> dict[str, bool]:
         session.query(ModelELO).filter(ModelELO.model == new_name).first() is not None
     )
 
+    exists["stats_records"] = (
+        session.query(ModelStats).filter(ModelStats.model == new_name).first()
+        is not None
+    )
+
     return exists
 
 
@@ -228,6 +240,38 @@ def rename_model(old_name: str, new_name: str, dry_run: bool = True) -> bool:
                     # Just rename
                     old_elo.model = new_name
 
+        # Update or merge leaderboard rollup records
+        if counts["stats_records"] > 0:
+            print(f"  Updating {counts['stats_records']} model stats record(s)...")
+            if not dry_run:
+                old_stats = (
+                    session.query(ModelStats)
+                    .filter(ModelStats.model == old_name)
+                    .first()
+                )
+                new_stats = (
+                    session.query(ModelStats)
+                    .filter(ModelStats.model == new_name)
+                    .first()
+                )
+
+                if new_stats and old_stats:
+                    # Counters are plain sums, so merging is exact
+                    for field in COUNTER_FIELDS:
+                        setattr(
+                            new_stats,
+                            field,
+                            (getattr(new_stats, field) or 0)
+                            + (getattr(old_stats, field) or 0),
+                        )
+                    new_stats.revision = (
+                        max(new_stats.revision or 0, old_stats.revision or 0) + 1
+                    )
+                    session.delete(old_stats)
+                elif old_stats:
+                    old_stats.model = new_name
+                    old_stats.revision = (old_stats.revision or 0) + 1
+
         if dry_run:
             print("\n✓ Dry run completed - no changes were made")
             session.rollback()
@@ -0,0 +1,414 @@
+"""Seed a database with synthetic arena data for benchmarks.
+
+Rows are written with bulk Core inserts, so a few hundred thousand
+translations take seconds. Intended for throwaway databases only.
+
+The data follows the shapes seen in production rather than uniform noise:
+
+- Only active models from `Config.MODELS` translate, and model usage is
+  skewed (Zipf-like), so a few models have most of the translations.
+- User activity is skewed the same way: a handful of raters cast most of
+  the votes and Quick Compare choices.
+- Every model has a hidden quality. Star ratings and explicit comparisons
+  are drawn from it with per-user bias and noise, so rankings and ELO
+  ratings converge to a stable order.
+- Source texts have log-normal lengths, and costs follow from the length
+  and the model's configured token prices.
+- Activity grows over the year, so recent months are busier.
+
+ELO ratings are replayed from the seeded comparisons, and the model stats
+rollup and counters are rebuilt, as if every row had come in through the app.
+That rewrites every rating in the target database, so the configured
+`DATABASE_URI` is refused unless `--force` is given.
+"""
+
+import argparse
+import datetime
+import math
+import os
+import random
+import sys
+from itertools import combinations
+
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.orm import Session
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import get_config
+from app.models import (
+    Base,
+    PairwiseComparison,
+    Query,
+    Translation,
+    User,
+    Vote,
+)
+from app.repositories.counter_repository import CounterRepository
+from app.repositories.model_stats_repository import ModelStatsRepository
+from app.services.elo_replay import recompute_elo
+from app.text_normalization import source_hash
+
+BATCH_SIZE = 10_000
+
+# Star rating for a latent score above each threshold, best first
+RATING_THRESHOLDS = [(1.0, 3), (0.0, 2), (-1.0, 1)]
+TRASH = -1
+
+# Log-normal source length in words: median about 12, long tail
+WORDS_MEDIAN = 12
+WORDS_SIGMA = 0.8
+MAX_WORDS = 400
+
+# Rough token counts per source word (Thaana output tokenizes poorly)
+INPUT_TOKENS_PER_WORD = 1.5
+OUTPUT_TOKENS_PER_WORD = 4.0
+# Fixed prompt overhead per request (system prompt and examples)
+PROMPT_TOKENS = 600
+# Streaming speed once the first token arrives
+GENERATION_MS_PER_TOKEN = 15
+
+# Chance a rater calls a close Quick Compare pair a tie
+TIE_RATE = 0.15
+
+_SYLLABLES = ["ka", "ra", "dhi", "ve", "hi", "ma", "lu", "fo", "the", "ri", "nu"]
+
+
+class _BatchWriter:
+    """Buffers rows for one table and inserts them in executemany batches."""
+
+    def __init__(self, conn, table):
+        self.conn = conn
+        self.table = table
+        self.rows: list[dict] = []
+        self.count = 0
+
+    def add(self, row: dict) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.rows:
+            self.conn.execute(self.table.insert(), self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+
+def _zipf_weights(n: int, skew: float) -> list[float]:
+    """Weight of the item at each rank; `skew` 0 is uniform."""
+    return [1 / (rank + 1) ** skew for rank in range(n)]
+
+
+def _weighted_sample(rng: random.Random, items: list, weights: list, k: int) -> list:
+    """Sample `k` distinct items with probability proportional to weight."""
+    # Efraimidis-Spirakis: the k largest u^(1/w) keys
+    keyed = sorted(
+        zip(items, weights, strict=True),
+        key=lambda item: rng.random() ** (1 / item[1]),
+        reverse=True,
+    )
+    return [item for item, _weight in keyed[:k]]
+
+
+def _source_text(rng: random.Random, words: int) -> str:
+    return " ".join(
+        "".join(rng.choices(_SYLLABLES, k=rng.randint(1, 4))) for _ in range(words)
+    )
+
+
+def _rating(score: float) -> int:
+    for threshold, rating in RATING_THRESHOLDS:
+        if score > threshold:
+            return rating
+    return TRASH
+
+
+def seed(
+    engine,
+    queries: int = 10_000,
+    users: int = 20,
+    max_models_per_query: int = 6,
+    vote_fraction: float = 0.5,
+    seed: int = 0,
+    *,
+    compare_fraction: float = 0.3,
+    model_skew: float = 0.8,
+    user_skew: float = 1.1,
+    quality_spread: float = 0.6,
+) -> dict[str, int]:
+    """
+    Create the schema if needed and fill it with synthetic data.
+
+    Rows are generated query by query and flushed in batches, so memory
+    stays flat however many rows are requested.
+
+    Args:
+        vote_fraction: Share of queries a user rates with stars; each
+            rating also yields derived comparisons.
+        compare_fraction: Share of queries with Quick Compare choices.
+        model_skew: Zipf exponent of model usage (0 for uniform).
+        user_skew: Zipf exponent of user activity (0 for uniform).
+        quality_spread: Standard deviation of the hidden model quality, in
+            rating-scale units.
+
+    Returns:
+        Number of rows inserted per table.
+    """
+    rng = random.Random(seed)
+    config = get_config()
+    models = [key for key, model in config.MODELS.items() if model["is_active"]]
+    rng.shuffle(models)
+    model_weights = _zipf_weights(len(models), model_skew)
+    quality = {model: rng.gauss(0, quality_spread) for model in models}
+    # Seconds before the first token; reasoning presets think first
+    think_seconds = {
+        model: rng.lognormvariate(0, 0.5)
+        * (20.0 if config.MODELS[model].get("reasoning") else 1.5)
+        for model in models
+    }
+    now = datetime.datetime.now()
+    year = datetime.timedelta(days=365)
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        user_ids = [
+            conn.execute(
+                User.__table__.insert(),
+                {"username": f"seed_user_{seed}_{i}", "password_hash": "x"},
+            ).inserted_primary_key[0]
+            for i in range(users)
+        ]
+        user_weights = _zipf_weights(users, user_skew)
+        # Lenient or harsh raters, and how consistent they are
+        user_bias = {user_id: rng.gauss(0, 0.4) for user_id in user_ids}
+        user_noise = {user_id: rng.uniform(0.5, 1.2) for user_id in user_ids}
+
+        (query_id,) = conn.exec_driver_sql(
+            "SELECT COALESCE(MAX(id), 0) FROM queries"
+        ).one()
+        (translation_id,) = conn.exec_driver_sql(
+            "SELECT COALESCE(MAX(id), 0) FROM translations"
+        ).one()
+
+        query_writer = _BatchWriter(conn, Query.__table__)
+        translation_writer = _BatchWriter(conn, Translation.__table__)
+        vote_writer = _BatchWriter(conn, Vote.__table__)
+        comparison_writer = _BatchWriter(conn, PairwiseComparison.__table__)
+
+        # Timestamps ascend with ids, busier towards the end of the year
+        offsets = sorted(math.sqrt(rng.random()) for _ in range(queries))
+        for i, offset in enumerate(offsets):
+            query_id += 1
+            ts = now - year + offset * year
+            words = min(
+                MAX_WORDS,
+                max(1, round(rng.lognormvariate(0, WORDS_SIGMA) * WORDS_MEDIAN)),
+            )
+            source_text = f"{seed}-{i} {_source_text(rng, words)}"
+            query_writer.add(
+                {
+                    "id": query_id,
+                    "source_text": source_text,
+                    "source_hash": source_hash(source_text),
+                    "timestamp": ts,
+                }
+            )
+
+            # The requesting user's translations share the query's timestamp
+            requester = rng.choices(user_ids, user_weights)[0]
+            translations = []
+            count = rng.randint(2, min(max_models_per_query, len(models)))
+            picked = _weighted_sample(rng, models, model_weights, count)
+            for position, model in enumerate(picked, 1):
+                translation_id += 1
+                prices = config.MODELS[model]
+                input_tokens = PROMPT_TOKENS + words * INPUT_TOKENS_PER_WORD
+                output_tokens = words * OUTPUT_TOKENS_PER_WORD * rng.uniform(0.8, 1.3)
+                translation_writer.add(
+                    {
+                        "id": translation_id,
+                        "query_id": query_id,
+                        "user_id": requester,
+                        "model": model,
+                        "translation": f"translation {translation_id} of {model}",
+                        "system_prompt": "seed",
+                        "position": position,
+                        "cost": (
+                            input_tokens * prices["input_cost_per_mtok"]
+                            + output_tokens * prices["output_cost_per_mtok"]
+                        )
+                        / 1_000_000,
+                        "generation_ms": round(
+                            1000 * think_seconds[model] * rng.lognormvariate(0, 0.3)
+                            + output_tokens * GENERATION_MS_PER_TOKEN
+                        ),
+                        "created_at": ts,
+                    }
+                )
+                translations.append((translation_id, model))
+
+            if rng.random() < vote_fraction:
+                user_id = rng.choices(user_ids, user_weights)[0]
+                ratings = {}
+                for t_id, model in translations:
+                    score = (
+                        quality[model]
+                        + user_bias[user_id]
+                        + rng.gauss(0, user_noise[user_id])
+                    )
+                    ratings[t_id] = _rating(score)
+                    vote_writer.add(
+                        {
+                            "user_id": user_id,
+                            "query_id": query_id,
+                            "translation_id": t_id,
+                            "rating": ratings[t_id],
+                        }
+                    )
+                # Derived comparisons, as `process_votes` records them
+                for (a_id, a_model), (b_id, b_model) in combinations(translations, 2):
+                    if ratings[a_id] == ratings[b_id]:
+                        winner, loser = None, None
+                    elif ratings[a_id] > ratings[b_id]:
+                        winner, loser = a_model, b_model
+                    else:
+                        winner, loser = b_model, a_model
+                    comparison_writer.add(
+                        {
+                            "query_id": query_id,
+                            "user_id": user_id,
+                            "winner_model": winner,
+                            "loser_model": loser,
+                            "translation_a_id": a_id,
+                            "translation_b_id": b_id,
+                            "source": "derived",
+                            "created_at": ts,
+                        }
+                    )
+
+            if rng.random() < compare_fraction:
+                # A Quick Compare user judges some of the query's pairs later on
+                user_id = rng.choices(user_ids, user_weights)[0]
+                compared_at = ts + (now - ts) * rng.random()
+                pairs = list(combinations(translations, 2))
+                for (a_id, a_model), (b_id, b_model) in rng.sample(
+                    pairs, rng.randint(1, len(pairs))
+                ):
+                    # Bradley-Terry choice on the hidden qualities
+                    gap = (quality[a_model] - quality[b_model]) / user_noise[user_id]
+                    p = 1 / (1 + math.exp(-2 * gap))
+                    if rng.random() < TIE_RATE * (1 - abs(2 * p - 1)):
+                        winner, loser = None, None
+                    elif rng.random() < p:
+                        winner, loser = a_model, b_model
+                    else:
+                        winner, loser = b_model, a_model
+                    comparison_writer.add(
+                        {
+                            "query_id": query_id,
+                            "user_id": user_id,
+                            "winner_model": winner,
+                            "loser_model": loser,
+                            "translation_a_id": a_id,
+                            "translation_b_id": b_id,
+                            "source": "explicit",
+                            "created_at": compared_at,
+                        }
+                    )
+
+        # Write out the last partial batches
+        for writer in (
+            query_writer,
+            translation_writer,
+            vote_writer,
+            comparison_writer,
+        ):
+            writer.flush()
+
+    # Core inserts bypass the write-time ELO updates, rollup and counters, so
+    # build them afterwards
+    with Session(engine) as session:
+        elo = recompute_elo(session)
+        ModelStatsRepository(session).rebuild()
+        CounterRepository(session).rebuild()
+
+    return {
+        "users": users,
+        "queries": query_writer.count,
+        "translations": translation_writer.count,
+        "votes": vote_writer.count,
+        "pairwise_comparisons": comparison_writer.count,
+        "model_elo": len(elo),
+    }
+
+
+def _same_database(uri: str, other: str) -> bool:
+    """Whether two SQLAlchemy URIs point at the same database."""
+    url, other_url = make_url(uri), make_url(other)
+    if url.get_backend_name() == "sqlite" and other_url.get_backend_name() == "sqlite":
+        return os.path.realpath(url.database or ":memory:") == os.path.realpath(
+            other_url.database or ":memory:"
+        )
+    return url.render_as_string(hide_password=False) == other_url.render_as_string(
+        hide_password=False
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--database",
+        required=True,
+        help="SQLAlchemy URI of a throwaway database, e.g. sqlite:///seed.db",
+    )
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--max-models-per-query", type=int, default=6)
+    parser.add_argument("--vote-fraction", type=float, default=0.5)
+    parser.add_argument("--compare-fraction", type=float, default=0.3)
+    parser.add_argument(
+        "--model-skew", type=float, default=0.8, help="Zipf exponent of model usage"
+    )
+    parser.add_argument(
+        "--user-skew", type=float, default=1.1, help="Zipf exponent of user activity"
+    )
+    parser.add_argument(
+        "--quality-spread",
+        type=float,
+        default=0.6,
+        help="Standard deviation of the hidden model quality",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Seed the configured DATABASE_URI anyway",
+    )
+    args = parser.parse_args()
+
+    if not args.force and _same_database(args.database, get_config().DATABASE_URI):
+        parser.error(
+            "--database is the configured DATABASE_URI; seeding adds fake users "
+            "and rewrites every ELO rating (use --force to seed it anyway)"
+        )
+
+    counts = seed(
+        create_engine(args.database),
+        queries=args.queries,
+        users=args.users,
+        max_models_per_query=args.max_models_per_query,
+        vote_fraction=args.vote_fraction,
+        seed=args.seed,
+        compare_fraction=args.compare_fraction,
+        model_skew=args.model_skew,
+        user_skew=args.user_skew,
+        quality_spread=args.quality_spread,
+    )
+    for table, count in counts.items():
+        print(f"{table:<22} {count:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Simulate how fast each Quick Compare pair selection strategy ranks models.
+
+Synthetic raters judge pairs of models with hidden true ratings: a rater
+prefers a with probability logistic(discrimination * (true_a - true_b)) on
+the ELO scale, each rater with their own discrimination, and calls close
+pairs a tie now and then. Every strategy picks model pairs the way the pair
+scheduler does: it scores all model pairs from the online ELO ratings
+(updated with the app's own arithmetic) once per prefetched batch and
+samples each pair of the batch among the `--top-buckets` best.
+
+After every `--every` judgments, the estimated order (a Bradley-Terry fit
+of all judgments so far, or the ELO ratings themselves) is compared with
+the true order by Kendall rank correlation. Every strategy faces the same
+models and raters in a given run, so the report also shows each strategy's
+paired difference from the first one, with its standard error.
+
+Usage:
+    python scripts/simulate_pair_selection.py --models 12 --runs 40
+"""
+
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+from itertools import combinations
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services import bradley_terry
+from app.services.elo_service import DEFAULT_ELO, elo_update
+from app.services.pair_scheduler import TOP_BUCKETS
+from app.services.pair_selection import STRATEGIES, ModelBelief, get_pair_scorer
+
+# Budget fractions reported in the table
+REPORT_FRACTIONS = (0.2, 0.4, 0.6, 1.0)
+
+
+def kendall_tau(estimated: list[float], truth: list[float]) -> float:
+    """Kendall rank correlation; ties in the estimate count as zero."""
+    score = 0
+    pairs = 0
+    for i, j in combinations(range(len(truth)), 2):
+        product = (estimated[i] - estimated[j]) * (truth[i] - truth[j])
+        score += 1 if product > 0 else -1 if product < 0 else 0
+        pairs += 1
+    return score / pairs if pairs else 1.0
+
+
+def simulate(strategy: str, args, run: int) -> list[float]:
+    """Run one rater session and return the correlation at every checkpoint."""
+    world = random.Random(f"world-{args.seed}-{run}")
+    truth = [world.gauss(DEFAULT_ELO, args.spread) for _ in range(args.models)]
+    raters = [math.exp(world.gauss(0, args.rater_noise)) for _ in range(args.raters)]
+    rng = random.Random(f"play-{args.seed}-{run}")
+
+    # [elo_rating, wins, losses, ties], as in ELOService
+    state = [[DEFAULT_ELO, 0, 0, 0] for _ in range(args.models)]
+    pairs = list(combinations(range(args.models), 2))
+    # (i, j) -> [wins of i, wins of j, ties] for the Bradley-Terry estimate
+    counts = {pair: [0, 0, 0] for pair in pairs}
+    scorer = None if strategy == "random" else get_pair_scorer(strategy)
+
+    taus = []
+    batch: list[tuple[int, int]] = []
+    for judgment in range(1, args.judgments + 1):
+        if scorer is None:
+            a, b = rng.choice(pairs)
+        else:
+            if not batch:
+                beliefs = {
+                    i: ModelBelief(s[0], s[1] + s[2] + s[3])
+                    for i, s in enumerate(state)
+                }
+                score = scorer(beliefs)
+                ranked = sorted(pairs, key=lambda pair: score(*pair), reverse=True)
+                top = ranked[: args.top_buckets]
+                batch = [rng.choice(top) for _ in range(args.batch)]
+            a, b = batch.pop()
+
+        discrimination = rng.choice(raters)
+        p = 1 / (1 + 10 ** (-discrimination * (truth[a] - truth[b]) / 400))
+        if rng.random() < args.tie_rate * (1 - abs(2 * p - 1)):
+            score_a = 0.5
+            state[a][3] += 1
+            state[b][3] += 1
+            counts[a, b][2] += 1
+        elif rng.random() < p:
+            score_a = 1
+            state[a][1] += 1
+            state[b][2] += 1
+            counts[a, b][0] += 1
+        else:
+            score_a = 0
+            state[b][1] += 1
+            state[a][2] += 1
+            counts[a, b][1] += 1
+        delta_a, delta_b = elo_update(state[a][0], state[b][0], score_a)
+        state[a][0] += delta_a
+        state[b][0] += delta_b
+
+        if judgment % args.every == 0:
+            if args.estimator == "elo":
+                estimate = [s[0] for s in state]
+            else:
+                estimate = bradley_terry.fit(args.models, counts)
+            taus.append(kendall_tau(estimate, truth))
+    return taus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", type=int, default=12)
+    parser.add_argument("--judgments", type=int, default=1500)
+    parser.add_argument("--runs", type=int, default=40)
+    parser.add_argument("--target", type=float, default=0.9)
+    parser.add_argument("--every", type=int, default=50, help="Checkpoint interval")
+    parser.add_argument(
+        "--spread", type=float, default=150.0, help="SD of true ELO ratings"
+    )
+    parser.add_argument("--raters", type=int, default=8)
+    parser.add_argument(
+        "--rater-noise", type=float, default=0.4, help="SD of log discrimination"
+    )
+    parser.add_argument("--tie-rate", type=float, default=0.15)
+    parser.add_argument("--top-buckets", type=int, default=TOP_BUCKETS)
+    parser.add_argument(
+        "--batch", type=int, default=5, help="Pairs picked per scoring (prefetch)"
+    )
+    parser.add_argument("--strategies", nargs="+", default=["random", *STRATEGIES])
+    parser.add_argument(
+        "--estimator",
+        choices=["bradley_terry", "elo"],
+        default="bradley_terry",
+        help="Ranking compared with the truth: a Bradley-Terry fit of all "
+        "judgments so far, or the online ELO ratings (noisier at K_FACTOR)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    checkpoints = args.judgments // args.every
+    report = [max(0, math.ceil(checkpoints * f) - 1) for f in REPORT_FRACTIONS]
+    print(
+        f"{args.models} models, {args.judgments} judgments, {args.runs} runs, "
+        f"{args.estimator} ranking: mean Kendall tau after n judgments"
+    )
+    header = "".join(f"{(i + 1) * args.every:>22}" for i in report)
+    print(f"{'Strategy':<18}{header}{'tau >= ' + str(args.target):>14}")
+
+    baseline = None
+    for strategy in args.strategies:
+        curves = [simulate(strategy, args, run) for run in range(args.runs)]
+        mean_curve = [
+            statistics.fmean(curve[i] for curve in curves) for i in range(checkpoints)
+        ]
+        # First checkpoint where the mean correlation reaches the target
+        reached = next(
+            (
+                (i + 1) * args.every
+                for i, tau in enumerate(mean_curve)
+                if tau >= args.target
+            ),
+            "-",
+        )
+
+        cells = ""
+        for i in report:
+            cell = f"{mean_curve[i]:.3f}"
+            if baseline is not None and len(curves) > 1:
+                diffs = [
+                    curve[i] - base[i]
+                    for curve, base in zip(curves, baseline, strict=True)
+                ]
+                error = statistics.stdev(diffs) / math.sqrt(len(diffs))
+                cell += f" {statistics.fmean(diffs):+.3f}±{error:.3f}"
+            cells += f"{cell:>22}"
+        print(f"{strategy:<18}{cells}{reached:>14}")
+        if baseline is None:
+            baseline = curves
+    print(f"(±: paired difference from {args.strategies[0]} and its standard error)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Stress the ELO write path from many threads and check nothing was lost.
+
+Threads submit explicit comparisons (as /compare/submit does) and star
+votes that derive comparisons (as /vote does) against a file database,
+like gunicorn's threads sharing one process. Afterwards:
+
+- every model's wins, losses and ties must equal the counts derived from
+  the stored comparisons,
+- ratings must equal a replay of the comparison history, which only
+  holds if no update was lost or applied out of order,
+- the model stats rollup must match the votes.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="elo_stress_")
+
+from app import create_app, database
+from app.config import get_config
+from app.models import (
+    Base,
+    ModelELO,
+    PairwiseComparison,
+    Query,
+    Translation,
+    User,
+)
+from app.repositories.model_stats_repository import ModelStatsRepository
+from app.services.elo_replay import WIN, load_history, replay
+from app.services.elo_service import get_elo_service
+from app.services.vote_service import process_votes
+
+
+def setup(models: list[str], queries: int, users: int) -> dict[int, list[int]]:
+    """Create users and one translation per model per query."""
+    session = database.db_session
+    for user_id in range(1, users + 1):
+        session.add(User(id=user_id, username=f"stress{user_id}", password_hash="x"))
+    translations: dict[int, list[int]] = {}
+    translation_id = 0
+    for query_id in range(1, queries + 1):
+        session.add(Query(id=query_id, source_text=f"stress {query_id}"))
+        for position, model in enumerate(models, 1):
+            translation_id += 1
+            session.add(
+                Translation(
+                    id=translation_id,
+                    query_id=query_id,
+                    model=model,
+                    translation=f"{model} {query_id}",
+                    system_prompt="stress",
+                    position=position,
+                )
+            )
+            translations.setdefault(query_id, []).append(translation_id)
+    session.commit()
+    ModelStatsRepository(session).rebuild()
+    database.db_session.remove()
+    return translations
+
+
+def worker(
+    user_id: int,
+    operations: int,
+    translations: dict[int, list[int]],
+    models: list[str],
+    seed: int,
+    errors: list,
+) -> None:
+    rng = random.Random(seed)
+    try:
+        for _ in range(operations):
+            query_id = rng.choice(list(translations))
+            if rng.random() < 0.5:
+                # Explicit comparison, winner or tie
+                a, b = rng.sample(translations[query_id], 2)
+                winner = loser = None
+                if rng.random() < 0.8:
+                    winner, loser = (
+                        models[(a - 1) % len(models)],
+                        models[(b - 1) % len(models)],
+                    )
+                get_elo_service().record_comparison(
+                    query_id, user_id, winner, loser, a, b, "explicit"
+                )
+            else:
+                chosen = rng.sample(translations[query_id], 3)
+                votes = [
+                    {"translation_id": t, "rating": rng.choice([3, 2, 1, -1])}
+                    for t in chosen
+                ]
+                result = process_votes(user_id, query_id, votes)
+                if not result["success"]:
+                    errors.append(result)
+    except Exception as e:  # noqa: BLE001 - reported after the run
+        errors.append(e)
+    finally:
+        database.db_session.remove()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=200)
+    parser.add_argument("--models", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    create_app()
+    Base.metadata.create_all(bind=database.engine)
+    models = list(get_config().MODELS)[: args.models]
+    translations = setup(models, args.queries, args.threads)
+
+    errors: list = []
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(i + 1, args.operations, translations, models, args.seed + i, errors),
+        )
+        for i in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    session = database.db_session
+    comparisons = session.query(PairwiseComparison).count()
+    print(
+        f"{args.threads} threads x {args.operations} operations: "
+        f"{comparisons} comparisons in {elapsed:.1f}s, {len(errors)} errors"
+    )
+    for error in errors[:5]:
+        print(f"  {error!r}")
+
+    history = load_history(session)
+    expected = Counter()
+    for a, b, outcome in zip(history.a, history.b, history.outcomes, strict=True):
+        model_a, model_b = history.models[a], history.models[b]
+        if outcome == WIN:
+            expected[(model_a, "wins")] += 1
+            expected[(model_b, "losses")] += 1
+        else:
+            expected[(model_a, "ties")] += 1
+            expected[(model_b, "ties")] += 1
+    replayed = {r.model: r.elo_rating for r in replay(history)}
+
+    failures = list(errors)
+    for record in session.query(ModelELO).all():
+        for field in ("wins", "losses", "ties"):
+            stored, want = getattr(record, field) or 0, expected[(record.model, field)]
+            if stored != want:
+                failures.append(
+                    f"{record.model} {field}: stored {stored}, expected {want}"
+                )
+        if record.elo_rating != replayed.get(record.model):
+            failures.append(
+                f"{record.model} rating: stored {record.elo_rating}, "
+                f"replayed {replayed.get(record.model)}"
+            )
+    failures += [
+        f"{model} {field}: stored {stored}, expected {want}"
+        for model, field, stored, want in ModelStatsRepository(session).check()
+    ]
+
+    for failure in failures[:20]:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: counters, ratings and stats rollup are exact")
+
+
+if __name__ == "__main__":
+    main()
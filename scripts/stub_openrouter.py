@@ -0,0 +1,397 @@
+"""OpenAI-compatible stub of the OpenRouter chat completions API.
+
+Answers `POST .../chat/completions` the way `OpenRouterClient` expects, both
+plain and streamed (`stream=True` with `include_usage`), so the translation
+path can be load-tested without spending money:
+
+    python scripts/stub_openrouter.py --port 8089
+    OPENROUTER_BASE_URL=http://127.0.0.1:8089/v1 OPENROUTER_API_KEY=stub \\
+        gunicorn --workers 1 --threads 8 wsgi:app
+
+Each upstream model gets a latency profile: a log-normal time to first
+token, a token rate for the rest of the output, and output length relative
+to the input. Built-in profiles make "lite" and "flash" models fast and "pro",
+"opus" and reasoning models slow; `--profile` loads overrides from JSON:
+
+    {"default": {"ttfb_median": 0.8},
+     "models": {"google/gemini-3-pro-preview": {"ttfb_median": 6, "timeout_rate": 0.05}}}
+
+Faults are injected per request with the profile's rates: 429 (with
+Retry-After), 5xx, `finish_reason: "length"`, and timeouts (the request hangs
+for `--hang-seconds` without answering). The `--*-rate` flags set them for
+every model. `GET /stub/stats` returns request, outcome and in-flight counts.
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Thaana letters and fili, for plausible-looking output
+_LETTERS = "ހށނރބޅކއވމފދތލގޏސޑޒޓޔޕޖޗ"
+_FILI = "ަާިީުޫެޭޮޯ"
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Latency, output length and fault rates of one upstream model."""
+
+    ttfb_median: float = 0.8  # Seconds to the first token (log-normal median)
+    ttfb_sigma: float = 0.5  # Log-normal shape of the time to first token
+    tokens_per_second: float = 80.0
+    output_ratio: float = 2.5  # Output tokens per input token
+    min_output_tokens: int = 8
+    rate_limit_rate: float = 0.0  # 429 Too Many Requests
+    server_error_rate: float = 0.0  # 500/502/503
+    length_rate: float = 0.0  # finish_reason "length"
+    timeout_rate: float = 0.0  # Hang without answering
+
+
+# First matching keyword of the upstream model name wins
+BUILTIN_PROFILES: list[tuple[str, ModelProfile]] = [
+    ("lite", ModelProfile(ttfb_median=0.4, tokens_per_second=200)),
+    ("reasoning", ModelProfile(ttfb_median=5.0, ttfb_sigma=0.6, tokens_per_second=120)),
+    ("pro", ModelProfile(ttfb_median=4.0, ttfb_sigma=0.6, tokens_per_second=90)),
+    ("opus", ModelProfile(ttfb_median=2.5, tokens_per_second=40)),
+    ("sonnet", ModelProfile(ttfb_median=1.5, tokens_per_second=60)),
+    ("flash", ModelProfile(ttfb_median=0.6, tokens_per_second=150)),
+]
+
+
+class StubState:
+    """Profiles and counters shared by the request handler threads."""
+
+    def __init__(
+        self,
+        default: ModelProfile,
+        overrides: dict[str, ModelProfile],
+        hang_seconds: float,
+        seed: int | None,
+    ):
+        self.default = default
+        self.overrides = overrides
+        self.hang_seconds = hang_seconds
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests: Counter[str] = Counter()
+        self.outcomes: Counter[str] = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def profile(self, model: str) -> ModelProfile:
+        if model in self.overrides:
+            return self.overrides[model]
+        for keyword, profile in BUILTIN_PROFILES:
+            if keyword in model:
+                # Fault rates set on the command line apply to every model
+                return replace(
+                    profile,
+                    rate_limit_rate=self.default.rate_limit_rate,
+                    server_error_rate=self.default.server_error_rate,
+                    length_rate=self.default.length_rate,
+                    timeout_rate=self.default.timeout_rate,
+                )
+        return self.default
+
+    def random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def ttfb(self, profile: ModelProfile) -> float:
+        with self._lock:
+            return profile.ttfb_median * math.exp(
+                self._rng.gauss(0, profile.ttfb_sigma)
+            )
+
+    def start(self, model: str) -> None:
+        with self._lock:
+            self.requests[model] += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finish(self, outcome: str) -> None:
+        with self._lock:
+            self.outcomes[outcome] += 1
+            self.in_flight -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "outcomes": dict(self.outcomes),
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+
+def _output_tokens(rng: random.Random, count: int) -> list[str]:
+    return [
+        "".join(rng.choice(_LETTERS) + rng.choice(_FILI) for _ in range(2)) + " "
+        for _ in range(count)
+    ]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Chat completions over HTTP/1.1 keep-alive, like the real upstream."""
+
+    protocol_version = "HTTP/1.1"
+    server: "StubServer"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "code": 404}})
+            return
+
+        state = self.server.state
+        model = body.get("model", "")
+        profile = state.profile(model)
+        state.start(model)
+        outcome = "error"
+        try:
+            outcome = self._complete(state, profile, model, body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (e.g. its own timeout)
+            outcome = "disconnected"
+        finally:
+            state.finish(outcome)
+
+    def do_GET(self):
+        if self.path == "/stub/stats":
+            self._send_json(200, self.server.state.snapshot())
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "code": 404}})
+
+    def do_HEAD(self):
+        # Connection warm-up only needs some response
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+    def _complete(
+        self, state: StubState, profile: ModelProfile, model: str, body: dict
+    ) -> str:
+        """Answer one completion request; returns the outcome for the stats."""
+        if state.random() < profile.timeout_rate:
+            time.sleep(state.hang_seconds)
+            self.close_connection = True
+            return "timeout"
+        if state.random() < profile.rate_limit_rate:
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded (stub)", "code": 429}},
+                {"Retry-After": "1"},
+            )
+            return "429"
+        if state.random() < profile.server_error_rate:
+            status = (500, 502, 503)[int(state.random() * 3)]
+            self._send_json(
+                status, {"error": {"message": "Upstream error (stub)", "code": status}}
+            )
+            return str(status)
+
+        prompt = " ".join(
+            str(message.get("content") or "") for message in body.get("messages", [])
+        )
+        prompt_tokens = max(1, len(prompt) // 4)
+        wanted = max(
+            profile.min_output_tokens,
+            round(prompt_tokens * profile.output_ratio * (0.8 + 0.4 * state.random())),
+        )
+        finish_reason = "stop"
+        if state.random() < profile.length_rate:
+            finish_reason = "length"
+            wanted = body.get("max_tokens") or wanted
+        tokens = _output_tokens(random.Random(), wanted)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+
+        time.sleep(state.ttfb(profile))
+        completion_id = f"gen-stub-{uuid.uuid4().hex[:16]}"
+        if body.get("stream"):
+            self._stream(profile, model, completion_id, tokens, finish_reason, usage)
+        else:
+            time.sleep(len(tokens) / profile.tokens_per_second)
+            self._send_json(
+                200,
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": "".join(tokens),
+                            },
+                            "finish_reason": finish_reason,
+                        }
+                    ],
+                    "usage": usage,
+                },
+            )
+        return finish_reason
+
+    def _stream(
+        self,
+        profile: ModelProfile,
+        model: str,
+        completion_id: str,
+        tokens: list[str],
+        finish_reason: str,
+        usage: dict,
+    ) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(choices: list, **extra) -> None:
+            event = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+                **extra,
+            }
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+
+        # Send a few tokens per chunk, paced at the model's token rate
+        per_chunk = 4
+        for i in range(0, len(tokens), per_chunk):
+            piece = tokens[i : i + per_chunk]
+            chunk([{"index": 0, "delta": {"content": "".join(piece)}}])
+            time.sleep(len(piece) / profile.tokens_per_second)
+        chunk([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        chunk([], usage=usage)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _send_json(
+        self, status: int, payload: dict, headers: dict[str, str] | None = None
+    ) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], state: StubState):
+        super().__init__(address, StubHandler)
+        self.state = state
+
+
+def load_profiles(
+    path: str | None, default: ModelProfile
+) -> tuple[ModelProfile, dict[str, ModelProfile]]:
+    """Read the default and per-model overrides from a JSON profile file."""
+    if not path:
+        return default, {}
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    known = {f.name for f in fields(ModelProfile)}
+    for name, values in [("default", raw.get("default", {}))] + list(
+        raw.get("models", {}).items()
+    ):
+        unknown = set(values) - known
+        if unknown:
+            msg = f"Unknown profile fields for {name}: {sorted(unknown)}"
+            raise ValueError(msg)
+    default = replace(default, **raw.get("default", {}))
+    overrides = {
+        model: replace(default, **values)
+        for model, values in raw.get("models", {}).items()
+    }
+    return default, overrides
+
+
+def start_stub(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    default: ModelProfile | None = None,
+    overrides: dict[str, ModelProfile] | None = None,
+    hang_seconds: float = 600.0,
+    seed: int | None = None,
+) -> StubServer:
+    """Serve the stub on a background thread; port 0 picks a free port."""
+    state = StubState(default or ModelProfile(), overrides or {}, hang_seconds, seed)
+    server = StubServer((host, port), state)
+    threading.Thread(
+        target=server.serve_forever, name="stub-openrouter", daemon=True
+    ).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument(
+        "--profile", help="JSON file with default and per-model profiles"
+    )
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    parser.add_argument("--length-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--hang-seconds",
+        type=float,
+        default=600.0,
+        help="How long a timed-out request hangs (longer than the client timeout)",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    default = ModelProfile(
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate,
+        length_rate=args.length_rate,
+        timeout_rate=args.timeout_rate,
+    )
+    default, overrides = load_profiles(args.profile, default)
+    server = start_stub(
+        args.host, args.port, default, overrides, args.hang_seconds, args.seed
+    )
+    host, port = server.server_address[:2]
+    print(f"Stub OpenRouter on http://{host}:{port}/v1 (stats: /stub/stats)")
+    print(f"Default profile: {json.dumps(asdict(default))}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -21,11 +21,20 @@ document.addEventListener('DOMContentLoaded', () => {
     elements.activeFilterMsg = document.getElementById('active-filter-msg');
     elements.activeFilterList = document.getElementById('active-filter-list');
     
+    // Prefetch: keep a few pairs ready so the next one shows without a round trip
+    const PREFETCH_COUNT = 5;
+    const REFILL_THRESHOLD = 2;
+
     // State
     let currentComparison = null;
     let isSubmitting = false;
     let availableModels = {};
     let selectedModels = new Set();
+    let pairQueue = [];
+    let refillPromise = null;
+    let noMorePairs = false;
+    let releaseLeases = true; // A reloaded page no longer holds the pairs leased to it
+    let queueGeneration = 0; // Bumped when filters change, to drop stale refills
     
     // Initialization
     fetchAvailableModels(); // Load models first, but don't wait for it to load comparison
@@ -58,6 +67,7 @@ document.addEventListener('DOMContentLoaded', () => {
     if(elements.applyFiltersBtn) {
         elements.applyFiltersBtn.addEventListener('click', () => {
             updateSelectedModels();
+            resetQueue();
             loadNextComparison();
             // Optional: Close panel on apply? keeping it open might be better if they want to tweak 
             // elements.filterPanel.classList.add('hidden'); 
@@ -68,6 +78,7 @@ document.addEventListener('DOMContentLoaded', () => {
         elements.clearFiltersBtn.addEventListener('click', () => {
              document.querySelectorAll('.model-filter-checkbox').forEach(cb => cb.checked = false);
              updateSelectedModels(); // Will clear the set
+             resetQueue();
              loadNextComparison();
         });
     }
@@ -147,26 +158,79 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function pairKey(pair) {
+        return pair.translations.map(tr => tr.id).sort((a, b) => a - b).join('-');
+    }
+
+    function resetQueue() {
+        pairQueue = [];
+        noMorePairs = false;
+        releaseLeases = true; // Pairs held for the old filters may be shown again
+        queueGeneration++;
+    }
+
+    function refillQueue() {
+        if (refillPromise || noMorePairs) return refillPromise;
+        const generation = queueGeneration;
+
+        const params = new URLSearchParams({ count: PREFETCH_COUNT });
+        if (selectedModels.size > 0) {
+            params.set('target_models', Array.from(selectedModels).join(','));
+        }
+        if (releaseLeases) {
+            params.set('release', '1');
+            releaseLeases = false;
+        }
+
+        refillPromise = (async () => {
+            try {
+                const res = await fetch(`/compare/random?${params}`);
+                if (generation !== queueGeneration) return;
+                if (res.status === 404) {
+                    noMorePairs = true;
+                    return;
+                }
+                if (!res.ok) throw new Error('Failed to fetch comparison');
+
+                const data = await res.json();
+                if (generation !== queueGeneration) return;
+                // Other server workers do not share leases, so drop repeats here
+                const held = new Set(pairQueue.map(pairKey));
+                if (currentComparison) held.add(pairKey(currentComparison));
+                data.pairs.forEach(pair => {
+                    if (!held.has(pairKey(pair))) {
+                        pairQueue.push(pair);
+                        held.add(pairKey(pair));
+                    }
+                });
+                if (data.stats) renderStats(data.stats);
+            } finally {
+                refillPromise = null;
+            }
+        })();
+        return refillPromise;
+    }
+
     async function loadNextComparison() {
-        showLoading();
-        
         try {
-            let url = '/compare/random';
-            if (selectedModels.size > 0) {
-                const modelsParam = Array.from(selectedModels).join(',');
-                url += `?target_models=${encodeURIComponent(modelsParam)}`;
+            if (pairQueue.length === 0) {
+                showLoading();
+                await refillQueue();
+                // A refill started for other filters may have finished first
+                if (pairQueue.length === 0 && !noMorePairs) await refillQueue();
             }
 
-            const res = await fetch(url);
-            if (res.status === 404) {
+            const next = pairQueue.shift();
+            if (!next) {
                 showEmptyState();
                 return;
             }
-            
-            if (!res.ok) throw new Error('Failed to fetch comparison');
-            
-            const data = await res.json();
-            renderComparison(data);
+            renderComparison(next);
+
+            // Top up in the background while the rater reads this pair
+            if (pairQueue.length < REFILL_THRESHOLD) {
+                refillQueue()?.catch(err => console.error('Error prefetching comparisons:', err));
+            }
         } catch (err) {
             console.error('Error loading comparison:', err);
             // Show toast or error state
@@ -246,6 +310,9 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         // If tie, winner_id remains null
         
+        // Time to see the selection and model names; runs alongside the submit
+        const revealDelay = new Promise(resolve => setTimeout(resolve, 1500));
+
         try {
             const res = await fetch('/compare/submit', {
                 method: 'POST',
@@ -259,11 +326,12 @@ document.addEventListener('DOMContentLoaded', () => {
             if (!res.ok) throw new Error('Failed to submit comparison');
             
             // Success! Load next
+            const result = await res.json();
+            if (result.stats) renderStats(result.stats);
             showToast(t('toast_votes_submitted'), 'success');
-            setTimeout(() => {
-                isSubmitting = false;
-                loadNextComparison();
-            }, 1500); // 1.5s delay to see selection and model names
+            await revealDelay;
+            isSubmitting = false;
+            loadNextComparison(); // Usually served from the prefetch queue
             
         } catch (err) {
             console.error('Error submitting comparison:', err);
@@ -251,8 +251,8 @@ document.addEventListener('DOMContentLoaded', function() {
             elements.translationsContainer.appendChild(card);
         });
 
-        // Start Stream
-        const params = new URLSearchParams({ query });
+        // Start Stream (stream_tokens=1 asks for partial text as it is generated)
+        const params = new URLSearchParams({ query, stream_tokens: '1' });
         selectedModels.forEach(m => params.append('models', m));
 
         eventSource = new EventSource(`/stream-translate?${params.toString()}`);
@@ -272,6 +272,10 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         };
         
+        eventSource.addEventListener('delta', (e) => {
+            renderDelta(JSON.parse(e.data));
+        });
+
         eventSource.addEventListener('end', () => {
              eventSource.close();
              elements.submitVotesBtn.classList.remove('hidden');
@@ -314,6 +318,23 @@ document.addEventListener('DOMContentLoaded', function() {
         };
     }
     
+    function renderDelta(data) {
+        const card = document.querySelector(`.translation-card[data-model-key="${data.model}"]`);
+        if (!card) return;
+
+        // First delta: swap the skeleton lines for a growing text block
+        let textEl = card.querySelector('.streaming-text');
+        if (!textEl) {
+            const body = card.querySelector('.card-body');
+            if (!body) return;
+            body.innerHTML = '';
+            textEl = document.createElement('p');
+            textEl.className = 'translation-text streaming-text';
+            body.appendChild(textEl);
+        }
+        textEl.textContent += data.delta;
+    }
+
     function renderTranslation(data) {
         const card = document.querySelector(`.translation-card[data-model-key="${data.model}"]`);
         if (!card) return;